@@ -1,72 +1,342 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-import pandas as pd
+import time
+
+_import_started = time.perf_counter()
+
+from flask import Blueprint, Flask, Response, current_app, g, render_template, request, jsonify
 import numpy as np
-import joblib
+import logging
 import os
-from datetime import datetime
+import hmac
 import json
+import threading
+
+from batching import MicroBatcher
+from cascade import cascade_proba
+from drift import DriftMonitor
+from explain import DEFAULT_TOP_FEATURES
+from metrics import MetricsRegistry, SamplingProfiler
+from prediction_cache import PredictionCache, SQLiteCacheBackend, feature_key
+from prediction_log import MAX_QUERY_ROWS, PredictionLog
+from features import RAW_COLUMNS, assemble_matrix, input_columns
+from model_registry import ModelRegistry, ModelWatcher
+from predictor import DEFAULT_MODEL_PATH, format_result, load_bundle
+from similarity import SimilarityIndexStore
+
+_import_seconds = time.perf_counter() - _import_started
+
+logger = logging.getLogger(__name__)
+bp = Blueprint('main', __name__)
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'
+# Hot-path instrumentation, exposed at /metrics
+metrics = MetricsRegistry()
+REQUESTS = metrics.counter('http_requests_total', 'HTTP requests by route, method and status',
+                           ['route', 'method', 'status'])
+REQUEST_ERRORS = metrics.counter('http_request_errors_total', 'HTTP requests that failed with a 5xx status',
+                                 ['route'])
+REQUEST_LATENCY = metrics.histogram('http_request_duration_seconds', 'HTTP request latency by route', ['route'])
+STAGE_LATENCY = metrics.histogram('prediction_stage_duration_seconds',
+                                  'Latency of each prediction stage', ['stage', 'model_version'])
+PREDICTIONS = metrics.counter('predictions_total', 'Accounts scored by the model (cache misses)', ['model_version'])
+PREDICTION_FAILURES = metrics.counter('prediction_failures_total', 'Accounts that could not be scored',
+                                      ['model_version'])
+CASCADE_ROWS = metrics.counter('cascade_rows_total', 'Rows scored in cascade mode by the stage that settled them',
+                               ['stage', 'model_version'])
+MODEL_INFO = metrics.gauge('model_info', 'Currently loaded model version', ['version'])
 
 # Global variables
-model_data = None
-loaded_model = None
-loaded_scaler = None
-feature_columns = None
+# The serving model, scaler and feature columns travel together in one
+# immutable bundle; requests read it once, so a hot swap never mixes versions
+model_bundle = None
+model_registry = None
+model_watcher = None
+prediction_cascade = False
+prediction_cache = None
+prediction_log = None
+micro_batcher = None
+micro_batcher_lock = threading.Lock()
+dashboard_stats = None
+rollup_store = None
+similarity_store = None
+drift_settings = None
+drift_monitor = None
+drift_monitor_lock = threading.Lock()
+profiler = None
 
-def load_model():
+def swap_model(bundle):
+    """Make bundle the serving model; a single reference assignment, so it is atomic"""
+    global model_bundle
+
+    previous = model_bundle
+    model_bundle = bundle
+    # Cache keys include the version, so this only frees stale entries
+    if prediction_cache is not None:
+        prediction_cache.clear()
+    if previous is not None and previous.version != bundle.version:
+        MODEL_INFO.set(0, version=previous.version)
+    MODEL_INFO.set(1, version=bundle.version)
+
+def current_model_version():
+    bundle = model_bundle
+    return bundle.version if bundle is not None else None
+
+def load_model(filepath=DEFAULT_MODEL_PATH, version=None):
     """Load the trained model and preprocessing objects"""
-    global model_data, loaded_model, loaded_scaler, feature_columns
-    
     try:
-        model_data = joblib.load('models/fake_account_detector.pkl')
-        loaded_model = model_data['model']
-        loaded_scaler = model_data['scaler']
-        feature_columns = model_data['feature_columns']
+        swap_model(load_bundle(filepath, version=version))
         print("Model loaded successfully!")
         return True
-    except Exception as e:
-        print(f"Error loading model: {e}")
+    except Exception:
+        logger.exception("Error loading model from %s", filepath)
         return False
 
-def predict_account(input_data):
-    """Make prediction for a single account"""
+def parse_records(records, inputs):
+    """Columns of the given input fields (plus usernames) for a list of account dicts
+
+    Returns the columns and a list of per-row validation errors (None for
+    valid rows); missing fields default to 0.
+    """
+    raw = np.zeros((len(records), len(inputs)), dtype=np.float64)
+    usernames = [None] * len(records)
+    errors = [None] * len(records)
+
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors[i] = 'Account must be a JSON object'
+            continue
+        username = record.get('username')
+        if username is not None and not isinstance(username, str):
+            errors[i] = 'Invalid username: must be a string'
+            continue
+        usernames[i] = username
+        try:
+            raw[i] = [float(record.get(col, 0)) for col in inputs]
+        except (TypeError, ValueError) as e:
+            errors[i] = f"Invalid feature value: {e}"
+            continue
+        if not np.isfinite(raw[i]).all():
+            errors[i] = 'Invalid feature value: must be a finite number'
+
+    columns = {col: raw[:, j] for j, col in enumerate(inputs)}
+    columns['username'] = np.array(usernames, dtype=object)
+    return columns, errors
+
+def build_feature_matrix(records, feature_columns, username_analyzer=None):
+    """Build a 2-D feature matrix in feature_columns order for a list of accounts
+
+    Returns the matrix and a list of per-row validation errors (None for valid rows).
+    Engineered features are derived from the raw fields (and the raw
+    username string, when given) with the shared pipeline; missing fields
+    default to 0.
+    """
+    columns, errors = parse_records(records, input_columns(feature_columns))
+    return assemble_matrix(columns, feature_columns, username_analyzer), errors
+
+def get_similarity_index():
+    """The near-duplicate index, or None when none has been built"""
+    if similarity_store is None:
+        return None
     try:
-        # Create feature vector
-        features = []
-        for col in feature_columns:
-            if col in input_data:
-                features.append(input_data[col])
+        return similarity_store.get()
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.exception("Error loading similarity index from %s", similarity_store.filepath)
+        return None
+
+def get_drift_monitor(bundle):
+    """Drift monitor for the bundle's model version, or None when monitoring is off or it has no reference sketch
+
+    A model swap starts a fresh monitor, since live traffic is compared
+    with the training distribution of the model that serves it.
+    """
+    global drift_monitor
+
+    if drift_settings is None or bundle is None or bundle.drift_reference is None:
+        return None
+    monitor = drift_monitor
+    if monitor is None or monitor.version != bundle.version:
+        with drift_monitor_lock:
+            if drift_monitor is None or drift_monitor.version != bundle.version:
+                if drift_monitor is not None:
+                    drift_monitor.stop()
+                drift_monitor = DriftMonitor(bundle.drift_reference, bundle.version, **drift_settings)
+            monitor = drift_monitor
+    return monitor
+
+def predict_accounts(records, explain=0):
+    """Make predictions for a batch of accounts with a single model pass
+
+    Results are returned in input order; rows that fail validation get an
+    {'error': ...} entry instead of a prediction. With explain > 0, valid
+    rows also get their `explain` top feature contributions and a text
+    explanation, computed in one batched pass (never cached).
+    """
+    bundle = model_bundle
+    model_version = bundle.version
+    cascade = bundle.cascade if prediction_cascade else None
+    # Cascade results differ slightly from the full model's, so they are cached apart
+    cache_version = model_version + '+cascade' if cascade is not None else model_version
+    with STAGE_LATENCY.time(stage='features', model_version=model_version):
+        columns, errors = parse_records(records, input_columns(bundle.feature_columns))
+        features = assemble_matrix(columns, bundle.feature_columns, bundle.username_analyzer)
+    valid = np.array([error is None for error in errors], dtype=bool)
+    results = [{'error': error} for error in errors]
+
+    # Every valid row counts towards drift, cached or not; only the sketch is kept
+    monitor = get_drift_monitor(bundle)
+    if monitor is not None and valid.any():
+        monitor.observe(features[valid])
+
+    # Serve repeated accounts from the cache; only misses reach the model
+    keys = {}
+    if prediction_cache is not None:
+        stage_started = time.perf_counter()
+        for i in np.flatnonzero(valid):
+            keys[i] = feature_key(features[i], cache_version)
+            cached = prediction_cache.get(keys[i])
+            if cached is not None:
+                results[i] = cached
+                valid[i] = False
+        STAGE_LATENCY.observe(time.perf_counter() - stage_started, stage='cache', model_version=model_version)
+
+    if valid.any():
+        # Scale once and score the whole matrix in one predict_proba call
+        with STAGE_LATENCY.time(stage='scale', model_version=model_version):
+            # A compiled engine has the scaler folded into its thresholds
+            if bundle.scaler is not None:
+                features_scaled = bundle.scaler.transform(features[valid])
             else:
-                features.append(0)  # Default value for missing features
-        
-        # Convert to numpy array and reshape
-        features = np.array(features).reshape(1, -1)
-        
-        # Scale features
-        features_scaled = loaded_scaler.transform(features)
-        
-        # Make prediction
-        prediction = loaded_model.predict(features_scaled)[0]
-        probability = loaded_model.predict_proba(features_scaled)[0][1]  # Probability of being fake
-        
-        return {
-            'prediction': int(prediction),
-            'probability': float(probability),
-            'is_fake': bool(prediction),
-            'confidence': float(max(probability, 1 - probability))
-        }
-    except Exception as e:
-        print(f"Error making prediction: {e}")
+                features_scaled = features[valid]
+        with STAGE_LATENCY.time(stage='predict', model_version=model_version):
+            if cascade is not None:
+                probabilities, escalated = cascade_proba(bundle.model, cascade, features_scaled)
+            else:
+                probabilities = bundle.model.predict_proba(features_scaled)[:, 1]
+        if cascade is not None:
+            escalated_count = int(escalated.sum())
+            CASCADE_ROWS.inc(len(probabilities) - escalated_count, stage='first', model_version=model_version)
+            CASCADE_ROWS.inc(escalated_count, stage='full', model_version=model_version)
+        PREDICTIONS.inc(len(probabilities), model_version=model_version)
+
+        for i, probability in zip(np.flatnonzero(valid), probabilities):
+            results[i] = format_result(probability)
+            if i in keys:
+                prediction_cache.set(keys[i], results[i])
+
+    # Size of the bot-farm cluster each account falls into; not cached, as the index is rebuilt independently
+    index = get_similarity_index()
+    scored = np.array([error is None for error in errors], dtype=bool)
+    if index is not None and scored.any():
+        with STAGE_LATENCY.time(stage='similarity', model_version=model_version):
+            rows = np.flatnonzero(scored)
+            sizes = index.match_cluster_sizes({name: values[rows] for name, values in columns.items()})
+        for i, size in zip(rows, sizes):
+            results[i] = dict(results[i], cluster_size=int(size))
+
+    if explain > 0 and bundle.explainer is not None and scored.any():
+        with STAGE_LATENCY.time(stage='explain', model_version=model_version):
+            rows = np.flatnonzero(scored)
+            X_model = bundle.scaler.transform(features[rows]) if bundle.scaler is not None else features[rows]
+            explanations = bundle.explainer.explain(X_model, explain, cascade)
+        for i, fields in zip(rows, explanations):
+            results[i] = dict(results[i], **fields)
+
+    return results
+
+def get_micro_batcher():
+    """Return this process's micro-batcher, or None when batching is disabled
+
+    Created lazily so that each gunicorn worker starts its own scheduler
+    thread after forking.
+    """
+    global micro_batcher
+
+    if current_app.config['MICRO_BATCH_WINDOW_MS'] <= 0:
         return None
+    if micro_batcher is None:
+        with micro_batcher_lock:
+            if micro_batcher is None:
+                micro_batcher = MicroBatcher(
+                    predict_accounts,
+                    window_ms=current_app.config['MICRO_BATCH_WINDOW_MS'],
+                    max_batch_size=current_app.config['MICRO_BATCH_MAX_SIZE']
+                )
+    return micro_batcher
+
+def score_account(input_data, explain=0):
+    """Score a single account: its result, {'error': ...} for invalid input, or None on failure
+
+    Explained predictions skip the micro-batcher, which only coalesces
+    plain scoring requests.
+    """
+    try:
+        batcher = get_micro_batcher() if not explain else None
+        if batcher is not None:
+            return batcher.submit(input_data)
+        return predict_accounts([input_data], explain)[0]
+    except Exception:
+        logger.exception("Error making prediction")
+        PREDICTION_FAILURES.inc(model_version=current_model_version())
+        return None
+
+def predict_account(input_data, explain=0):
+    """Make prediction for a single account (None when it fails or the input is invalid)"""
+    result = score_account(input_data, explain)
+    if result is not None and 'error' in result:
+        logger.warning("Error making prediction: %s", result['error'])
+        PREDICTION_FAILURES.inc(model_version=current_model_version())
+        return None
+    return result
+
+def log_predictions(source, records, results):
+    """Queue scored predictions for the write-behind history log (never blocks on the database)"""
+    if prediction_log is None:
+        return
+    try:
+        prediction_log.record(source, current_model_version(), records, results)
+    except Exception:
+        logger.exception("Error queueing predictions for the history log")
+
+def parse_explain_request():
+    """Number of top features to explain from ?explain=1&top=N (0 when not requested)"""
+    if request.args.get('explain', '').lower() not in ('1', 'true', 'yes'):
+        return 0
+    try:
+        top = int(request.args.get('top', DEFAULT_TOP_FEATURES))
+    except ValueError:
+        raise ValueError('top must be an integer')
+    if top < 1:
+        raise ValueError('top must be at least 1')
+    if model_bundle.explainer is None:
+        raise ValueError(f'Explanations are not available for model version {model_bundle.version}')
+    return top
+
+def parse_batch_request():
+    """Read a batch of accounts from a JSON array or NDJSON request body"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonlines'):
+        records = []
+        for line_number, line in enumerate(request.get_data(as_text=True).splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f"Invalid JSON on line {line_number}")
+        return records
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and 'accounts' in data:
+        data = data['accounts']
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of accounts')
+    return data
 
-@app.route('/')
+@bp.route('/')
 def index():
     """Main page"""
     return render_template('index.html')
 
-@app.route('/detect', methods=['GET', 'POST'])
+@bp.route('/detect', methods=['GET', 'POST'])
 def detect():
     """Account detection page"""
     if request.method == 'POST':
@@ -84,25 +354,17 @@ def detect():
                 'has_bio': int(request.form.get('has_bio', 0)),
                 'has_location': int(request.form.get('has_location', 0)),
                 'verified': int(request.form.get('verified', 0)),
-                'followers_following_ratio': float(request.form.get('followers_following_ratio', 0)),
-                'engagement_rate': float(request.form.get('engagement_rate', 0)),
-                'suspicious_username': int(request.form.get('suspicious_username', 0)),
-                'low_activity': int(request.form.get('low_activity', 0)),
-                'high_follower_ratio': int(request.form.get('high_follower_ratio', 0)),
-                'low_engagement': int(request.form.get('low_engagement', 0))
+                'username': request.form.get('username', ''),
+                'bio': request.form.get('bio', ''),
+                'verified_contact': request.form.get('verified_contact', '')
             }
             
-            # Calculate derived features
-            if data['following'] > 0:
-                data['followers_following_ratio'] = data['followers'] / data['following']
-            
-            if data['followers'] > 0:
-                data['engagement_rate'] = (data['avg_likes'] + data['avg_comments'] + data['avg_shares']) / data['followers']
-            
-            # Make prediction
-            result = predict_account(data)
+            # Make prediction (engineered features are derived from the raw fields)
+            explain = DEFAULT_TOP_FEATURES if model_bundle.explainer is not None else 0
+            result = predict_account(data, explain)
             
             if result:
+                log_predictions('detect', [data], [result])
                 return render_template('detect.html', result=result, form_data=data)
             else:
                 return render_template('detect.html', error="Error making prediction")
@@ -112,70 +374,526 @@ def detect():
     
     return render_template('detect.html')
 
-@app.route('/api/predict', methods=['POST'])
+@bp.route('/api/predict', methods=['POST'])
 def api_predict():
     """API endpoint for predictions"""
     try:
-        data = request.get_json()
+        with STAGE_LATENCY.time(stage='parse', model_version=current_model_version()):
+            data = request.get_json()
         
         if not data:
             return jsonify({'error': 'No data provided'}), 400
-        
+
+        try:
+            explain = parse_explain_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         # Make prediction
-        result = predict_account(data)
+        result = score_account(data, explain)
         
-        if result:
-            return jsonify(result)
-        else:
+        if result is None:
             return jsonify({'error': 'Prediction failed'}), 500
+        # Invalid input is the client's error, not a failed prediction
+        if 'error' in result:
+            return jsonify({'error': result['error']}), 400
+        log_predictions('api', [data], [result])
+        return jsonify(result)
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/dashboard')
+@bp.route('/api/predict/batch', methods=['POST'])
+def api_predict_batch():
+    """API endpoint for scoring many accounts in one request"""
+    try:
+        try:
+            with STAGE_LATENCY.time(stage='parse', model_version=current_model_version()):
+                records = parse_batch_request()
+            explain = parse_explain_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if not records:
+            return jsonify({'error': 'No data provided'}), 400
+
+        max_batch_size = current_app.config['MAX_BATCH_SIZE']
+        if len(records) > max_batch_size:
+            return jsonify({'error': f'Batch too large: {len(records)} accounts (max {max_batch_size})'}), 413
+
+        results = predict_accounts(records, explain)
+        log_predictions('batch', records, results)
+
+        return jsonify({
+            'count': len(results),
+            'errors': sum(1 for result in results if 'error' in result),
+            'results': results
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/batching/stats')
+def api_batching_stats():
+    """Micro-batching metrics for tuning the latency/throughput tradeoff"""
+    batcher = get_micro_batcher()
+    if batcher is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(batcher.stats(), enabled=True))
+
+def get_dashboard_stats():
+    """Return the dashboard statistics cache, importing pandas only when first needed"""
+    global dashboard_stats
+
+    if dashboard_stats is None:
+        from stats_cache import DatasetStatsCache
+        dashboard_stats = DatasetStatsCache(current_app.config['DATASET_PATH'])
+    return dashboard_stats
+
+def get_rollup_store():
+    """Return the analytics rollup store, importing pandas only when first needed"""
+    global rollup_store
+
+    if rollup_store is None:
+        from rollups import RollupStore
+        rollup_store = RollupStore(current_app.config['ROLLUP_PATH'])
+    return rollup_store
+
+@bp.route('/api/stats')
+def api_stats():
+    """Slice queries over the precomputed rollup cube
+
+    group_by is a comma-separated list of dimensions; every other dimension
+    name filters on comma-separated values, e.g.
+    /api/stats?group_by=month&verified=1&completeness=2,3&histograms=1
+    """
+    from rollups import DIMENSIONS
+
+    group_by = [name for name in request.args.get('group_by', '').split(',') if name]
+    filters = {name: request.args[name].split(',') for name in DIMENSIONS if request.args.get(name)}
+    histograms = request.args.get('histograms', '0') == '1'
+
+    try:
+        cube = get_rollup_store().get()
+    except FileNotFoundError:
+        return jsonify({'error': 'No rollup found; build one with rollups.py'}), 404
+
+    started = time.perf_counter()
+    try:
+        groups = cube.query(filters, group_by, histograms)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'rows': cube.rows,
+        'group_by': group_by,
+        'filters': filters,
+        'groups': groups,
+        'query_ms': round((time.perf_counter() - started) * 1000, 3)
+    })
+
+@bp.route('/api/similar', methods=['POST'])
+def api_similar():
+    """Indexed accounts similar to the posted one, and the size of its bot-farm cluster"""
+    index = get_similarity_index()
+    if index is None:
+        return jsonify({'error': 'No similarity index found; build one with similarity.py'}), 404
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not data:
+        return jsonify({'error': 'Expected a JSON object describing one account'}), 400
+    try:
+        limit = min(int(request.args.get('limit', 10)), 100)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    columns, errors = parse_records([data], RAW_COLUMNS)
+    if errors[0] is not None:
+        return jsonify({'error': errors[0]}), 400
+
+    started = time.perf_counter()
+    rows, scores = index.lookup(columns, limit=limit)[0]
+    sizes = index.cluster_sizes
+    return jsonify({
+        'cluster_id': int(index.labels[rows[0]]) if len(rows) else None,
+        'cluster_size': int(sizes[rows[0]]) if len(rows) else 0,
+        'similar': [
+            {'username': index.usernames[row], 'similarity': round(float(score), 4), 'cluster_size': int(sizes[row])}
+            for row, score in zip(rows, scores)
+        ],
+        'query_ms': round((time.perf_counter() - started) * 1000, 3)
+    })
+
+@bp.route('/api/history')
+def api_history():
+    """Recent logged predictions, newest first, filtered by time, source, model version, username or outcome"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+    if prediction_log is None:
+        return jsonify({'error': 'Prediction logging is disabled'}), 404
+
+    args = request.args
+    try:
+        limit = max(1, min(int(args.get('limit', 100)), MAX_QUERY_ROWS))
+        filters = {
+            'since': float(args['since']) if 'since' in args else None,
+            'until': float(args['until']) if 'until' in args else None,
+            'prediction': int(args['prediction']) if 'prediction' in args else None,
+            'source': args.get('source'),
+            'model_version': args.get('model_version'),
+            'username': args.get('username')
+        }
+    except ValueError:
+        return jsonify({'error': 'limit, since, until and prediction must be numbers'}), 400
+
+    results = prediction_log.query(limit, **filters)
+    return jsonify({'count': len(results), 'results': results})
+
+@bp.route('/api/history/stats')
+def api_history_stats():
+    """Write-behind queue depth, written and dropped counts for this worker"""
+    if prediction_log is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(prediction_log.stats(), enabled=True))
+
+@bp.route('/api/drift')
+def api_drift():
+    """Drift of live inputs from the training distribution (?refresh=1 recomputes now)"""
+    monitor = get_drift_monitor(model_bundle)
+    if monitor is None:
+        return jsonify({'error': 'Drift monitoring is disabled or the model has no training sketch'}), 404
+    report = monitor.compute() if request.args.get('refresh') == '1' else monitor.report()
+    return jsonify(report)
+
+@bp.route('/api/cache/stats')
+def api_cache_stats():
+    """Prediction cache hit/miss counters"""
+    if prediction_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(prediction_cache.stats(), enabled=True, model_version=current_model_version()))
+
+@bp.before_app_request
+def start_request_instrumentation():
+    g.request_started = time.perf_counter()
+    if model_watcher is not None:
+        model_watcher.start()
+    monitor = get_drift_monitor(model_bundle)
+    if monitor is not None:
+        monitor.start()
+    g.profile = profiler.start() if profiler is not None else None
+
+@bp.after_app_request
+def finish_request_instrumentation(response):
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    elapsed = time.perf_counter() - g.pop('request_started', time.perf_counter())
+
+    REQUESTS.inc(route=route, method=request.method, status=str(response.status_code))
+    REQUEST_LATENCY.observe(elapsed, route=route)
+    if response.status_code >= 500:
+        REQUEST_ERRORS.inc(route=route)
+
+    sampled = g.pop('profile', None)
+    if sampled is not None:
+        filepath = profiler.finish(sampled, f'{request.method} {route}')
+        logger.info("Profiled %s %s in %.1fms -> %s", request.method, route, elapsed * 1000, filepath)
+    return response
+
+def admin_authorized():
+    """True when ADMIN_TOKEN is configured and the request carries it; admin routes are closed without one"""
+    token = current_app.config.get('ADMIN_TOKEN')
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+def _sample_lines(name, kind, documentation, values):
+    lines = [f'# HELP {name} {documentation}', f'# TYPE {name} {kind}']
+    for labels, value in values:
+        label_text = ','.join(f'{key}="{val}"' for key, val in labels.items())
+        lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+    return lines
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text-format metrics for this worker process"""
+    lines = [metrics.render().rstrip('\n')]
+
+    if prediction_cache is not None:
+        cache = prediction_cache.stats()
+        lines += _sample_lines('prediction_cache_entries', 'gauge', 'Entries in the prediction cache', [({}, cache['entries'])])
+        lines += _sample_lines('prediction_cache_lookups_total', 'counter', 'Prediction cache lookups by result', [
+            ({'result': 'hit'}, cache['hits']),
+            ({'result': 'shared_hit'}, cache['shared_hits']),
+            ({'result': 'miss'}, cache['misses'])
+        ])
+
+    batcher = micro_batcher
+    if batcher is not None:
+        batching = batcher.stats()
+        lines += _sample_lines('micro_batches_total', 'counter', 'Micro-batches scored', [({}, batching['batches'])])
+        lines += _sample_lines('micro_batch_mean_size', 'gauge', 'Mean micro-batch size', [({}, batching['mean_batch_size'])])
+        lines += _sample_lines('micro_batch_queue_delay_ms_mean', 'gauge', 'Mean queueing delay before scoring',
+                              [({}, batching['queue_delay_ms']['mean'])])
+
+    monitor = drift_monitor
+    if monitor is not None and monitor.latest is not None and monitor.latest['features']:
+        lines += _sample_lines('feature_drift_psi', 'gauge', 'Population stability index of live inputs per feature', [
+            ({'feature': name, 'model_version': monitor.version}, values['psi'])
+            for name, values in monitor.latest['features'].items()
+        ])
+
+    if prediction_log is not None:
+        history = prediction_log.stats()
+        lines += _sample_lines('prediction_log_queued', 'gauge', 'Predictions waiting for the history writer',
+                              [({}, history['queued'])])
+        lines += _sample_lines('prediction_log_entries_total', 'counter', 'Prediction log entries by outcome', [
+            ({'outcome': 'written'}, history['written']),
+            ({'outcome': 'dropped'}, history['dropped']),
+            ({'outcome': 'error'}, history['write_errors'])
+        ])
+
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@bp.route('/admin/profiler', methods=['GET', 'POST'])
+def admin_profiler():
+    """Show or change the 1-in-N request sampling profiler"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            every = int(data.get('every', 0))
+        except (TypeError, ValueError):
+            return jsonify({'error': "'every' must be an integer"}), 400
+        if every < 0:
+            return jsonify({'error': "'every' must be >= 0"}), 400
+        profiler.configure(every)
+
+    return jsonify({
+        'every': profiler.every,
+        'output_dir': profiler.output_dir,
+        'recent_profiles': profiler.recent()
+    })
+
+def model_status():
+    bundle = model_bundle
+    return {
+        'serving': bundle.version if bundle is not None else None,
+        'path': bundle.path if bundle is not None else None,
+        'cascade': {key: value for key, value in bundle.cascade.items() if key not in ('coef', 'intercept')}
+                   if bundle is not None and bundle.cascade is not None else None,
+        'registry': model_registry.root,
+        'active': model_registry.active_version(),
+        'pinned': model_registry.pinned(),
+        'versions': model_registry.describe(),
+        'reloads': model_watcher.reloads,
+        'last_error': model_watcher.last_error
+    }
+
+@bp.route('/admin/models')
+def admin_models():
+    """List registry versions and the one this worker is serving"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+    if model_registry is None:
+        return jsonify({'error': 'Model registry is not configured'}), 404
+    return jsonify(model_status())
+
+@bp.route('/admin/models/<action>', methods=['POST'])
+def admin_models_action(action):
+    """Pin a version, unpin (follow the newest) or roll back to the previous version
+
+    The pin is shared through the registry, so every worker follows it
+    within one reload interval; this worker swaps immediately.
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+    if model_registry is None:
+        return jsonify({'error': 'Model registry is not configured'}), 404
+
+    try:
+        if action == 'pin':
+            version = (request.get_json(silent=True) or {}).get('version')
+            if not version:
+                return jsonify({'error': "'version' is required"}), 400
+            model_registry.pin(str(version))
+        elif action == 'unpin':
+            model_registry.unpin()
+        elif action == 'rollback':
+            model_registry.rollback(current_model_version())
+        else:
+            return jsonify({'error': f'Unknown action: {action}'}), 404
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 409
+
+    model_watcher.check()
+    return jsonify(model_status())
+
+@bp.route('/dashboard')
 def dashboard():
     """Analytics dashboard"""
     try:
-        # Load sample data for visualization
-        df = pd.read_csv('data/synthetic_social_media_data.csv')
-        
-        # Calculate statistics
-        total_accounts = len(df)
-        fake_accounts = df['is_fake'].sum()
-        real_accounts = total_accounts - fake_accounts
-        fake_percentage = (fake_accounts / total_accounts) * 100
-        
-        # Average metrics
-        avg_followers = df['followers'].mean()
-        avg_following = df['following'].mean()
-        avg_posts = df['posts_count'].mean()
-        avg_engagement = df['engagement_rate'].mean()
-        
-        stats = {
-            'total_accounts': total_accounts,
-            'fake_accounts': fake_accounts,
-            'real_accounts': real_accounts,
-            'fake_percentage': round(fake_percentage, 2),
-            'avg_followers': round(avg_followers, 2),
-            'avg_following': round(avg_following, 2),
-            'avg_posts': round(avg_posts, 2),
-            'avg_engagement': round(avg_engagement, 4)
-        }
+        # Statistics are cached on the dataset file's identity and only
+        # recomputed (incrementally, for appended rows) when it changes
+        stats = get_dashboard_stats().get()
         
         return render_template('dashboard.html', stats=stats)
         
     except Exception as e:
         return render_template('dashboard.html', error=str(e))
 
-@app.route('/about')
+@bp.route('/about')
 def about():
     """About page"""
     return render_template('about.html')
 
+def configure_prediction_cache(app):
+    """Create the prediction cache described by the app config"""
+    global prediction_cache
+
+    if app.config['PREDICTION_CACHE_SIZE'] <= 0:
+        prediction_cache = None
+        return
+    backend = None
+    if app.config['PREDICTION_CACHE_PATH']:
+        backend = SQLiteCacheBackend(app.config['PREDICTION_CACHE_PATH'])
+    prediction_cache = PredictionCache(
+        max_entries=app.config['PREDICTION_CACHE_SIZE'],
+        ttl_seconds=app.config['PREDICTION_CACHE_TTL'],
+        backend=backend
+    )
+
+def configure_prediction_log(app):
+    """Create the write-behind prediction history log (disabled when PREDICTION_LOG_PATH is empty)"""
+    global prediction_log
+
+    if not app.config['PREDICTION_LOG_PATH']:
+        prediction_log = None
+        return
+    prediction_log = PredictionLog(
+        app.config['PREDICTION_LOG_PATH'],
+        max_queue=app.config['PREDICTION_LOG_QUEUE'],
+        batch_size=app.config['PREDICTION_LOG_BATCH'],
+        policy=app.config['PREDICTION_LOG_POLICY'],
+        max_rows=app.config['PREDICTION_LOG_MAX_ROWS']
+    )
+
+def configure_drift(app):
+    """Drift monitoring settings (monitors are created per model version on first use)"""
+    global drift_settings, drift_monitor
+
+    drift_monitor = None
+    if not app.config['DRIFT_MONITORING']:
+        drift_settings = None
+        return
+    drift_settings = {
+        'interval': app.config['DRIFT_INTERVAL'],
+        'state_dir': app.config['DRIFT_STATE_DIR'] or None
+    }
+
+def configure_model_registry(app):
+    """Watch MODEL_REGISTRY_DIR for new or pinned versions (disabled when unset)"""
+    global model_registry, model_watcher
+
+    if not app.config['MODEL_REGISTRY_DIR']:
+        model_registry = model_watcher = None
+        return
+    model_registry = ModelRegistry(app.config['MODEL_REGISTRY_DIR'])
+    model_watcher = ModelWatcher(model_registry, swap_model, lambda: model_bundle,
+                                 interval=app.config['MODEL_RELOAD_INTERVAL'])
+
+def configure_profiler(app):
+    """Create the sampling profiler; its rate can later be changed at /admin/profiler"""
+    global profiler
+
+    profiler = SamplingProfiler(app.config['PROFILE_DIR'], every=app.config['PROFILE_EVERY'])
+
+def create_app(config=None):
+    """Application factory: configure Flask, load and warm the model, register routes
+
+    Under `gunicorn --preload` (see gunicorn.conf.py) this runs once in the
+    master, so workers inherit the loaded model copy-on-write.
+    """
+    global prediction_cascade, similarity_store
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    timings = {'imports': _import_seconds}
+
+    started = time.perf_counter()
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+    app.config['MODEL_PATH'] = os.environ.get('MODEL_PATH', DEFAULT_MODEL_PATH)
+    # Versioned model registry, polled every MODEL_RELOAD_INTERVAL seconds (unset = serve MODEL_PATH only)
+    app.config['MODEL_REGISTRY_DIR'] = os.environ.get('MODEL_REGISTRY_DIR', '')
+    app.config['MODEL_RELOAD_INTERVAL'] = float(os.environ.get('MODEL_RELOAD_INTERVAL', 5))
+    app.config['DATASET_PATH'] = os.environ.get('DATASET_PATH', 'data/synthetic_social_media_data.csv')
+    app.config['ROLLUP_PATH'] = os.environ.get('ROLLUP_PATH', 'data/rollup.npz')
+    # Near-duplicate index built by similarity.py; predictions gain cluster_size when it exists
+    app.config['SIMILARITY_INDEX_PATH'] = os.environ.get('SIMILARITY_INDEX_PATH', 'data/similarity.npz')
+    # Drift of live inputs from the training sketch, recomputed every DRIFT_INTERVAL seconds;
+    # with DRIFT_STATE_DIR, workers share their sketches through that directory
+    app.config['DRIFT_MONITORING'] = os.environ.get('DRIFT_MONITORING', '1') == '1'
+    app.config['DRIFT_INTERVAL'] = float(os.environ.get('DRIFT_INTERVAL', 60))
+    app.config['DRIFT_STATE_DIR'] = os.environ.get('DRIFT_STATE_DIR', '')
+    app.config['MAX_BATCH_SIZE'] = int(os.environ.get('MAX_BATCH_SIZE', 10000))
+    # Cascade scoring: a cheap first stage settles confident rows (needs an artifact with a cascade)
+    app.config['PREDICTION_CASCADE'] = os.environ.get('PREDICTION_CASCADE', '0') == '1'
+    # Micro-batching of concurrent /api/predict calls (0 disables it)
+    app.config['MICRO_BATCH_WINDOW_MS'] = float(os.environ.get('MICRO_BATCH_WINDOW_MS', 0))
+    app.config['MICRO_BATCH_MAX_SIZE'] = int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64))
+    # Prediction cache: max entries (0 disables), TTL and optional shared SQLite file
+    app.config['PREDICTION_CACHE_SIZE'] = int(os.environ.get('PREDICTION_CACHE_SIZE', 10000))
+    app.config['PREDICTION_CACHE_TTL'] = float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+    app.config['PREDICTION_CACHE_PATH'] = os.environ.get('PREDICTION_CACHE_PATH', '')
+    # Prediction history: SQLite file (unset disables), queue bound, insert batch size,
+    # backpressure policy when the queue is full (drop, drop_oldest, block) and rows kept (0 = all)
+    app.config['PREDICTION_LOG_PATH'] = os.environ.get('PREDICTION_LOG_PATH', '')
+    app.config['PREDICTION_LOG_QUEUE'] = int(os.environ.get('PREDICTION_LOG_QUEUE', 10000))
+    app.config['PREDICTION_LOG_BATCH'] = int(os.environ.get('PREDICTION_LOG_BATCH', 500))
+    app.config['PREDICTION_LOG_POLICY'] = os.environ.get('PREDICTION_LOG_POLICY', 'drop')
+    app.config['PREDICTION_LOG_MAX_ROWS'] = int(os.environ.get('PREDICTION_LOG_MAX_ROWS', 1000000))
+    # Sampling profiler: capture cProfile output for 1 in N requests (0 = off)
+    app.config['PROFILE_EVERY'] = int(os.environ.get('PROFILE_EVERY', 0))
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+    # Admin endpoints and /api/history answer 403 unless this is set and sent as X-Admin-Token
+    app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN', '')
+    app.config['LOAD_MODEL'] = True
+    if config:
+        app.config.update(config)
+    if not app.config['ADMIN_TOKEN']:
+        logger.warning("ADMIN_TOKEN is not set; admin endpoints and /api/history are disabled")
+    app.register_blueprint(bp)
+    prediction_cascade = app.config['PREDICTION_CASCADE']
+    similarity_store = SimilarityIndexStore(app.config['SIMILARITY_INDEX_PATH']) if app.config['SIMILARITY_INDEX_PATH'] else None
+    configure_prediction_cache(app)
+    configure_prediction_log(app)
+    configure_drift(app)
+    configure_model_registry(app)
+    configure_profiler(app)
+    timings['flask'] = time.perf_counter() - started
+
+    if app.config['LOAD_MODEL']:
+        started = time.perf_counter()
+        version = model_registry.active_version() if model_registry is not None else None
+        if version is not None:
+            loaded = load_model(model_registry.path(version), version=version)
+        else:
+            loaded = load_model(app.config['MODEL_PATH'])
+        timings['model_load'] = time.perf_counter() - started
+
+        if loaded:
+            # One throwaway prediction pays lazy initialisation costs up front
+            started = time.perf_counter()
+            predict_accounts([{}])
+            timings['warmup'] = time.perf_counter() - started
+
+    logger.info("Startup timings: %s", ', '.join(f"{phase} {seconds * 1000:.1f}ms" for phase, seconds in timings.items()))
+    app.config['STARTUP_TIMINGS'] = timings
+    return app
+
+app = create_app()
+
 if __name__ == '__main__':
-    # Load model on startup
-    if load_model():
+    if model_bundle is not None:
         print("Starting Flask application...")
         app.run(debug=True, host='0.0.0.0', port=5000)
     else:
-        print("Failed to load model. Please train the model first.") 
\ No newline at end of file
+        print("Failed to load model. Please train the model first.")
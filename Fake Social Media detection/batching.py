@@ -0,0 +1,139 @@
+"""
+Micro-batching scheduler for concurrent prediction requests
+"""
+
+import queue
+import threading
+import time
+
+# Upper bounds (in milliseconds) of the queueing-delay histogram buckets
+DELAY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100]
+
+
+class _PendingRequest:
+    """A single caller waiting for its slot in a batch"""
+
+    __slots__ = ('record', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, record):
+        self.record = record
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Gather requests arriving within a short window and score them together
+
+    Callers block in submit() while a background thread collects up to
+    max_batch_size requests (or whatever arrives within window_ms of the
+    first one), passes them to score_fn as one list and hands each caller
+    its own result. score_fn must return one result per record, in order.
+    """
+
+    def __init__(self, score_fn, window_ms=2.0, max_batch_size=64):
+        self.score_fn = score_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def _reset_stats(self):
+        self._batches = 0
+        self._requests = 0
+        self._batch_sizes = {}
+        self._delay_counts = [0] * (len(DELAY_BUCKETS_MS) + 1)
+        self._delay_sum = 0.0
+        self._delay_max = 0.0
+
+    def submit(self, record, timeout=None):
+        """Queue one record for scoring and wait for its result"""
+        pending = _PendingRequest(record)
+        self._queue.put(pending)
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError('Timed out waiting for batched prediction')
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes"""
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued_at + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # Anything already waiting rides along without extending the window
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            self._record(batch, started)
+
+            try:
+                results = self.score_fn([pending.record for pending in batch])
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+    def _record(self, batch, started):
+        with self._lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+
+            for pending in batch:
+                delay_ms = (started - pending.enqueued_at) * 1000.0
+                self._delay_sum += delay_ms
+                self._delay_max = max(self._delay_max, delay_ms)
+                for i, bound in enumerate(DELAY_BUCKETS_MS):
+                    if delay_ms <= bound:
+                        self._delay_counts[i] += 1
+                        break
+                else:
+                    self._delay_counts[-1] += 1
+
+    def stats(self):
+        """Batch-size distribution and queueing-delay summary"""
+        with self._lock:
+            labels = [f'<={bound}ms' for bound in DELAY_BUCKETS_MS] + [f'>{DELAY_BUCKETS_MS[-1]}ms']
+            return {
+                'window_ms': self.window * 1000.0,
+                'max_batch_size': self.max_batch_size,
+                'batches': self._batches,
+                'requests': self._requests,
+                'mean_batch_size': round(self._requests / self._batches, 3) if self._batches else 0.0,
+                'batch_sizes': {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                'queue_delay_ms': {
+                    'mean': round(self._delay_sum / self._requests, 4) if self._requests else 0.0,
+                    'max': round(self._delay_max, 4),
+                    'histogram': dict(zip(labels, self._delay_counts))
+                },
+                'queued': self._queue.qsize()
+            }
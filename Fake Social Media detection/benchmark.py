@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmarks for the generator, trainer, inference and explanation paths
+
+    python benchmark.py --output bench.json
+    python benchmark.py --output bench.json --baseline benchmarks/baseline.json --threshold 10
+
+Every result is recorded with its unit and whether higher or lower is
+better, so a run can be diffed against a stored baseline; any metric
+that is worse by more than --threshold percent is reported as a
+regression and the script exits with status 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+REFERENCE_DATE = '2025-01-01'
+SEED = 42
+
+# Every app setting that changes the serving hot path, pinned so runs measure the same work:
+# no cache lookups standing in for the model, no logging, drift, profiling, batching or cascade
+SERVING_ENV = {
+    'PREDICTION_CACHE_SIZE': '0',
+    'PREDICTION_LOG_PATH': '',
+    'DRIFT_MONITORING': '0',
+    'PROFILE_EVERY': '0',
+    'MICRO_BATCH_WINDOW_MS': '0',
+    'PREDICTION_CASCADE': '0',
+    'MODEL_REGISTRY_DIR': ''
+}
+
+# Accounts in the seeded similarity index the inference benchmarks query
+SIMILARITY_ROWS = 100_000
+
+
+def _result(value, unit, better):
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def _best_of(fn, repeats):
+    """Minimum wall time of fn over several runs (least noisy estimate)"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _measure(fn):
+    """Wall time and peak traced Python/numpy allocation of one call"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return value, elapsed, peak
+
+
+def bench_generator(sizes, repeats):
+    from data_generator import generate_synthetic_data
+
+    results = {}
+    for size in sizes:
+        seconds = _best_of(lambda: generate_synthetic_data(size, seed=SEED, reference_date=REFERENCE_DATE), repeats)
+        results[f'generator.rows_per_sec@{size}'] = _result(size / seconds, 'rows/s', 'higher')
+    return results
+
+
+def bench_trainer(sizes, workdir):
+    from data_generator import write_synthetic_data
+    from model_trainer import FakeAccountDetector
+
+    results = {}
+    for size in sizes:
+        path = os.path.join(workdir, f'train_{size}.csv')
+        write_synthetic_data(path, size, seed=SEED, reference_date=REFERENCE_DATE)
+
+        detector = FakeAccountDetector()
+        _, load_seconds, load_peak = _measure(lambda: detector.load_data(path))
+        _, preprocess_seconds, preprocess_peak = _measure(detector.preprocess_data)
+        _, train_seconds, train_peak = _measure(detector.train_model)
+
+        prefix = f'trainer.{{}}@{size}'
+        results[prefix.format('load_seconds')] = _result(load_seconds, 's', 'lower')
+        results[prefix.format('preprocess_seconds')] = _result(preprocess_seconds, 's', 'lower')
+        results[prefix.format('train_seconds')] = _result(train_seconds, 's', 'lower')
+        results[prefix.format('peak_traced_mb')] = _result(
+            max(load_peak, preprocess_peak, train_peak) / 2 ** 20, 'MiB', 'lower'
+        )
+    return results
+
+
+def _percentiles(timings, prefix):
+    timings = np.asarray(timings) * 1000.0
+    return {
+        f'{prefix}.p50_ms': _result(float(np.percentile(timings, 50)), 'ms', 'lower'),
+        f'{prefix}.p90_ms': _result(float(np.percentile(timings, 90)), 'ms', 'lower'),
+        f'{prefix}.p99_ms': _result(float(np.percentile(timings, 99)), 'ms', 'lower')
+    }
+
+
+def _accounts(n):
+    """Distinct request payloads, so caching does not hide model cost"""
+    from data_generator import generate_chunk
+
+    df = generate_chunk(n, seed=SEED, reference_date=REFERENCE_DATE)
+    # Usernames stay in, so the username and similarity stages are measured too
+    return df.drop(columns=['is_fake', 'created_date']).to_dict(orient='records')
+
+
+def _similarity_index(workdir):
+    """Build a seeded similarity index, so the similarity stage does the same work on every run"""
+    from data_generator import generate_chunk
+    from similarity import SimilarityIndexBuilder
+
+    path = os.path.join(workdir, 'similarity.npz')
+    builder = SimilarityIndexBuilder()
+    builder.update(generate_chunk(SIMILARITY_ROWS, seed=SEED + 1, reference_date=REFERENCE_DATE))
+    builder.finish().save(path)
+    return path
+
+
+def import_app(model_path, workdir):
+    """The app module serving model_path with every hot-path setting pinned (see SERVING_ENV)"""
+    os.environ.update(SERVING_ENV)
+    os.environ['MODEL_PATH'] = model_path
+    os.environ['SIMILARITY_INDEX_PATH'] = _similarity_index(workdir)
+    import app as app_module
+
+    if app_module.model_bundle is None:
+        raise RuntimeError(f'Could not load the model from {model_path}')
+    return app_module
+
+
+def serving_environment(app_module):
+    """The model and settings the inference results were measured with"""
+    bundle = app_module.model_bundle
+    return {
+        'model_version': bundle.version,
+        'model_path': bundle.path,
+        'model_type': type(bundle.model).__name__,
+        'feature_count': len(bundle.feature_columns),
+        'similarity_index_rows': SIMILARITY_ROWS,
+        'config': {name: app_module.app.config[name] for name in SERVING_ENV}
+    }
+
+
+def _comparable(serving):
+    """Serving settings that must match for two runs to be compared (paths may differ by machine)"""
+    return {name: value for name, value in (serving or {}).items() if name != 'model_path'}
+
+
+def bench_inference(app_module, requests, concurrency_levels):
+    flask_app = app_module.app
+    accounts = _accounts(requests)
+    results = {}
+
+    with flask_app.app_context():
+        for account in accounts[:50]:
+            app_module.predict_account(account)
+        timings = []
+        for account in accounts:
+            started = time.perf_counter()
+            app_module.predict_account(account)
+            timings.append(time.perf_counter() - started)
+    results.update(_percentiles(timings, 'predict_account'))
+
+    def post(account):
+        with flask_app.test_client() as client:
+            started = time.perf_counter()
+            response = client.post('/api/predict', json=account)
+            elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError(f'/api/predict returned {response.status_code}')
+        return elapsed
+
+    for concurrency in concurrency_levels:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(post, accounts[:50]))
+            started = time.perf_counter()
+            latencies = list(executor.map(post, accounts))
+            elapsed = time.perf_counter() - started
+        results[f'api_predict.requests_per_sec@c{concurrency}'] = _result(len(accounts) / elapsed, 'req/s', 'higher')
+        results.update(_percentiles(latencies, f'api_predict@c{concurrency}'))
+
+    return results
+
+
+def bench_explain(app_module, batch_sizes, repeats):
+    """Latency explanations add per row, end to end and for the explainers alone"""
+    from explain import DEFAULT_TOP_FEATURES, Explainer
+    from tree_engine import export_engine
+
+    bundle = app_module.model_bundle
+    if bundle is None or bundle.explainer is None:
+        raise RuntimeError('The served model cannot be explained')
+    accounts = _accounts(max(batch_sizes))
+    results = {}
+
+    with app_module.app.app_context():
+        for size in batch_sizes:
+            records = accounts[:size]
+            plain = _best_of(lambda: app_module.predict_accounts(records), repeats)
+            explained = _best_of(lambda: app_module.predict_accounts(records, DEFAULT_TOP_FEATURES), repeats)
+            results[f'explain.added_us_per_row@{size}'] = _result(
+                max(explained - plain, 0.0) / size * 1e6, 'us/row', 'lower'
+            )
+
+    # The explainers on their own: XGBoost TreeSHAP and, if the model can be compiled, the engine
+    X, _ = app_module.build_feature_matrix(accounts, bundle.feature_columns, bundle.username_analyzer)
+    explainers = {'model': (bundle.explainer, bundle.scaler.transform(X) if bundle.scaler is not None else X)}
+    if bundle.scaler is not None:
+        engine = export_engine(bundle.model, bundle.scaler, bundle.feature_columns)
+        explainers['engine'] = (Explainer(engine, bundle.feature_columns), X)
+    for name, (explainer, X_model) in explainers.items():
+        for size in batch_sizes:
+            seconds = _best_of(lambda: explainer.explain(X_model[:size]), repeats)
+            results[f'explain.{name}_us_per_row@{size}'] = _result(seconds / size * 1e6, 'us/row', 'lower')
+    return results
+
+
+def compare(current, baseline, threshold_pct):
+    """Metrics that got worse than the baseline by more than threshold_pct"""
+    regressions = []
+    for name, result in sorted(current.items()):
+        reference = baseline.get(name)
+        if reference is None or not reference['value']:
+            continue
+        change = (result['value'] - reference['value']) / abs(reference['value']) * 100.0
+        worse = change < -threshold_pct if result['better'] == 'higher' else change > threshold_pct
+        if worse:
+            regressions.append((name, reference['value'], result['value'], change, result['unit']))
+    return regressions
+
+
+def environment():
+    import numpy
+    import sklearn
+    import xgboost
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'scikit-learn': sklearn.__version__,
+        'xgboost': xgboost.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the generator, trainer, inference and explanation paths')
+    parser.add_argument('--output', default='benchmark_results.json', help='where to write results')
+    parser.add_argument('--baseline', help='previous results to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0, help='regression threshold in percent')
+    parser.add_argument('--generator-sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--trainer-sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--requests', type=int, default=1000, help='requests per inference benchmark')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--explain-sizes', type=int, nargs='+', default=[1, 100, 1000],
+                        help='batch sizes for the explanation benchmark')
+    parser.add_argument('--repeats', type=int, default=3, help='repeats for timing-only benchmarks')
+    parser.add_argument('--only', nargs='+', choices=['generator', 'trainer', 'inference', 'explain'],
+                        help='run a subset of the suites')
+    parser.add_argument('--model', default=None,
+                        help='artifact (.pkl) or compiled engine (.npz) served by the inference benchmarks')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    warnings.filterwarnings('ignore')
+    suites = args.only or ['generator', 'trainer', 'inference', 'explain']
+    results = {}
+    serving = None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if 'generator' in suites:
+            print('Benchmarking data generator...')
+            results.update(bench_generator(args.generator_sizes, args.repeats))
+        if 'trainer' in suites:
+            print('Benchmarking trainer...')
+            results.update(bench_trainer(args.trainer_sizes, workdir))
+        if 'inference' in suites or 'explain' in suites:
+            from predictor import DEFAULT_MODEL_PATH
+
+            app_module = import_app(args.model or DEFAULT_MODEL_PATH, workdir)
+            serving = serving_environment(app_module)
+        if 'inference' in suites:
+            print('Benchmarking inference...')
+            results.update(bench_inference(app_module, args.requests, args.concurrency))
+        if 'explain' in suites:
+            print('Benchmarking explanations...')
+            results.update(bench_explain(app_module, args.explain_sizes, args.repeats))
+
+    env = environment()
+    if serving is not None:
+        env['serving'] = serving
+    report = {'environment': env, 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    for name, result in sorted(results.items()):
+        print(f"{name:<45} {result['value']:>14.3f} {result['unit']}")
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline_report = json.load(f)
+        baseline = baseline_report['results']
+        baseline_serving = baseline_report.get('environment', {}).get('serving')
+        if 'serving' in env and _comparable(baseline_serving) != _comparable(env['serving']):
+            print(f"\nWarning: the baseline was measured with a different model or serving settings:\n"
+                  f"  baseline {json.dumps(baseline_serving, sort_keys=True)}\n"
+                  f"  current  {json.dumps(env['serving'], sort_keys=True)}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0f}%:")
+            for name, before, after, change, unit in regressions:
+                print(f"  {name:<43} {before:>12.3f} -> {after:>12.3f} {unit} ({change:+.1f}%)")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0f}% against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
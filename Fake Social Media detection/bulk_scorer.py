@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Offline bulk scoring of account datasets with the trained model
+
+Reads CSV, NDJSON, Parquet or columnar datasets in chunks, scores them on
+worker processes that each load the model artifact once, and streams the
+results to a CSV file. Progress is checkpointed after every chunk so an
+interrupted run can be resumed with --resume.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dataset_io import iter_dataset_positions
+from predictor import DEFAULT_MODEL_PATH, frame_to_matrix, load_bundle, score_matrix
+
+# Model loaded once per worker process
+_worker = {}
+
+
+def _load(model_path, cascade=False):
+    bundle = load_bundle(model_path)
+    if cascade and bundle.cascade is None:
+        raise ValueError(f"{model_path} has no cascade first stage; retrain without --no-cascade")
+    return bundle
+
+
+def _init_worker(model_path, cascade=False, bundle=None):
+    bundle = bundle or _load(model_path, cascade)
+    _worker.update(
+        model=bundle.model,
+        scaler=bundle.scaler,
+        feature_columns=bundle.feature_columns,
+        username_analyzer=bundle.username_analyzer,
+        cascade=bundle.cascade if cascade else None
+    )
+
+
+def score_chunk(job):
+    """Score one chunk; returns the output frame for it and the input position after it"""
+    start_row, chunk, id_column, position = job
+    features = frame_to_matrix(chunk, _worker['feature_columns'], _worker['username_analyzer'])
+    probabilities = score_matrix(_worker['model'], _worker['scaler'], features, _worker['cascade'])
+
+    output = pd.DataFrame({'row': np.arange(start_row, start_row + len(chunk))})
+    if id_column and id_column in chunk.columns:
+        output.insert(0, id_column, chunk[id_column].to_numpy())
+    output['probability'] = probabilities
+    output['prediction'] = (probabilities >= 0.5).astype(np.int8)
+    return output, position
+
+
+def model_identity(model_path, bundle, cascade=False):
+    """What a checkpoint records about the model, so a resume never mixes scores from two models"""
+    return {
+        'path': os.path.abspath(model_path),
+        'version': bundle.version,
+        'cascade': {'low': bundle.cascade['low'], 'high': bundle.cascade['high']} if cascade else None
+    }
+
+
+class Checkpoint:
+    """Rows completed, input position and output bytes written, persisted atomically after each chunk"""
+
+    def __init__(self, path, input_path, chunksize, model):
+        self.path = path
+        self.state = {'input': os.path.abspath(input_path), 'chunksize': chunksize, 'model': model,
+                      'chunks_done': 0, 'rows_done': 0, 'input_position': 0, 'output_bytes': 0}
+
+    def load(self):
+        with open(self.path) as f:
+            saved = json.load(f)
+        if saved['input'] != self.state['input'] or saved['chunksize'] != self.state['chunksize']:
+            raise ValueError('Checkpoint was written for a different input or chunk size')
+        if saved.get('model') != self.state['model'] or 'input_position' not in saved:
+            raise ValueError(f"Checkpoint was written with a different model or cascade setting "
+                             f"({saved.get('model')}, now {self.state['model']}); "
+                             f"rerun without --resume to score everything with this one")
+        self.state = saved
+
+    def save(self, chunks_done, rows_done, input_position, output_bytes):
+        self.state.update(chunks_done=chunks_done, rows_done=rows_done, input_position=input_position,
+                          output_bytes=output_bytes)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+
+def _jobs(input_path, chunksize, start_row, position, id_column):
+    # Resumed runs start reading at the checkpointed position instead of re-reading skipped chunks
+    for chunk, next_position in iter_dataset_positions(input_path, chunksize=chunksize, position=position):
+        yield start_row, chunk, id_column, next_position
+        start_row += len(chunk)
+
+
+def _ordered_results(jobs, workers, model_path, cascade=False, bundle=None):
+    """Score jobs on a process pool, yielding results in input order with bounded lookahead"""
+    if workers <= 1:
+        _init_worker(model_path, cascade, bundle)
+        for job in jobs:
+            yield score_chunk(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path, cascade)) as executor:
+        in_flight = []
+        for job in jobs:
+            in_flight.append(executor.submit(score_chunk, job))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.pop(0).result()
+        for future in in_flight:
+            yield future.result()
+
+
+def bulk_score(input_path, output_path, model_path=DEFAULT_MODEL_PATH, chunksize=100_000,
+               workers=1, id_column='username', checkpoint_path=None, resume=False, cascade=False):
+    """Score every row of input_path and stream results to output_path; returns rows scored"""
+    bundle = _load(model_path, cascade)
+    model = model_identity(model_path, bundle, cascade)
+    checkpoint = Checkpoint(checkpoint_path or output_path + '.checkpoint', input_path, chunksize, model)
+    if resume and os.path.exists(checkpoint.path):
+        checkpoint.load()
+        output_bytes = os.path.getsize(output_path) if os.path.exists(output_path) else None
+        if output_bytes is None or output_bytes < checkpoint.state['output_bytes']:
+            # The checkpointed output is gone or cut short, so nothing can be kept
+            print(f"Warning: {output_path} is missing or shorter than its checkpoint; starting over from row 0",
+                  file=sys.stderr)
+            checkpoint = Checkpoint(checkpoint.path, input_path, chunksize, model)
+            resume = False
+        else:
+            print(f"Resuming after {checkpoint.state['rows_done']} rows")
+    else:
+        resume = False
+
+    chunks_done = checkpoint.state['chunks_done']
+    rows_done = checkpoint.state['rows_done']
+
+    with open(output_path, 'r+b' if resume else 'wb') as out:
+        # Drop anything written after the last checkpoint
+        out.truncate(checkpoint.state['output_bytes'])
+        out.seek(checkpoint.state['output_bytes'])
+
+        started = time.perf_counter()
+        scored = 0
+        jobs = _jobs(input_path, chunksize, rows_done, checkpoint.state['input_position'], id_column)
+        for output, position in _ordered_results(jobs, workers, model_path, cascade, bundle):
+            out.write(output.to_csv(index=False, header=(out.tell() == 0)).encode('utf-8'))
+            out.flush()
+            os.fsync(out.fileno())
+
+            chunks_done += 1
+            rows_done += len(output)
+            scored += len(output)
+            checkpoint.save(chunks_done, rows_done, position, out.tell())
+
+            elapsed = time.perf_counter() - started
+            print(f"Scored {rows_done} rows ({scored / elapsed:,.0f} rows/sec)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    rate = scored / elapsed if elapsed > 0 else 0.0
+    print(f"Finished: {scored} rows scored in {elapsed:.1f}s ({rate:,.0f} rows/sec), {rows_done} total")
+    return rows_done
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Score an account dataset with the trained model')
+    parser.add_argument('input', help='CSV, NDJSON (.ndjson/.jsonl), Parquet or columnar dataset')
+    parser.add_argument('output', help='output CSV of probabilities and predictions')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='model artifact (.pkl) or compiled engine (.npz)')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='rows scored per chunk')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='scoring processes')
+    parser.add_argument('--id-column', default='username', help='input column copied to the output')
+    parser.add_argument('--checkpoint', help='checkpoint file (default: <output>.checkpoint)')
+    parser.add_argument('--resume', action='store_true', help='continue from the last checkpoint')
+    parser.add_argument('--cascade', action='store_true',
+                        help='settle confident rows with the cheap first stage, escalating the rest')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        bulk_score(args.input, args.output, args.model, args.chunksize, args.workers,
+                   args.id_column, args.checkpoint, args.resume, args.cascade)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
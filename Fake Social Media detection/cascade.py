@@ -0,0 +1,123 @@
+"""
+Two-tier cascade scoring: a linear first stage settles confident cases and
+only the uncertain band is escalated to the full model
+
+The first stage is a logistic regression on the scaled features, stored as
+plain arrays so scoring it is a single dot product. Its thresholds are
+calibrated on the held-out split: rows with a first-stage probability below
+`low` are settled as real, at or above `high` as fake, and everything in
+between goes to the full model. The band is chosen as the narrowest one
+whose accuracy on the held-out rows is within max_accuracy_loss of the
+full model's. The band always contains 0.5, so settled rows get the same
+label from the calibration as from p >= 0.5 at serving time.
+"""
+
+import numpy as np
+
+CALIBRATION_BINS = 1000
+
+
+def _stage_arrays(classifier):
+    return {
+        'coef': classifier.coef_.ravel().astype(np.float64),
+        'intercept': float(classifier.intercept_[0])
+    }
+
+
+def fit_first_stage(X_scaled, y):
+    """Fit the first stage on in-memory scaled training data"""
+    # Imported here so serving (which only evaluates the arrays) does not load sklearn
+    from sklearn.linear_model import LogisticRegression
+
+    classifier = LogisticRegression(max_iter=1000)
+    classifier.fit(X_scaled, y)
+    return _stage_arrays(classifier)
+
+
+def fit_first_stage_streaming(chunks, seed=42):
+    """Fit the first stage from (X_scaled, y) chunks with one incremental pass"""
+    from sklearn.linear_model import SGDClassifier
+
+    classifier = SGDClassifier(loss='log_loss', alpha=1e-4, random_state=seed)
+    for X, y in chunks:
+        classifier.partial_fit(X, y, classes=np.array([0, 1]))
+    return _stage_arrays(classifier)
+
+
+def first_stage_proba(stage, X_scaled):
+    """Probability of being fake according to the first stage"""
+    logits = np.asarray(X_scaled, dtype=np.float64) @ stage['coef'] + stage['intercept']
+    return 1.0 / (1.0 + np.exp(-np.clip(logits, -500, 500)))
+
+
+class CascadeCalibrator:
+    """Accumulate held-out outcomes per first-stage probability bin
+
+    Works on any number of chunks, so streaming training calibrates with
+    bounded memory. For every bin it counts rows, fakes, and rows the full
+    model classifies correctly.
+    """
+
+    def __init__(self, bins=CALIBRATION_BINS):
+        self.bins = bins
+        self.rows = np.zeros(bins)
+        self.fakes = np.zeros(bins)
+        self.full_correct = np.zeros(bins)
+
+    def update(self, first_stage_probabilities, full_probabilities, y):
+        index = np.minimum((first_stage_probabilities * self.bins).astype(np.int64), self.bins - 1)
+        y = np.asarray(y)
+        self.rows += np.bincount(index, minlength=self.bins)
+        self.fakes += np.bincount(index, weights=(y == 1).astype(np.float64), minlength=self.bins)
+        correct = ((full_probabilities >= 0.5) == (y == 1)).astype(np.float64)
+        self.full_correct += np.bincount(index, weights=correct, minlength=self.bins)
+
+    def calibrate(self, max_accuracy_loss=0.001):
+        """Thresholds with the lowest escalation rate within the accuracy budget"""
+        total = self.rows.sum()
+        if total == 0:
+            raise ValueError('No held-out rows to calibrate the cascade on')
+
+        # Settling bins [0, i) as real and [j, bins) as fake, for every i <= j
+        edges = np.arange(self.bins + 1)
+        real_prefix = np.concatenate([[0], np.cumsum(self.rows - self.fakes)])
+        rows_prefix = np.concatenate([[0], np.cumsum(self.rows)])
+        fake_suffix = self.fakes.sum() - np.concatenate([[0], np.cumsum(self.fakes)])
+        full_prefix = np.concatenate([[0], np.cumsum(self.full_correct)])
+
+        i, j = np.meshgrid(edges, edges, indexing='ij')
+        # Serving labels settled rows by p >= 0.5, so the band must contain 0.5:
+        # then rows below it are served as real and rows above it as fake, as counted here
+        valid = (i <= self.bins / 2) & (j >= self.bins / 2)
+        correct = real_prefix[i] + (full_prefix[j] - full_prefix[i]) + fake_suffix[j]
+        escalated = rows_prefix[j] - rows_prefix[i]
+
+        full_accuracy = self.full_correct.sum() / total
+        loss = full_accuracy - correct / total
+        escalated = np.where(valid & (loss <= max_accuracy_loss + 1e-12), escalated, np.inf)
+        best = np.unravel_index(np.argmin(escalated), escalated.shape)
+        best_i, best_j = int(best[0]), int(best[1])
+
+        return {
+            # The band is [low, high); 2.0 means nothing is settled as fake
+            'low': best_i / self.bins,
+            'high': best_j / self.bins if best_j < self.bins else 2.0,
+            'max_accuracy_loss': max_accuracy_loss,
+            'escalation_rate': float(escalated[best] / total),
+            'full_accuracy': float(full_accuracy),
+            'cascade_accuracy': float(full_accuracy - loss[best])
+        }
+
+
+def escalation_mask(cascade, first_stage_probabilities):
+    """Rows the first stage is not confident about"""
+    return (first_stage_probabilities >= cascade['low']) & (first_stage_probabilities < cascade['high'])
+
+
+def cascade_proba(model, cascade, X_scaled):
+    """Cascade probabilities and the mask of rows that were escalated to the full model"""
+    probabilities = first_stage_proba(cascade, X_scaled)
+    escalated = escalation_mask(cascade, probabilities)
+    if escalated.any():
+        probabilities[escalated] = model.predict_proba(np.asarray(X_scaled)[escalated])[:, 1]
+    return probabilities, escalated
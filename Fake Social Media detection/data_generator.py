@@ -1,155 +1,217 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
 import string
 
-def generate_synthetic_data(n_samples=10000):
+from dataset_io import ColumnarWriter
+from features import add_derived_features
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+USERNAME_ALPHABET = np.array(list(string.ascii_lowercase + string.digits))
+
+def _bernoulli(rng, n, p):
+    """Vectorized np.random.choice([0, 1], p=[1 - p, p])"""
+    return (rng.random(n) < p).astype(np.int64)
+
+def _random_strings(rng, lengths):
+    """Random lowercase/digit strings, one per entry in lengths"""
+    max_len = int(lengths.max()) if len(lengths) else 1
+    chars = USERNAME_ALPHABET[rng.integers(0, len(USERNAME_ALPHABET), size=(len(lengths), max_len))]
+    # Trailing empty characters are dropped when the rows are viewed as strings
+    chars[np.arange(max_len) >= lengths[:, None]] = ''
+    return np.ascontiguousarray(chars).view(f'<U{max_len}').ravel()
+
+def generate_chunk(n_samples, seed=42, reference_date=None):
+    """
+    Generate one chunk of synthetic accounts with vectorized draws
+
+    seed may be an int or a numpy SeedSequence; reference_date is the
+    "today" that creation dates are counted back from.
+    """
+    rng = np.random.default_rng(seed)
+    reference_date = np.datetime64(reference_date or date.today(), 'D')
+    n = n_samples
+
+    # Determine if account is fake (30% fake accounts)
+    is_fake = _bernoulli(rng, n, 0.3)
+    fake = is_fake.astype(bool)
+    real = ~fake
+
+    # Account creation date: fake accounts are usually newer
+    days_ago = np.where(fake, rng.integers(1, 365, n), rng.integers(1, 2000, n))
+    created_date = (reference_date - days_ago.astype('timedelta64[D]')).astype(str)
+    account_age_days = days_ago
+
+    # Username characteristics: fake usernames often follow one of five patterns
+    pattern = rng.integers(0, 5, n)
+    prefixes = np.array(['user', 'fake', 'bot', '', 'spam'])[pattern]
+    numbers = np.where(np.isin(pattern, [0, 2]), rng.integers(1000, 9999, n), rng.integers(100, 999, n))
+    patterned = np.char.add(prefixes, numbers.astype(str))
+    random_fake = _random_strings(rng, np.full(n, 8))
+    # Real usernames are more varied
+    random_real = _random_strings(rng, rng.integers(5, 15, n))
+    username = np.where(real, random_real, np.where(pattern == 3, random_fake, patterned))
+
+    # Profile features: real accounts have more complete profiles
+    has_profile_pic = np.where(fake, _bernoulli(rng, n, 0.6), _bernoulli(rng, n, 0.9))
+    has_bio = np.where(fake, _bernoulli(rng, n, 0.4), _bernoulli(rng, n, 0.8))
+    has_location = np.where(fake, _bernoulli(rng, n, 0.3), _bernoulli(rng, n, 0.7))
+    verified = np.where(fake, 0, _bernoulli(rng, n, 0.05))
+
+    # Activity metrics: fake accounts often have suspicious activity patterns
+    fake_followers = np.where(rng.random(n) < 0.7, rng.poisson(50, n), rng.poisson(1000, n))
+    fake_following = np.where(rng.random(n) < 0.6, rng.poisson(200, n), rng.poisson(50, n))
+    fake_posts = np.where(rng.random(n) < 0.8, rng.poisson(5, n), rng.poisson(100, n))
+
+    # Fake accounts often have high follower/following ratios or very low activity
+    inflated = rng.random(n) < 0.3
+    fake_followers = np.where(inflated, rng.poisson(1000, n), fake_followers)
+    fake_following = np.where(inflated, rng.poisson(10, n), fake_following)
+
+    followers = np.where(fake, fake_followers, rng.poisson(150, n))
+    following = np.where(fake, fake_following, rng.poisson(200, n))
+    posts_count = np.where(fake, fake_posts, rng.poisson(50, n))
+
+    # Engagement metrics: fake accounts often have low engagement
+    avg_likes = np.maximum(0, np.where(fake, rng.normal(2, 5, n), rng.normal(20, 15, n)))
+    avg_comments = np.maximum(0, np.where(fake, rng.normal(0.5, 2, n), rng.normal(5, 8, n)))
+    avg_shares = np.maximum(0, np.where(fake, rng.normal(0.2, 1, n), rng.normal(2, 5, n)))
+
+    # Add some suspicious patterns to fake accounts
+    high_ratio = fake & (rng.random(n) < 0.4)
+    low_engagement_pattern = fake & ~high_ratio & (rng.random(n) < 0.3)
+    followers = np.where(high_ratio, following * rng.integers(10, 50, n), followers)
+    avg_likes = np.where(low_engagement_pattern, rng.integers(0, 3, n), avg_likes)
+    avg_comments = np.where(low_engagement_pattern, 0, avg_comments)
+    avg_shares = np.where(low_engagement_pattern, 0, avg_shares)
+
+    # Additional features
+    has_website = np.where(fake, _bernoulli(rng, n, 0.2), _bernoulli(rng, n, 0.4))
+    has_pinned_posts = np.where(fake, _bernoulli(rng, n, 0.1), _bernoulli(rng, n, 0.3))
+
+    df = pd.DataFrame({
+        'username': username.astype(object),
+        'is_fake': is_fake,
+        'account_age_days': account_age_days,
+        'followers': followers,
+        'following': following,
+        'posts_count': posts_count,
+        'avg_likes': avg_likes,
+        'avg_comments': avg_comments,
+        'avg_shares': avg_shares,
+        'has_profile_pic': has_profile_pic,
+        'has_bio': has_bio,
+        'has_location': has_location,
+        'verified': verified,
+        'has_website': has_website,
+        'has_pinned_posts': has_pinned_posts
+    })
+
+    # Engineered features and suspicious indicators come from the shared pipeline
+    df = add_derived_features(df)
+    df['created_date'] = created_date.astype(object)
+    return df
+
+def _chunk_sizes(n_samples, chunk_size):
+    """Sizes of the fixed-size chunks covering n_samples rows"""
+    full, rest = divmod(n_samples, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+def _chunk_seed(seed, chunk_index):
+    """Independent, non-overlapping seed stream for one chunk
+
+    Equivalent to SeedSequence(seed).spawn(...)[chunk_index], so any process
+    can derive it without coordinating with the others.
+    """
+    return np.random.SeedSequence(seed, spawn_key=(chunk_index,))
+
+def _generate_indexed_chunk(args):
+    n_samples, seed, chunk_index, reference_date = args
+    return generate_chunk(n_samples, _chunk_seed(seed, chunk_index), reference_date)
+
+def iter_synthetic_chunks(n_samples=10000, chunk_size=DEFAULT_CHUNK_SIZE, seed=42,
+                          reference_date=None, workers=1):
+    """
+    Yield synthetic data as DataFrames of at most chunk_size rows, in order
+
+    Output is reproducible for a given seed and chunk_size regardless of the
+    number of worker processes.
+    """
+    reference_date = str(reference_date or date.today())
+    jobs = [(size, seed, i, reference_date) for i, size in enumerate(_chunk_sizes(n_samples, chunk_size))]
+
+    if workers <= 1:
+        for job in jobs:
+            yield _generate_indexed_chunk(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep only a bounded number of chunks in flight so memory stays flat
+        in_flight = []
+        for job in jobs:
+            in_flight.append(executor.submit(_generate_indexed_chunk, job))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.pop(0).result()
+        for future in in_flight:
+            yield future.result()
+
+def generate_synthetic_data(n_samples=10000, seed=42, chunk_size=DEFAULT_CHUNK_SIZE, reference_date=None):
     """
     Generate synthetic social media account data for fake account detection
     """
-    np.random.seed(42)
-    random.seed(42)
-    
-    data = []
-    
-    for i in range(n_samples):
-        # Determine if account is fake (30% fake accounts)
-        is_fake = np.random.choice([0, 1], p=[0.7, 0.3])
-        
-        # Account creation date
-        if is_fake:
-            # Fake accounts are usually newer
-            days_ago = np.random.randint(1, 365)
-        else:
-            # Real accounts have more varied creation dates
-            days_ago = np.random.randint(1, 2000)
-        
-        created_date = datetime.now() - timedelta(days=days_ago)
-        
-        # Username characteristics
-        if is_fake:
-            # Fake usernames often have patterns
-            username_patterns = [
-                f"user{np.random.randint(1000, 9999)}",
-                f"fake{np.random.randint(100, 999)}",
-                f"bot{np.random.randint(1000, 9999)}",
-                ''.join(random.choices(string.ascii_lowercase + string.digits, k=8)),
-                f"spam{np.random.randint(100, 999)}"
-            ]
-            username = random.choice(username_patterns)
-        else:
-            # Real usernames are more varied
-            username = ''.join(random.choices(string.ascii_lowercase + string.digits, k=np.random.randint(5, 15)))
-        
-        # Profile features
-        if is_fake:
-            # Fake accounts often have incomplete profiles
-            has_profile_pic = np.random.choice([0, 1], p=[0.4, 0.6])
-            has_bio = np.random.choice([0, 1], p=[0.6, 0.4])
-            has_location = np.random.choice([0, 1], p=[0.7, 0.3])
-            verified = 0
-        else:
-            # Real accounts have more complete profiles
-            has_profile_pic = np.random.choice([0, 1], p=[0.1, 0.9])
-            has_bio = np.random.choice([0, 1], p=[0.2, 0.8])
-            has_location = np.random.choice([0, 1], p=[0.3, 0.7])
-            verified = np.random.choice([0, 1], p=[0.95, 0.05])
-        
-        # Activity metrics
-        if is_fake:
-            # Fake accounts often have suspicious activity patterns
-            followers = np.random.poisson(50) if np.random.random() < 0.7 else np.random.poisson(1000)
-            following = np.random.poisson(200) if np.random.random() < 0.6 else np.random.poisson(50)
-            posts_count = np.random.poisson(5) if np.random.random() < 0.8 else np.random.poisson(100)
-            
-            # Fake accounts often have high follower/following ratios or very low activity
-            if np.random.random() < 0.3:
-                followers = np.random.poisson(1000)
-                following = np.random.poisson(10)
-        else:
-            # Real accounts have more natural activity patterns
-            followers = np.random.poisson(150)
-            following = np.random.poisson(200)
-            posts_count = np.random.poisson(50)
-        
-        # Engagement metrics
-        if is_fake:
-            # Fake accounts often have low engagement
-            avg_likes = max(0, np.random.normal(2, 5))
-            avg_comments = max(0, np.random.normal(0.5, 2))
-            avg_shares = max(0, np.random.normal(0.2, 1))
-        else:
-            # Real accounts have higher engagement
-            avg_likes = max(0, np.random.normal(20, 15))
-            avg_comments = max(0, np.random.normal(5, 8))
-            avg_shares = max(0, np.random.normal(2, 5))
-        
-        # Account age in days
-        account_age_days = (datetime.now() - created_date).days
-        
-        # Suspicious patterns
-        if is_fake:
-            # Fake accounts often have suspicious patterns
-            followers_following_ratio = followers / max(following, 1)
-            engagement_rate = (avg_likes + avg_comments + avg_shares) / max(followers, 1)
-            
-            # Add some suspicious patterns
-            if np.random.random() < 0.4:
-                # Very high follower/following ratio
-                followers = following * np.random.randint(10, 50)
-            elif np.random.random() < 0.3:
-                # Very low engagement
-                avg_likes = np.random.randint(0, 3)
-                avg_comments = 0
-                avg_shares = 0
-        else:
-            followers_following_ratio = followers / max(following, 1)
-            engagement_rate = (avg_likes + avg_comments + avg_shares) / max(followers, 1)
-        
-        # Additional features
-        has_website = np.random.choice([0, 1], p=[0.8, 0.2]) if is_fake else np.random.choice([0, 1], p=[0.6, 0.4])
-        has_pinned_posts = np.random.choice([0, 1], p=[0.9, 0.1]) if is_fake else np.random.choice([0, 1], p=[0.7, 0.3])
-        
-        # Suspicious indicators
-        suspicious_username = 1 if any(pattern in username.lower() for pattern in ['bot', 'fake', 'spam', 'user']) else 0
-        low_activity = 1 if posts_count < 5 and account_age_days > 30 else 0
-        high_follower_ratio = 1 if followers_following_ratio > 10 else 0
-        low_engagement = 1 if engagement_rate < 0.01 and followers > 100 else 0
-        
-        data.append({
-            'username': username,
-            'is_fake': is_fake,
-            'account_age_days': account_age_days,
-            'followers': followers,
-            'following': following,
-            'posts_count': posts_count,
-            'avg_likes': avg_likes,
-            'avg_comments': avg_comments,
-            'avg_shares': avg_shares,
-            'has_profile_pic': has_profile_pic,
-            'has_bio': has_bio,
-            'has_location': has_location,
-            'verified': verified,
-            'has_website': has_website,
-            'has_pinned_posts': has_pinned_posts,
-            'followers_following_ratio': followers_following_ratio,
-            'engagement_rate': engagement_rate,
-            'suspicious_username': suspicious_username,
-            'low_activity': low_activity,
-            'high_follower_ratio': high_follower_ratio,
-            'low_engagement': low_engagement,
-            'created_date': created_date.strftime('%Y-%m-%d')
-        })
-    
-    return pd.DataFrame(data)
+    chunks = list(iter_synthetic_chunks(n_samples, chunk_size, seed, reference_date))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+def write_synthetic_data(filepath, n_samples=10000, chunk_size=DEFAULT_CHUNK_SIZE, seed=42,
+                         reference_date=None, workers=1):
+    """Stream synthetic data to a CSV file chunk by chunk; returns (rows, fake rows)"""
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    rows = fake_rows = 0
+    with open(filepath, 'w', newline='') as f:
+        for chunk in iter_synthetic_chunks(n_samples, chunk_size, seed, reference_date, workers):
+            chunk.to_csv(f, index=False, header=(rows == 0))
+            rows += len(chunk)
+            fake_rows += int(chunk['is_fake'].sum())
+    return rows, fake_rows
+
+def write_synthetic_columnar(path, n_samples=10000, chunk_size=DEFAULT_CHUNK_SIZE, seed=42,
+                             reference_date=None, workers=1):
+    """Stream synthetic data into a columnar dataset directory; returns (rows, fake rows)"""
+    writer = ColumnarWriter(path)
+    fake_rows = 0
+    for chunk in iter_synthetic_chunks(n_samples, chunk_size, seed, reference_date, workers):
+        writer.append(chunk)
+        fake_rows += int(chunk['is_fake'].sum())
+    return writer.rows, fake_rows
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate synthetic social media account data')
+    parser.add_argument('--samples', type=int, default=10000, help='number of accounts to generate')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='rows generated per chunk')
+    parser.add_argument('--workers', type=int, default=1, help='processes generating chunks in parallel')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    parser.add_argument('--output', default='data/synthetic_social_media_data.csv', help='output path')
+    parser.add_argument('--format', choices=['csv', 'columnar'], default='csv',
+                        help='write a CSV file or a memory-mappable columnar directory')
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    # Generate synthetic data
-    df = generate_synthetic_data(10000)
-    
-    # Save to CSV
-    df.to_csv('data/synthetic_social_media_data.csv', index=False)
-    print(f"Generated {len(df)} synthetic social media accounts")
-    print(f"Fake accounts: {df['is_fake'].sum()} ({df['is_fake'].mean()*100:.1f}%)")
-    print(f"Real accounts: {(df['is_fake'] == 0).sum()} ({(df['is_fake'] == 0).mean()*100:.1f}%)") 
\ No newline at end of file
+    args = parse_args()
+
+    # Generate synthetic data and stream it to disk
+    write = write_synthetic_columnar if args.format == 'columnar' else write_synthetic_data
+    rows, fake_rows = write(
+        args.output, args.samples, chunk_size=args.chunk_size, seed=args.seed, workers=args.workers
+    )
+
+    print(f"Generated {rows} synthetic social media accounts")
+    print(f"Fake accounts: {fake_rows} ({fake_rows / rows * 100:.1f}%)")
+    print(f"Real accounts: {rows - fake_rows} ({(rows - fake_rows) / rows * 100:.1f}%)")
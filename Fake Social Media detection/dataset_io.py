@@ -0,0 +1,362 @@
+"""
+Dataset readers and a compact columnar, memory-mapped on-disk format
+
+A columnar dataset is a directory holding one raw little-endian binary
+file per column plus a meta.json describing dtypes and the row count:
+
+    synthetic_social_media_data.cols/
+        meta.json
+        followers.bin          uint32[rows]
+        avg_likes.bin          float32[rows]
+        username.bin           utf-8 bytes of all usernames
+        username.offsets       uint64[rows + 1]
+        ...
+
+Columns are opened with numpy.memmap, so readers only touch the columns
+they ask for and nothing is parsed or copied on load.
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 'columnar-v1'
+META_FILE = 'meta.json'
+
+# Compact dtypes for the known dataset columns: 0/1 flags, counts and metrics
+COLUMN_DTYPES = {
+    'is_fake': 'uint8',
+    'account_age_days': 'uint32',
+    'followers': 'uint32',
+    'following': 'uint32',
+    'posts_count': 'uint32',
+    'avg_likes': 'float32',
+    'avg_comments': 'float32',
+    'avg_shares': 'float32',
+    'has_profile_pic': 'uint8',
+    'has_bio': 'uint8',
+    'has_location': 'uint8',
+    'verified': 'uint8',
+    'has_website': 'uint8',
+    'has_pinned_posts': 'uint8',
+    'followers_following_ratio': 'float32',
+    'engagement_rate': 'float32',
+    'suspicious_username': 'uint8',
+    'low_activity': 'uint8',
+    'high_follower_ratio': 'uint8',
+    'low_engagement': 'uint8',
+    'username': 'string',
+    'created_date': 'datetime64[D]'
+}
+
+
+def is_columnar(path):
+    """True if path is a columnar dataset directory"""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILE))
+
+
+def read_meta(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)
+
+
+def _column_dtype(name, series):
+    if name in COLUMN_DTYPES:
+        return COLUMN_DTYPES[name]
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return 'int64'
+    if pd.api.types.is_float_dtype(series):
+        return 'float64'
+    return 'string'
+
+
+def _to_fixed(name, series, dtype):
+    """Cast a column to its on-disk dtype, refusing values that do not fit"""
+    if dtype.startswith('datetime64'):
+        return pd.to_datetime(series).to_numpy().astype(dtype)
+
+    values = series.to_numpy()
+    target = np.dtype(dtype)
+    if target.kind in 'ui':
+        if pd.isna(series).any():
+            raise ValueError(f"Column '{name}' has missing values and cannot be stored as {dtype}")
+        info = np.iinfo(target)
+        if len(values) and (values.min() < info.min or values.max() > info.max):
+            raise ValueError(f"Column '{name}' has values outside the {dtype} range")
+    return values.astype(target)
+
+
+class ColumnarWriter:
+    """Append DataFrame chunks to a columnar dataset directory
+
+    meta.json is rewritten after each chunk's column files are flushed, so
+    concurrent readers always see a consistent row count. Without append,
+    an existing dataset at path is replaced: only the files its meta.json
+    names are deleted. Any other non-empty directory is refused.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        if append and is_columnar(path):
+            meta = read_meta(path)
+            self.columns = meta['columns']
+            self.rows = meta['rows']
+            return
+
+        if is_columnar(path):
+            self._remove_dataset(read_meta(path)['columns'])
+        elif os.listdir(path):
+            raise ValueError(f"{path} is not empty and holds no columnar dataset; refusing to write into it")
+        self.columns = None
+        self.rows = 0
+
+    def _remove_dataset(self, columns):
+        # meta.json goes first, so readers never see it name a deleted column
+        os.remove(os.path.join(self.path, META_FILE))
+        for name, dtype in columns.items():
+            for suffix in ('.bin', '.offsets') if dtype == 'string' else ('.bin',):
+                if os.path.exists(self._file(name, suffix)):
+                    os.remove(self._file(name, suffix))
+
+    def _file(self, name, suffix='.bin'):
+        return os.path.join(self.path, name + suffix)
+
+    def append(self, df):
+        if self.columns is None:
+            self.columns = {name: _column_dtype(name, df[name]) for name in df.columns}
+        elif list(df.columns) != list(self.columns):
+            raise ValueError('Chunk columns do not match the existing dataset')
+
+        for name, dtype in self.columns.items():
+            if dtype == 'string':
+                self._append_strings(name, df[name])
+            else:
+                with open(self._file(name), 'ab') as f:
+                    f.write(_to_fixed(name, df[name], dtype).tobytes())
+
+        self.rows += len(df)
+        self._write_meta()
+
+    def _append_strings(self, name, series):
+        encoded = [str(value).encode('utf-8') if not pd.isna(value) else b'' for value in series]
+        lengths = np.fromiter((len(value) for value in encoded), dtype=np.uint64, count=len(encoded))
+
+        offsets_file = self._file(name, '.offsets')
+        start = 0
+        if os.path.exists(offsets_file) and os.path.getsize(offsets_file):
+            start = int(np.memmap(offsets_file, dtype=np.uint64, mode='r')[-1])
+        offsets = start + np.cumsum(lengths, dtype=np.uint64)
+        if self.rows == 0:
+            offsets = np.concatenate([np.zeros(1, dtype=np.uint64), offsets])
+
+        with open(self._file(name), 'ab') as f:
+            f.write(b''.join(encoded))
+        with open(offsets_file, 'ab') as f:
+            f.write(offsets.tobytes())
+
+    def _write_meta(self):
+        meta = {'format': FORMAT_VERSION, 'rows': self.rows, 'columns': self.columns}
+        tmp_path = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+
+
+class StringColumn:
+    """Lazily decoded view of a variable-length string column"""
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def to_numpy(self, start=0, stop=None):
+        stop = len(self) if stop is None else stop
+        return np.array([self[i] for i in range(start, stop)], dtype=object)
+
+
+def open_columnar(path, columns=None):
+    """Memory-map the requested columns of a columnar dataset
+
+    Fixed-width columns come back as read-only numpy memmaps; string
+    columns as StringColumn views that decode on access.
+    """
+    meta = read_meta(path)
+    rows = meta['rows']
+    columns = list(meta['columns']) if columns is None else columns
+
+    arrays = {}
+    for name in columns:
+        if name not in meta['columns']:
+            raise KeyError(f"Column '{name}' not in dataset {path}")
+        dtype = meta['columns'][name]
+        data_file = os.path.join(path, name + '.bin')
+
+        if dtype == 'string':
+            offsets = np.memmap(os.path.join(path, name + '.offsets'), dtype=np.uint64, mode='r', shape=(rows + 1,))
+            size = os.path.getsize(data_file)
+            data = np.memmap(data_file, dtype=np.uint8, mode='r') if size else np.zeros(0, dtype=np.uint8)
+            arrays[name] = StringColumn(data, offsets)
+        elif rows:
+            arrays[name] = np.memmap(data_file, dtype=np.dtype(dtype), mode='r', shape=(rows,))
+        else:
+            arrays[name] = np.zeros(0, dtype=np.dtype(dtype))
+    return arrays
+
+
+def dataset_columns(path):
+    """Column names of a dataset without loading its rows"""
+    if is_columnar(path):
+        return list(read_meta(path)['columns'])
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).schema_arrow.names
+    if path.endswith('.feather'):
+        import pyarrow.feather as feather
+        return feather.read_table(path, memory_map=True).column_names
+    if path.endswith(('.ndjson', '.jsonl')):
+        return list(next(pd.read_json(path, lines=True, chunksize=1)).columns)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_dataset(path, columns=None):
+    """Load a dataset as a DataFrame, reading only the requested columns
+
+    Supports columnar directories (memory-mapped, no copy for fixed-width
+    columns), Parquet/Feather files (requires pyarrow) and CSV.
+    """
+    if is_columnar(path):
+        arrays = open_columnar(path, columns)
+        data = {
+            name: values.to_numpy() if isinstance(values, StringColumn) else values
+            for name, values in arrays.items()
+        }
+        return pd.DataFrame(data, copy=False)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    if path.endswith('.feather'):
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def _columnar_chunks(path, columns, chunksize, first_row=0):
+    arrays = open_columnar(path, columns)
+    rows = read_meta(path)['rows']
+    for start in range(first_row, rows, chunksize):
+        stop = min(start + chunksize, rows)
+        yield pd.DataFrame({
+            name: values.to_numpy(start, stop) if isinstance(values, StringColumn) else values[start:stop]
+            for name, values in arrays.items()
+        }, copy=False)
+
+
+def iter_dataset_chunks(path, columns=None, chunksize=1_000_000):
+    """Yield a dataset as DataFrames of at most chunksize rows
+
+    Columnar chunks are zero-copy slices of the memory-mapped columns;
+    CSV, NDJSON and Parquet are parsed incrementally, so memory stays
+    bounded by the chunk size rather than the dataset size.
+    """
+    if is_columnar(path):
+        yield from _columnar_chunks(path, columns, chunksize)
+    elif path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif path.endswith('.feather'):
+        # Feather has no incremental reader; load the requested columns once
+        df = pd.read_feather(path, columns=columns)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    elif path.endswith(('.ndjson', '.jsonl')):
+        for chunk in pd.read_json(path, lines=True, chunksize=chunksize):
+            yield chunk if columns is None else chunk.reindex(columns=columns)
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def iter_dataset_positions(path, columns=None, chunksize=1_000_000, position=0):
+    """Yield (chunk, position) pairs, where position is just past the chunk
+
+    Passing a yielded position back starts reading right after that chunk
+    without re-reading anything before it: a row number for columnar,
+    Parquet and Feather data, a byte offset into the file for CSV and
+    NDJSON (whose records must then be one per line).
+    """
+    if is_columnar(path):
+        for chunk in _columnar_chunks(path, columns, chunksize, position):
+            position += len(chunk)
+            yield chunk, position
+    elif path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        # Start at the row group holding `position` and drop its leading rows
+        group, group_start = 0, 0
+        while group < parquet.num_row_groups and group_start + parquet.metadata.row_group(group).num_rows <= position:
+            group_start += parquet.metadata.row_group(group).num_rows
+            group += 1
+        skip = position - group_start
+        for batch in parquet.iter_batches(batch_size=chunksize, row_groups=range(group, parquet.num_row_groups),
+                                          columns=columns):
+            chunk = batch.to_pandas()
+            if skip:
+                chunk, skip = chunk.iloc[skip:], max(0, skip - len(chunk))
+            if len(chunk):
+                position += len(chunk)
+                yield chunk, position
+    elif path.endswith('.feather'):
+        df = pd.read_feather(path, columns=columns)
+        for start in range(position, len(df), chunksize):
+            chunk = df.iloc[start:start + chunksize]
+            yield chunk, start + len(chunk)
+    else:
+        ndjson = path.endswith(('.ndjson', '.jsonl'))
+        with open(path, 'rb') as f:
+            header = b'' if ndjson else f.readline()
+            f.seek(max(position, f.tell()))
+            while True:
+                lines = list(itertools.islice(f, chunksize))
+                if not lines:
+                    break
+                if ndjson:
+                    chunk = pd.read_json(io.BytesIO(b''.join(lines)), lines=True)
+                    chunk = chunk if columns is None else chunk.reindex(columns=columns)
+                else:
+                    chunk = pd.read_csv(io.BytesIO(header + b''.join(lines)), usecols=columns)
+                yield chunk, f.tell()
+
+
+def convert_csv(csv_path, output_path, chunksize=1_000_000, append=False):
+    """Convert a CSV dataset to the columnar format in streaming chunks"""
+    writer = ColumnarWriter(output_path, append=append)
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        writer.append(chunk)
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a CSV dataset to the columnar format')
+    parser.add_argument('csv_path', help='input CSV file')
+    parser.add_argument('output_path', help='output columnar dataset directory')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='rows converted per chunk')
+    parser.add_argument('--append', action='store_true', help='append to an existing columnar dataset')
+    args = parser.parse_args()
+
+    rows = convert_csv(args.csv_path, args.output_path, args.chunksize, args.append)
+    print(f"Converted {rows} rows to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
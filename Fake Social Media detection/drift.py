@@ -0,0 +1,305 @@
+"""
+Feature drift monitoring: training-time reference sketches against live traffic
+
+A FeatureSketch holds, for every model feature, a histogram over fixed
+bin edges (the training deciles) plus the row count, sum and sum of
+squares. Its size depends only on the number of features, never on the
+rows seen, and two sketches with the same edges merge by addition, so
+per-worker sketches can be combined.
+
+The trainer stores a reference sketch of the training rows in the model
+artifact. DriftMonitor keeps a live sketch with the same edges, updated
+from every scored request without keeping the requests themselves, and
+periodically compares the two:
+
+    psi         population stability index over the bins
+    ks          largest gap between the binned cumulative distributions
+    mean_shift  live mean minus reference mean, in reference std units
+
+A feature with PSI >= PSI_WARN is 'moderate' drift, >= PSI_ALERT
+'significant'.
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Quantile bins per feature in the reference sketch (fewer for discrete features)
+DRIFT_BINS = 10
+
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+
+# Live rows needed before drift scores are reported
+MIN_LIVE_ROWS = 100
+
+# Smallest bin share used in PSI, so empty bins do not give infinite scores
+_PSI_FLOOR = 1e-4
+
+
+class FeatureSketch:
+    """Fixed-edge histograms, counts, sums and squared sums of every feature"""
+
+    def __init__(self, feature_columns, edges, counts=None, rows=0, sums=None, squares=None):
+        self.feature_columns = tuple(feature_columns)
+        self.edges = [np.asarray(e, dtype=np.float64) for e in edges]
+        width = max((len(e) for e in self.edges), default=0)
+        # Padding edges are +inf, which no finite value reaches
+        self._padded = np.full((len(self.edges), width), np.inf)
+        for j, e in enumerate(self.edges):
+            self._padded[j, :len(e)] = e
+        n_features = len(self.feature_columns)
+        self.counts = np.zeros((n_features, width + 1), dtype=np.int64) if counts is None else np.asarray(counts)
+        self.rows = int(rows)
+        self.sums = np.zeros(n_features) if sums is None else np.asarray(sums, dtype=np.float64)
+        self.squares = np.zeros(n_features) if squares is None else np.asarray(squares, dtype=np.float64)
+
+    @classmethod
+    def reference(cls, X, feature_columns, bins=DRIFT_BINS):
+        """Sketch of training rows, with bin edges at their quantiles"""
+        X = np.asarray(X, dtype=np.float64)
+        quantiles = np.nanquantile(X, np.linspace(0, 1, bins + 1)[1:-1], axis=0) if len(X) else None
+        edges = [np.unique(quantiles[:, j]) if quantiles is not None else np.zeros(0)
+                 for j in range(len(feature_columns))]
+        sketch = cls(feature_columns, edges)
+        sketch.update(X)
+        return sketch
+
+    def empty(self):
+        """A sketch with the same edges and nothing counted"""
+        return FeatureSketch(self.feature_columns, self.edges)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return
+        # A value's bin is the number of edges at or below it
+        bins = (X[:, :, np.newaxis] >= self._padded[np.newaxis, :, :]).sum(axis=2)
+        width = self.counts.shape[1]
+        cells = (np.arange(X.shape[1]) * width)[np.newaxis, :] + bins
+        self.counts += np.bincount(cells.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+        self.rows += len(X)
+        self.sums += X.sum(axis=0)
+        self.squares += np.square(X).sum(axis=0)
+
+    def merge(self, other):
+        """Sum of two sketches with the same features and edges"""
+        if other.feature_columns != self.feature_columns or other.counts.shape != self.counts.shape \
+                or not np.array_equal(other._padded, self._padded):
+            raise ValueError('Sketches with different features or bin edges cannot be merged')
+        return FeatureSketch(self.feature_columns, self.edges, self.counts + other.counts, self.rows + other.rows,
+                             self.sums + other.sums, self.squares + other.squares)
+
+    def shares(self):
+        return self.counts / max(self.rows, 1)
+
+    def means(self):
+        return self.sums / max(self.rows, 1)
+
+    def stds(self):
+        return np.sqrt(np.maximum(self.squares / max(self.rows, 1) - np.square(self.means()), 0.0))
+
+    def medians(self):
+        """Approximate medians, interpolated inside the bin holding the middle row"""
+        medians = np.zeros(len(self.feature_columns))
+        for j, e in enumerate(self.edges):
+            counts = self.counts[j, :len(e) + 1]
+            if self.rows == 0 or len(e) == 0:
+                medians[j] = self.means()[j]
+                continue
+            cumulative = np.cumsum(counts)
+            b = int(np.searchsorted(cumulative, self.rows / 2.0))
+            # Open-ended outer bins are pinned to their one finite edge
+            lower = e[b - 1] if b > 0 else e[0]
+            upper = e[b] if b < len(e) else e[-1]
+            before = cumulative[b] - counts[b]
+            fraction = (self.rows / 2.0 - before) / counts[b] if counts[b] else 0.0
+            medians[j] = lower + (upper - lower) * fraction
+        return medians
+
+    def to_dict(self):
+        """Plain lists, for the pickled artifact and the engine's JSON metadata"""
+        return {
+            'feature_columns': list(self.feature_columns),
+            'edges': [e.tolist() for e in self.edges],
+            'counts': self.counts.tolist(),
+            'rows': self.rows,
+            'sums': self.sums.tolist(),
+            'squares': self.squares.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['feature_columns'], data['edges'], np.asarray(data['counts'], dtype=np.int64),
+                   data['rows'], data['sums'], data['squares'])
+
+
+def _status(psi):
+    if psi >= PSI_ALERT:
+        return 'significant'
+    if psi >= PSI_WARN:
+        return 'moderate'
+    return 'stable'
+
+
+def drift_report(reference, live, min_rows=MIN_LIVE_ROWS):
+    """PSI, KS and mean shift of every feature, live against reference"""
+    report = {'rows': live.rows, 'reference_rows': reference.rows, 'computed_at': time.time()}
+    if live.rows < min_rows:
+        return dict(report, status='insufficient_data', min_rows=min_rows, features={}, drifted=[])
+
+    expected = np.maximum(reference.shares(), _PSI_FLOOR)
+    actual = np.maximum(live.shares(), _PSI_FLOOR)
+    # Padding bins are empty in both sketches and add nothing
+    psi = np.where(reference.counts + live.counts > 0, (actual - expected) * np.log(actual / expected), 0.0).sum(axis=1)
+    ks = np.abs(np.cumsum(live.shares(), axis=1) - np.cumsum(reference.shares(), axis=1)).max(axis=1)
+    reference_means, live_means = reference.means(), live.means()
+    reference_std = reference.stds()
+    safe_std = np.where(reference_std > 0, reference_std, 1.0)
+    shift = np.where(reference_std > 0, (live_means - reference_means) / safe_std, 0.0)
+    reference_medians, live_medians = reference.medians(), live.medians()
+
+    features = {}
+    for j, name in enumerate(reference.feature_columns):
+        features[name] = {
+            'psi': round(float(psi[j]), 4),
+            'ks': round(float(ks[j]), 4),
+            'mean_shift': round(float(shift[j]), 4),
+            'reference_mean': round(float(reference_means[j]), 4),
+            'live_mean': round(float(live_means[j]), 4),
+            'reference_median': round(float(reference_medians[j]), 4),
+            'live_median': round(float(live_medians[j]), 4),
+            'status': _status(psi[j])
+        }
+    drifted = sorted((name for name, f in features.items() if f['status'] != 'stable'),
+                     key=lambda name: -features[name]['psi'])
+    return dict(report, status=_status(float(psi.max())) if len(psi) else 'stable',
+                max_psi=round(float(psi.max()), 4) if len(psi) else 0.0, features=features, drifted=drifted)
+
+
+class DriftMonitor:
+    """Live sketch for one model version, compared with its reference every interval seconds
+
+    Rows are copied into a small fixed buffer and folded into the sketch
+    when it fills, so observing a request is a cheap copy. With state_dir,
+    each worker also writes its live sketch there and the report merges
+    those of every worker written in the last few intervals.
+    """
+
+    def __init__(self, reference, version, interval=60.0, state_dir=None, buffer_rows=256):
+        self.reference = reference
+        self.version = version
+        self.interval = interval
+        self.state_dir = state_dir
+        self._buffer = np.empty((buffer_rows, len(reference.feature_columns)))
+        self._buffered = 0
+        self._live = reference.empty()
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._report = None
+        self._thread = None
+        self._pid = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start the periodic job in this process (a no-op if already running here)"""
+        # Threads do not survive a fork; a worker also drops rows counted before it
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._live = self.reference.empty()
+            self._buffered = 0
+            self._report = None
+            self._thread = threading.Thread(target=self._run, name='drift-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """End the periodic job, e.g. once a new model version has its own monitor"""
+        self._stopped.set()
+
+    def observe(self, X):
+        """Count scored feature rows into the live sketch"""
+        X = np.asarray(X, dtype=np.float64)
+        with self._lock:
+            start = 0
+            while start < len(X):
+                take = min(len(X) - start, len(self._buffer) - self._buffered)
+                self._buffer[self._buffered:self._buffered + take] = X[start:start + take]
+                self._buffered += take
+                start += take
+                if self._buffered == len(self._buffer):
+                    self._fold()
+
+    def _fold(self):
+        self._live.update(self._buffer[:self._buffered])
+        self._buffered = 0
+
+    def live(self):
+        """A copy of this worker's live sketch, including buffered rows"""
+        with self._lock:
+            self._fold()
+            return self._live.merge(self._live.empty())
+
+    def _state_path(self):
+        safe_version = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(self.version))
+        return os.path.join(self.state_dir, f'drift-{safe_version}-{os.getpid()}.json')
+
+    def _merged(self, live):
+        """This worker's sketch merged with recent ones from other workers"""
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self._state_path()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(dict(live.to_dict(), version=self.version), f)
+        os.replace(tmp_path, path)
+
+        cutoff = time.time() - 3 * self.interval
+        prefix = path[:path.rindex('-') + 1]
+        for other in glob.glob(prefix + '*.json'):
+            if other == path:
+                continue
+            try:
+                if os.path.getmtime(other) < cutoff:
+                    continue
+                with open(other) as f:
+                    state = json.load(f)
+                # Another version's name can share this prefix
+                if state.get('version') == self.version:
+                    live = live.merge(FeatureSketch.from_dict(state))
+            except (OSError, ValueError, KeyError):
+                logger.warning("Skipping unreadable drift state %s", other)
+        return live
+
+    def compute(self):
+        """Recompute the drift report now"""
+        with self._compute_lock:
+            live = self.live()
+            if self.state_dir:
+                live = self._merged(live)
+            self._report = dict(drift_report(self.reference, live), model_version=self.version,
+                                workers_merged=bool(self.state_dir))
+            return self._report
+
+    @property
+    def latest(self):
+        """The last computed report, or None"""
+        return self._report
+
+    def report(self):
+        """The latest periodic report, computing one if none exists yet"""
+        return self._report or self.compute()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.compute()
+            except Exception:
+                logger.exception("Drift computation failed")
@@ -0,0 +1,99 @@
+"""
+Per-prediction explanations: the features that pushed each score up or down
+
+Contributions are additive in log-odds: each feature's share plus a bias
+term sums to the model's margin for that row. They come from the tree
+model itself, batched over all rows at once:
+
+    XGBoost model     booster.predict(..., pred_contribs=True) (TreeSHAP)
+    compiled engine   CompiledEnsemble.contributions() (Saabas), using
+                      per-node expected values precomputed when it loads
+
+In cascade mode, rows the linear first stage settles are explained by
+that stage (coefficient times feature value), so an explanation always
+describes the model that produced the score.
+"""
+
+import numpy as np
+
+from cascade import escalation_mask, first_stage_proba
+from tree_engine import CompiledEnsemble
+
+DEFAULT_TOP_FEATURES = 5
+
+
+class Explainer:
+    """Batched feature contributions for one model, built once at model load"""
+
+    def __init__(self, model, feature_columns):
+        self.feature_columns = tuple(feature_columns)
+        if isinstance(model, CompiledEnsemble):
+            if model.expected is None:
+                raise ValueError('This engine was exported without node covers; re-export it to explain predictions')
+            self._tree_contributions = model.contributions
+        elif hasattr(model, 'get_booster'):
+            import xgboost
+
+            booster = model.get_booster()
+            self._tree_contributions = lambda X: booster.predict(xgboost.DMatrix(X), pred_contribs=True)
+        else:
+            raise ValueError(f"Explanations are not supported for {type(model).__name__} models")
+
+    def contributions(self, X_model, cascade=None):
+        """Log-odds contribution of every feature plus a bias column, shape (rows, features + 1)
+
+        X_model is what the model scores: scaled features for an XGBoost
+        model, raw ones for a compiled engine.
+        """
+        X = np.asarray(X_model, dtype=np.float64)
+        if cascade is None:
+            return np.asarray(self._tree_contributions(X), dtype=np.float64)
+
+        escalated = escalation_mask(cascade, first_stage_proba(cascade, X))
+        contributions = np.empty((len(X), X.shape[1] + 1))
+        contributions[:, :-1] = X * cascade['coef']
+        contributions[:, -1] = cascade['intercept']
+        if escalated.any():
+            contributions[escalated] = self._tree_contributions(X[escalated])
+        return contributions
+
+    def explain(self, X_model, top=DEFAULT_TOP_FEATURES, cascade=None):
+        """The top contributing features of every row, as response fields"""
+        contributions = self.contributions(X_model, cascade)[:, :-1]
+        if len(contributions) == 0:
+            return []
+        top = max(1, min(top, contributions.shape[1]))
+        magnitude = np.abs(contributions)
+        # Partition out the top features, then order just those by magnitude
+        chosen = np.argpartition(-magnitude, top - 1, axis=1)[:, :top]
+        order = np.argsort(-np.take_along_axis(magnitude, chosen, axis=1), axis=1, kind='stable')
+        chosen = np.take_along_axis(chosen, order, axis=1)
+        values = np.take_along_axis(contributions, chosen, axis=1)
+        return [self._fields(row_features, row_values) for row_features, row_values in zip(chosen, values)]
+
+    def _fields(self, features, values):
+        contributions = {self.feature_columns[f]: round(float(v), 4) for f, v in zip(features, values)}
+        return {'feature_contributions': contributions, 'explanation': describe(contributions)}
+
+
+def describe(contributions):
+    """Short text summary of signed feature contributions"""
+    def listing(items):
+        return ', '.join(f"{name.replace('_', ' ')} ({value:+.2f})" for name, value in items)
+
+    raised = [(name, value) for name, value in contributions.items() if value > 0]
+    lowered = [(name, value) for name, value in contributions.items() if value < 0]
+    parts = []
+    if raised:
+        parts.append(f"Towards fake: {listing(raised)}.")
+    if lowered:
+        parts.append(f"Towards real: {listing(lowered)}.")
+    return ' '.join(parts) or 'No single feature moved the score.'
+
+
+def load_explainer(model, feature_columns):
+    """Explainer for a model, or None when it cannot be explained"""
+    try:
+        return Explainer(model, feature_columns)
+    except ValueError:
+        return None
@@ -0,0 +1,128 @@
+"""
+Feature engineering shared by the data generator, the trainer and the app
+
+All engineered columns are derived from raw account fields with columnar
+NumPy operations, so a batch of any size is derived in one vectorized
+pass and every path computes the features identically.
+"""
+
+import numpy as np
+
+from usernames import USERNAME_COLUMNS, PatternMatcher, default_analyzer, encode_usernames
+
+# Raw account fields the engineered features are computed from
+RAW_COLUMNS = [
+    'account_age_days', 'followers', 'following', 'posts_count',
+    'avg_likes', 'avg_comments', 'avg_shares', 'has_profile_pic',
+    'has_bio', 'has_location', 'verified'
+]
+
+DERIVED_COLUMNS = [
+    'followers_following_ratio', 'engagement_rate', 'suspicious_username',
+    'low_activity', 'high_follower_ratio', 'low_engagement'
+]
+
+SUSPICIOUS_PATTERNS = ['bot', 'fake', 'spam', 'user']
+_suspicious_matcher = PatternMatcher(SUSPICIOUS_PATTERNS)
+
+
+def _column(columns, name, n):
+    if name in columns:
+        return np.asarray(columns[name], dtype=np.float64)
+    return np.zeros(n, dtype=np.float64)
+
+
+def _length(columns):
+    if hasattr(columns, 'columns'):
+        return len(columns)
+    for values in columns.values():
+        return len(values)
+    return 0
+
+
+def suspicious_username_flags(usernames):
+    """1 where a username contains one of the suspicious patterns, else 0"""
+    return (_suspicious_matcher.count(encode_usernames(usernames)[0]) > 0).astype(np.int64)
+
+
+def derive_features(columns, username_analyzer=None):
+    """Compute every engineered column from raw account fields
+
+    columns is a DataFrame or a mapping of equal-length arrays. Missing raw
+    fields count as 0. suspicious_username comes from the 'username'
+    column where one is given, falling back to a supplied
+    'suspicious_username' value (or 0) for rows without a username.
+    With a username_analyzer, the USERNAME_COLUMNS are derived as well
+    (all 0 for rows without a username).
+    """
+    n = _length(columns)
+
+    followers = _column(columns, 'followers', n)
+    following = _column(columns, 'following', n)
+    posts_count = _column(columns, 'posts_count', n)
+    account_age_days = _column(columns, 'account_age_days', n)
+    interactions = _column(columns, 'avg_likes', n) + _column(columns, 'avg_comments', n) + _column(columns, 'avg_shares', n)
+
+    followers_following_ratio = followers / np.maximum(following, 1)
+    engagement_rate = interactions / np.maximum(followers, 1)
+
+    suspicious_username = _column(columns, 'suspicious_username', n).astype(np.int64)
+    username_features = {col: np.zeros(n) for col in USERNAME_COLUMNS} if username_analyzer is not None else {}
+    if 'username' in columns:
+        usernames = np.asarray(columns['username'])
+        if usernames.dtype.kind in 'US':
+            present = np.ones(n, dtype=bool)
+        else:
+            present = np.array([isinstance(name, str) for name in usernames], dtype=bool)
+        if present.any():
+            # One encoding pass feeds both the suspicious flag and the username features
+            codes, lengths = encode_usernames(usernames[present])
+            suspicious_username[present] = _suspicious_matcher.count(codes) > 0
+            if username_analyzer is not None:
+                for col, values in username_analyzer.features_from_codes(codes, lengths).items():
+                    username_features[col][present] = values
+
+    return {
+        'followers_following_ratio': followers_following_ratio,
+        'engagement_rate': engagement_rate,
+        'suspicious_username': suspicious_username,
+        'low_activity': ((posts_count < 5) & (account_age_days > 30)).astype(np.int64),
+        'high_follower_ratio': (followers_following_ratio > 10).astype(np.int64),
+        'low_engagement': ((engagement_rate < 0.01) & (followers > 100)).astype(np.int64),
+        **username_features
+    }
+
+
+def add_derived_features(df, username_analyzer=None):
+    """Return df with all engineered columns (re)computed from its raw fields"""
+    return df.assign(**derive_features(df, username_analyzer))
+
+
+def uses_username_features(feature_columns):
+    """True if a model's features include the USERNAME_COLUMNS"""
+    return any(col in USERNAME_COLUMNS for col in feature_columns)
+
+
+def input_columns(feature_columns):
+    """Fields a caller supplies for a model: its non-derived features plus the raw derivation inputs"""
+    columns = [col for col in feature_columns if col not in DERIVED_COLUMNS and col not in USERNAME_COLUMNS]
+    columns += [col for col in RAW_COLUMNS if col not in columns]
+    return columns + ['suspicious_username']
+
+
+def assemble_matrix(columns, feature_columns, username_analyzer=None):
+    """Derive engineered features and stack everything in feature_columns order
+
+    Username features are only computed when feature_columns uses them,
+    with the model's analyzer or else the default pattern set.
+    """
+    if uses_username_features(feature_columns):
+        username_analyzer = username_analyzer or default_analyzer()
+    else:
+        username_analyzer = None
+    derived = derive_features(columns, username_analyzer)
+    n = len(next(iter(derived.values())))
+    return np.column_stack([
+        derived[col] if col in derived else _column(columns, col, n)
+        for col in feature_columns
+    ]).astype(np.float64, copy=False)
@@ -0,0 +1,23 @@
+"""
+Gunicorn settings for serving the detector with a shared, preloaded model
+
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+
+# Import the app (and load the model) once in the master before forking,
+# so every worker shares the model's memory pages copy-on-write
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's generations;
+    # otherwise the first gc pass in each worker touches (and copies) the
+    # preloaded model's pages
+    gc.freeze()
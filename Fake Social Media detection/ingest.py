@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Streaming account-event ingestion with incremental rescoring
+
+Reads account update events (one JSON object per line) from a file, a
+pipe or stdin, or from an in-process queue, and keeps a compact running
+state per account. Events are applied in small batches; after each batch
+only the accounts whose feature vector actually changed are re-scored,
+and their new scores are written to a sink.
+
+Events:
+
+    {"username": "alice", "type": "snapshot", "followers": 120, "following": 80,
+     "posts_count": 14, "avg_likes": 9.5, "created_date": "2023-04-01", "has_bio": 1}
+    {"username": "alice", "type": "follow", "count": 3}      # followers += 3
+    {"username": "alice", "type": "unfollow"}                # followers -= 1
+    {"username": "alice", "type": "follow_out"}              # following += 1
+    {"username": "alice", "type": "unfollow_out"}            # following -= 1
+    {"username": "alice", "type": "post", "likes": 12, "comments": 3, "shares": 1}
+    {"username": "alice", "type": "profile", "has_profile_pic": 1, "verified": 0}
+
+Every event may carry "ts" (epoch seconds or an ISO date), which sets the
+clock used to compute account age from created_date.
+
+    python ingest.py events.ndjson --sink scores.ndjson --follow
+    tail -F events.ndjson | python ingest.py - --sink -
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from features import assemble_matrix
+from predictor import DEFAULT_MODEL_PATH, format_result, load_bundle, score_matrix
+
+# Per-account state: one compact array per field
+STATE_DTYPES = {
+    'followers': np.uint32,
+    'following': np.uint32,
+    'posts_count': np.uint32,
+    'avg_likes': np.float32,
+    'avg_comments': np.float32,
+    'avg_shares': np.float32,
+    'has_profile_pic': np.uint8,
+    'has_bio': np.uint8,
+    'has_location': np.uint8,
+    'verified': np.uint8,
+    'account_age_days': np.float32,
+    # Days since 1970-01-01, or -1 when created_date is unknown
+    'created_day': np.int32
+}
+
+SNAPSHOT_FIELDS = ['followers', 'following', 'posts_count', 'avg_likes', 'avg_comments', 'avg_shares',
+                   'has_profile_pic', 'has_bio', 'has_location', 'verified', 'account_age_days']
+PROFILE_FIELDS = ['has_profile_pic', 'has_bio', 'has_location', 'verified']
+COUNTER_EVENTS = {
+    'follow': ('followers', 1), 'unfollow': ('followers', -1),
+    'follow_out': ('following', 1), 'unfollow_out': ('following', -1)
+}
+
+
+def _day(value):
+    """Days since the epoch for epoch seconds or an ISO date string"""
+    if isinstance(value, (int, float)):
+        return int(value // 86400)
+    return int(np.datetime64(str(value)[:10], 'D').astype(np.int64))
+
+
+def _fit(field, value):
+    """value if it can be stored in field's column; ValueError otherwise"""
+    dtype = np.dtype(STATE_DTYPES[field])
+    limit = int(np.iinfo(dtype).max) if dtype.kind in 'iu' else float(np.finfo(dtype).max)
+    if not np.isfinite(float(value)) or abs(value) > limit:
+        raise ValueError(f"{field} is out of range: {value}")
+    return value
+
+
+class AccountStore:
+    """Running per-account state in fixed-width columns, indexed by username
+
+    Memory per account is a few dozen bytes of column data plus its index
+    entry, independent of how many events it receives. Rolling averages of
+    likes, comments and shares are exact means for an account's first
+    posts and then decay exponentially over roughly `window` posts.
+    """
+
+    def __init__(self, window=20, capacity=1024):
+        self.alpha = 2.0 / (window + 1)
+        self.index = {}
+        self.usernames = []
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in STATE_DTYPES.items()}
+        self.columns['created_day'][:] = -1
+        self.clock_day = None
+
+    def __len__(self):
+        return len(self.usernames)
+
+    def _row(self, username):
+        row = self.index.get(username)
+        if row is not None:
+            return row
+        row = len(self.usernames)
+        capacity = len(self.columns['followers'])
+        if row == capacity:
+            for name, values in self.columns.items():
+                grown = np.zeros(capacity * 2, dtype=values.dtype)
+                grown[:capacity] = values
+                self.columns[name] = grown
+            self.columns['created_day'][capacity:] = -1
+        self.index[username] = row
+        self.usernames.append(username)
+        return row
+
+    def apply(self, event):
+        """Apply one event; returns the account's row. Raises ValueError for bad events."""
+        if not isinstance(event, dict):
+            raise ValueError('Event must be a JSON object')
+        username = event.get('username')
+        if not isinstance(username, str) or not username:
+            raise ValueError("Event needs a 'username' string")
+        kind = event.get('type')
+        # Everything is parsed and range-checked before any state changes,
+        # so a bad event leaves the clock and the account untouched
+        clock_day = _fit('created_day', _day(event['ts'])) if 'ts' in event else self.clock_day
+
+        columns = self.columns
+        if kind in COUNTER_EVENTS:
+            field, sign = COUNTER_EVENTS[kind]
+            count = int(event.get('count', 1))
+            _fit(field, abs(count))
+            row = self._row(username)
+            columns[field][row] = _fit(field, max(0, int(columns[field][row]) + sign * count))
+        elif kind == 'post':
+            likes, comments, shares = (_fit(field, max(float(event.get(key, 0)), 0)) for field, key in
+                                       (('avg_likes', 'likes'), ('avg_comments', 'comments'), ('avg_shares', 'shares')))
+            row = self._row(username)
+            posts = _fit('posts_count', int(columns['posts_count'][row]) + 1)
+            columns['posts_count'][row] = posts
+            weight = max(self.alpha, 1.0 / posts)
+            for field, value in (('avg_likes', likes), ('avg_comments', comments), ('avg_shares', shares)):
+                columns[field][row] += (value - columns[field][row]) * weight
+        elif kind in ('snapshot', 'profile'):
+            fields = SNAPSHOT_FIELDS if kind == 'snapshot' else PROFILE_FIELDS
+            values = {field: _fit(field, max(float(event[field]), 0)) for field in fields if field in event}
+            if kind == 'snapshot' and event.get('created_date'):
+                values['created_day'] = _fit('created_day', _day(event['created_date']))
+            row = self._row(username)
+            for field, value in values.items():
+                columns[field][row] = value
+        else:
+            raise ValueError(f"Unknown event type: {kind!r}")
+        self.clock_day = clock_day
+        return row
+
+    def feature_columns(self, rows):
+        """Raw feature columns and usernames for the given rows, ready for assemble_matrix"""
+        selected = {name: values[rows].astype(np.float64) for name, values in self.columns.items()}
+        selected['username'] = np.array([self.usernames[row] for row in rows], dtype=object)
+        created = selected.pop('created_day')
+        today = self.clock_day if self.clock_day is not None else int(time.time() // 86400)
+        known = created >= 0
+        selected['account_age_days'][known] = np.maximum(today - created[known], 0)
+        return selected
+
+
+class NDJSONSink:
+    """Write changed scores as NDJSON to a file, or stdout for '-'"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = sys.stdout if path == '-' else open(path, 'a')
+
+    def write(self, records):
+        self._file.write(''.join(json.dumps(record) + '\n' for record in records))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class QueueSink:
+    """Hand changed scores to an in-process consumer"""
+
+    def __init__(self, output_queue):
+        self.queue = output_queue
+
+    def write(self, records):
+        for record in records:
+            self.queue.put(record)
+
+    def close(self):
+        pass
+
+
+class IncrementalRescorer:
+    """Apply event batches to the store and re-score only accounts whose features changed"""
+
+    def __init__(self, bundle, sink, store=None, cascade=False):
+        self.bundle = bundle
+        self.sink = sink
+        self.store = store or AccountStore()
+        self.cascade = bundle.cascade if cascade else None
+        self.last_features = np.zeros((0, len(bundle.feature_columns)), dtype=np.float32)
+        self.last_probability = np.zeros(0, dtype=np.float32)
+        self.scored = np.zeros(0, dtype=bool)
+        self.events = self.invalid = self.rescored = self.emitted = self.unscored = 0
+
+    def _grow(self):
+        size = len(self.store.usernames)
+        if size > len(self.scored):
+            extra = max(size, 2 * len(self.scored)) - len(self.scored)
+            self.last_features = np.vstack([self.last_features,
+                                            np.zeros((extra, self.last_features.shape[1]), dtype=np.float32)])
+            self.last_probability = np.concatenate([self.last_probability, np.zeros(extra, dtype=np.float32)])
+            self.scored = np.concatenate([self.scored, np.zeros(extra, dtype=bool)])
+
+    def process(self, events):
+        """Apply a batch of events; returns the number of scores emitted"""
+        touched = set()
+        for event in events:
+            self.events += 1
+            try:
+                if isinstance(event, (str, bytes)):
+                    event = json.loads(event)
+                touched.add(self.store.apply(event))
+            except (ValueError, TypeError, KeyError, OverflowError):
+                self.invalid += 1
+        if not touched:
+            return 0
+
+        self._grow()
+        rows = np.fromiter(touched, dtype=np.int64, count=len(touched))
+        rows.sort()
+        features = assemble_matrix(self.store.feature_columns(rows), self.bundle.feature_columns,
+                                   self.bundle.username_analyzer)
+
+        # Accounts whose features cannot be scored are skipped, not allowed to fail the batch
+        finite = np.isfinite(features).all(axis=1)
+        self.unscored += int((~finite).sum())
+
+        # Only accounts whose (float32) feature vector moved are re-scored
+        compact = features.astype(np.float32)
+        changed = finite & (~self.scored[rows] | (compact != self.last_features[rows]).any(axis=1))
+        if not changed.any():
+            return 0
+        rows, features, compact = rows[changed], features[changed], compact[changed]
+
+        try:
+            probabilities = score_matrix(self.bundle.model, self.bundle.scaler, features, self.cascade)
+        except Exception as e:
+            self.unscored += len(rows)
+            print(f"Scoring failed for a batch of {len(rows)} accounts: {e}", file=sys.stderr)
+            return 0
+        self.rescored += len(rows)
+
+        records = []
+        for row, probability in zip(rows, probabilities):
+            previous = float(self.last_probability[row]) if self.scored[row] else None
+            if previous is not None and np.float32(probability) == self.last_probability[row]:
+                continue
+            record = {'username': self.store.usernames[row], 'model_version': self.bundle.version,
+                      'previous_probability': previous}
+            record.update(format_result(probability))
+            records.append(record)
+
+        self.last_features[rows] = compact
+        self.last_probability[rows] = probabilities
+        self.scored[rows] = True
+        if records:
+            self.sink.write(records)
+            self.emitted += len(records)
+        return len(records)
+
+
+def _read_lines(f, events, follow, poll_interval=0.2):
+    """Feed lines from an open file, pipe or stdin into the bounded event queue"""
+    try:
+        while True:
+            line = f.readline()
+            if line:
+                if line.strip():
+                    # Blocks when the consumer falls behind (backpressure)
+                    events.put(line)
+            elif follow and f is not sys.stdin:
+                time.sleep(poll_interval)
+            else:
+                break
+    finally:
+        if f is not sys.stdin:
+            f.close()
+        events.put(None)
+
+
+def run(events, rescorer, batch_size=1000, flush_ms=100, report_every=5.0):
+    """Consume events from a queue until a None sentinel, in batches
+
+    A batch is processed when it reaches batch_size events or flush_ms
+    after its first event, whichever comes first.
+    """
+    started = last_report = time.perf_counter()
+    done = False
+    while not done:
+        batch = [events.get()]
+        if batch[0] is None:
+            break
+        deadline = time.perf_counter() + flush_ms / 1000.0
+        while len(batch) < batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = events.get(timeout=remaining) if remaining > 0 else events.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                done = True
+                break
+            batch.append(item)
+        rescorer.process(batch)
+
+        now = time.perf_counter()
+        if now - last_report >= report_every:
+            last_report = now
+            print(f"{rescorer.events} events ({rescorer.events / (now - started):,.0f}/sec), "
+                  f"{len(rescorer.store)} accounts, {rescorer.rescored} rescored, {rescorer.emitted} emitted",
+                  file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    print(f"Finished: {rescorer.events} events ({rescorer.invalid} invalid) in {elapsed:.1f}s, "
+          f"{len(rescorer.store)} accounts, {rescorer.rescored} rescored ({rescorer.unscored} unscorable), "
+          f"{rescorer.emitted} emitted",
+          file=sys.stderr)
+
+
+def ingest_file(path, sink, model_path=DEFAULT_MODEL_PATH, follow=False, batch_size=1000, flush_ms=100,
+                window=20, cascade=False, queue_size=100_000):
+    """Ingest an NDJSON event file or pipe ('-' for stdin); returns the rescorer"""
+    rescorer = IncrementalRescorer(load_bundle(model_path), sink, AccountStore(window=window), cascade)
+    events = queue.Queue(maxsize=queue_size)
+    # Opened here so a missing file fails before the reader thread starts
+    source = sys.stdin if path == '-' else open(path)
+    reader = threading.Thread(target=_read_lines, args=(source, events, follow), name='event-reader', daemon=True)
+    reader.start()
+    run(events, rescorer, batch_size, flush_ms)
+    return rescorer
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Ingest account events and stream changed scores')
+    parser.add_argument('events', help="NDJSON event file or pipe ('-' for stdin)")
+    parser.add_argument('--sink', default='-', help="NDJSON output for changed scores ('-' for stdout)")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='model artifact (.pkl) or compiled engine (.npz)')
+    parser.add_argument('--follow', action='store_true', help='keep reading as the event file grows')
+    parser.add_argument('--batch-size', type=int, default=1000, help='events applied per rescoring batch')
+    parser.add_argument('--flush-ms', type=float, default=100, help='max wait before a partial batch is applied')
+    parser.add_argument('--window', type=int, default=20, help='posts covered by the rolling engagement averages')
+    parser.add_argument('--cascade', action='store_true', help='score with the cascade first stage')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sink = NDJSONSink(args.sink)
+    try:
+        ingest_file(args.events, sink, args.model, args.follow, args.batch_size, args.flush_ms,
+                    args.window, args.cascade)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition, and a
+sampling cProfile hook for hot-path investigations
+
+Metrics are per process; under gunicorn each worker reports its own
+counters and histograms.
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from 100us to 2.5s
+LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f'{self.name}{format_labels(key)} {format_number(value)}' for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f'{self.name}{format_labels(key)} {format_number(value)}' for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = list(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{format_labels(key + (("le", format_number(float(bound))),))} {cumulative}')
+            lines.append(f'{self.name}_bucket{format_labels(key + (("le", "+Inf"),))} {count}')
+            lines.append(f'{self.name}_sum{format_labels(key)} {format_number(total)}')
+            lines.append(f'{self.name}_count{format_labels(key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class SamplingProfiler:
+    """Capture cProfile output for one in every N requests
+
+    The sampling rate lives in a small JSON control file, so it can be
+    changed at runtime (for every worker) without restarting the server;
+    workers re-read it at most once per second. every=0 disables sampling.
+    """
+
+    def __init__(self, output_dir, control_path=None, every=0):
+        self.output_dir = output_dir
+        self.control_path = control_path or os.path.join(output_dir, 'profiler.json')
+        self.every = every
+        self._count = 0
+        self._lock = threading.Lock()
+        self._active = False
+        self._dumps = 0
+        self._checked_at = 0.0
+        self._control_mtime = None
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < 1.0:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.control_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._control_mtime:
+            self._control_mtime = mtime
+            try:
+                with open(self.control_path) as f:
+                    self.every = int(json.load(f).get('every', 0))
+            except (OSError, ValueError):
+                pass
+
+    def configure(self, every):
+        """Set the sampling rate for every worker sharing the control file"""
+        os.makedirs(os.path.dirname(self.control_path) or '.', exist_ok=True)
+        tmp_path = self.control_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'every': int(every)}, f)
+        os.replace(tmp_path, self.control_path)
+        self.every = int(every)
+        self._checked_at = 0.0
+
+    def start(self):
+        """Return a running profiler if this request is sampled, else None"""
+        self._refresh()
+        if self.every <= 0:
+            return None
+        with self._lock:
+            self._count += 1
+            # Only one cProfile can be active per process at a time
+            if self._count % self.every or self._active:
+                return None
+            self._active = True
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            with self._lock:
+                self._active = False
+            return None
+        return profiler
+
+    def finish(self, profiler, name):
+        """Stop a sampled profiler and dump its stats to output_dir"""
+        profiler.disable()
+        with self._lock:
+            self._active = False
+            self._dumps += 1
+            sequence = self._dumps
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_name = ''.join(c if c.isalnum() else '_' for c in name).strip('_') or 'request'
+        filepath = os.path.join(self.output_dir, f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{sequence}-{safe_name}.prof')
+        profiler.dump_stats(filepath)
+        return filepath
+
+    def recent(self, limit=20):
+        try:
+            files = [name for name in os.listdir(self.output_dir) if name.endswith('.prof')]
+        except OSError:
+            return []
+        return sorted(files, reverse=True)[:limit]
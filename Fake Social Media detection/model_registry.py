@@ -0,0 +1,195 @@
+"""
+Versioned model registry and background hot-reload of the serving model
+
+A registry is a directory of model artifacts, one file per version:
+
+    models/registry/
+        20250101-120000.pkl
+        20250108-093000.pkl
+        registry.json          # {"pinned": "20250101-120000"} or {"pinned": null}
+
+Versions are ordered by name, so published versions are named with a UTC
+timestamp. The active version is the pinned one when a pin is set, else
+the newest. The pin lives in registry.json so every worker process (and
+host sharing the directory) converges on the same version.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from predictor import load_bundle, warm_bundle
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_SUFFIX = '.pkl'
+CONTROL_FILE = 'registry.json'
+
+
+class ModelRegistry:
+    """A directory of versioned model artifacts plus a shared pin"""
+
+    def __init__(self, root):
+        self.root = root
+        self.control_path = os.path.join(root, CONTROL_FILE)
+
+    def path(self, version):
+        return os.path.join(self.root, version + ARTIFACT_SUFFIX)
+
+    def versions(self):
+        """Published versions, oldest first"""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        return sorted(name[:-len(ARTIFACT_SUFFIX)] for name in names if name.endswith(ARTIFACT_SUFFIX))
+
+    def describe(self):
+        """Versions with their size and publish time, for the admin endpoint"""
+        described = []
+        for version in self.versions():
+            try:
+                stat = os.stat(self.path(version))
+            except OSError:
+                continue
+            described.append({
+                'version': version,
+                'size_bytes': stat.st_size,
+                'published': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(stat.st_mtime))
+            })
+        return described
+
+    def pinned(self):
+        try:
+            with open(self.control_path) as f:
+                return json.load(f).get('pinned')
+        except (OSError, ValueError):
+            return None
+
+    def _write_control(self, pinned):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.control_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'pinned': pinned}, f)
+        os.replace(tmp_path, self.control_path)
+
+    def pin(self, version):
+        """Serve this version until unpinned"""
+        if version not in self.versions():
+            raise KeyError(f"Unknown model version: {version}")
+        self._write_control(version)
+
+    def unpin(self):
+        """Go back to serving the newest version"""
+        self._write_control(None)
+
+    def active_version(self):
+        """The version workers should be serving, or None for an empty registry"""
+        versions = self.versions()
+        pinned = self.pinned()
+        if pinned in versions:
+            return pinned
+        return versions[-1] if versions else None
+
+    def rollback(self, current=None):
+        """Pin the version published before current (default: the active one)"""
+        versions = self.versions()
+        current = current or self.active_version()
+        if current not in versions or versions.index(current) == 0:
+            raise KeyError(f"No version older than {current} to roll back to")
+        previous = versions[versions.index(current) - 1]
+        self.pin(previous)
+        return previous
+
+    def publish(self, filepath, version=None):
+        """Copy an artifact into the registry under a new version; returns the version
+
+        The copy is written to a temporary name and renamed into place, so
+        a watcher never sees a partially written artifact.
+        """
+        version = version or time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+        if os.sep in version or version.startswith('.'):
+            raise ValueError(f"Invalid model version: {version}")
+        os.makedirs(self.root, exist_ok=True)
+        target = self.path(version)
+        if os.path.exists(target):
+            raise FileExistsError(f"Model version {version} already exists")
+        tmp_path = target + '.tmp'
+        shutil.copyfile(filepath, tmp_path)
+        os.replace(tmp_path, target)
+        return version
+
+
+class ModelWatcher:
+    """Keep the serving model in step with the registry's active version
+
+    A daemon thread polls the registry every interval seconds. When the
+    active version changes it loads and warms the new bundle in the
+    background, then hands it to swap_fn, so requests keep using the old
+    bundle until the new one is ready. A version that fails to load is
+    not retried until its file changes.
+    """
+
+    def __init__(self, registry, swap_fn, current_fn, interval=5.0):
+        self.registry = registry
+        self.swap_fn = swap_fn
+        self.current_fn = current_fn
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._failed = {}
+        self._thread = None
+        self._pid = None
+        self.reloads = 0
+        self.last_error = None
+
+    def start(self):
+        """Start polling in this process (a no-op if already running here)"""
+        # Threads do not survive a fork, so each worker starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Model watcher check failed")
+
+    def check(self):
+        """Load and swap in the active version if it differs from the one serving"""
+        with self._lock:
+            version = self.registry.active_version()
+            current = self.current_fn()
+            if version is None or (current is not None and current.version == version):
+                return False
+
+            path = self.registry.path(version)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                return False
+            if self._failed.get(version) == mtime:
+                return False
+
+            started = time.perf_counter()
+            try:
+                bundle = load_bundle(path, version=version)
+                warm_bundle(bundle)
+            except Exception as e:
+                self._failed[version] = mtime
+                self.last_error = f"{version}: {e}"
+                logger.exception("Failed to load model version %s", version)
+                return False
+
+            self.swap_fn(bundle)
+            self.reloads += 1
+            logger.info("Swapped in model version %s (loaded in %.1fms)",
+                        version, (time.perf_counter() - started) * 1000)
+            return True
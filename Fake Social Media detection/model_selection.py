@@ -0,0 +1,173 @@
+"""
+Parallel model-selection sweep over XGBoost, LightGBM and RandomForest
+
+The training matrix is preprocessed and scaled once, written to .npy
+files and memory-mapped by every worker process, so jobs share the
+pages instead of receiving their own pickled copy.
+"""
+
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+import xgboost as xgb
+
+try:
+    import lightgbm as lgb
+except ImportError:
+    lgb = None
+
+# Hyperparameter grids; every combination is evaluated with k-fold CV
+CANDIDATE_GRIDS = {
+    'xgboost': {
+        'n_estimators': [100, 300],
+        'max_depth': [3, 6],
+        'learning_rate': [0.1, 0.3]
+    },
+    'lightgbm': {
+        'n_estimators': [100, 300],
+        'num_leaves': [15, 31],
+        'learning_rate': [0.05, 0.1]
+    },
+    'random_forest': {
+        'n_estimators': [100, 300],
+        'max_depth': [None, 12]
+    }
+}
+
+SINGLE_ROW_REPEATS = 50
+
+# Memory-mapped training data, set once per worker process
+_shared = {}
+
+
+def build_model(name, params, n_jobs=1):
+    if name == 'xgboost':
+        return xgb.XGBClassifier(random_state=42, n_jobs=n_jobs, **params)
+    if name == 'lightgbm':
+        return lgb.LGBMClassifier(random_state=42, n_jobs=n_jobs, verbose=-1, **params)
+    if name == 'random_forest':
+        return RandomForestClassifier(random_state=42, n_jobs=n_jobs, **params)
+    raise ValueError(f"Unknown model: {name}")
+
+
+def candidate_grid(models=None):
+    """Expand the grids into (model name, params) candidates"""
+    candidates = []
+    for name, grid in CANDIDATE_GRIDS.items():
+        if models and name not in models:
+            continue
+        if name == 'lightgbm' and lgb is None:
+            print("LightGBM is not installed; skipping LightGBM candidates")
+            continue
+        keys = sorted(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            candidates.append((name, dict(zip(keys, values))))
+    return candidates
+
+
+def _init_worker(X_path, y_path, n_splits):
+    X = np.load(X_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+    # Folds are recomputed deterministically in each worker rather than shipped
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42).split(np.zeros(len(y)), y))
+    _shared.update(X=X, y=y, folds=folds)
+
+
+def _evaluate_fold(job):
+    name, params, fold, n_jobs = job
+    X, y = _shared['X'], _shared['y']
+    train_index, valid_index = _shared['folds'][fold]
+
+    model = build_model(name, params, n_jobs)
+    started = time.perf_counter()
+    model.fit(X[train_index], y[train_index])
+    fit_seconds = time.perf_counter() - started
+
+    X_valid = np.ascontiguousarray(X[valid_index])
+    started = time.perf_counter()
+    probabilities = model.predict_proba(X_valid)[:, 1]
+    batch_seconds = time.perf_counter() - started
+
+    # Single-row latency is what an /api/predict call pays
+    row = X_valid[:1]
+    timings = []
+    for _ in range(SINGLE_ROW_REPEATS):
+        started = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - started)
+
+    return {
+        'model': name,
+        'params': params,
+        'fold': fold,
+        'auc': float(roc_auc_score(y[valid_index], probabilities)),
+        'fit_seconds': fit_seconds,
+        'batch_us_per_row': batch_seconds / len(valid_index) * 1e6,
+        'single_row_ms': float(np.median(timings)) * 1e3
+    }
+
+
+def _summarize(fold_results):
+    grouped = {}
+    for result in fold_results:
+        key = (result['model'], json.dumps(result['params'], sort_keys=True))
+        grouped.setdefault(key, []).append(result)
+
+    summary = []
+    for (name, params), results in grouped.items():
+        aucs = [result['auc'] for result in results]
+        summary.append({
+            'model': name,
+            'params': json.loads(params),
+            'auc_mean': float(np.mean(aucs)),
+            'auc_std': float(np.std(aucs)),
+            'fit_seconds': float(np.mean([result['fit_seconds'] for result in results])),
+            'batch_us_per_row': float(np.mean([result['batch_us_per_row'] for result in results])),
+            'single_row_ms': float(np.median([result['single_row_ms'] for result in results]))
+        })
+    return sorted(summary, key=lambda item: (-item['auc_mean'], item['single_row_ms']))
+
+
+def run_sweep(X, y, cpus=None, threads_per_job=1, n_splits=5, models=None):
+    """Evaluate every candidate with k-fold CV on a process pool
+
+    cpus is the total CPU budget; each job's model uses threads_per_job
+    threads, so at most cpus // threads_per_job jobs run at once.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    workers = max(1, cpus // threads_per_job)
+    candidates = candidate_grid(models)
+    jobs = [(name, params, fold, threads_per_job) for name, params in candidates for fold in range(n_splits)]
+
+    print(f"Evaluating {len(candidates)} candidates x {n_splits} folds on {workers} workers "
+          f"({threads_per_job} thread(s) each)")
+
+    with tempfile.TemporaryDirectory() as shared_dir:
+        X_path = os.path.join(shared_dir, 'X.npy')
+        y_path = os.path.join(shared_dir, 'y.npy')
+        np.save(X_path, np.ascontiguousarray(X, dtype=np.float32))
+        np.save(y_path, np.asarray(y, dtype=np.int64))
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(X_path, y_path, n_splits)) as executor:
+            fold_results = list(executor.map(_evaluate_fold, jobs))
+        elapsed = time.perf_counter() - started
+
+    summary = _summarize(fold_results)
+    print(f"Sweep finished in {elapsed:.1f}s")
+    print(f"{'model':<14} {'AUC':>8} {'+/-':>7} {'fit s':>8} {'us/row':>8} {'1-row ms':>9}  params")
+    for item in summary:
+        print(f"{item['model']:<14} {item['auc_mean']:>8.4f} {item['auc_std']:>7.4f} "
+              f"{item['fit_seconds']:>8.2f} {item['batch_us_per_row']:>8.2f} "
+              f"{item['single_row_ms']:>9.3f}  {item['params']}")
+
+    return {'elapsed_seconds': elapsed, 'cpus': cpus, 'n_splits': n_splits, 'candidates': summary}
@@ -6,29 +6,126 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
 import xgboost as xgb
 import joblib
+import argparse
+import json
 import os
+import tempfile
+
+from cascade import CascadeCalibrator, first_stage_proba, fit_first_stage, fit_first_stage_streaming
+from dataset_io import dataset_columns, iter_dataset_chunks, read_dataset
+from drift import FeatureSketch
+from features import add_derived_features, input_columns, uses_username_features
+from predictor import artifact_version
+from tree_engine import export_engine
+from usernames import USERNAME_COLUMNS, UsernameAnalyzer, load_patterns
+
+FEATURE_COLUMNS = [
+    'account_age_days', 'followers', 'following', 'posts_count',
+    'avg_likes', 'avg_comments', 'avg_shares', 'has_profile_pic',
+    'has_bio', 'has_location', 'verified', 'followers_following_ratio', 
+    'engagement_rate', 'suspicious_username', 'low_activity', 
+    'high_follower_ratio', 'low_engagement'
+]
+TARGET_COLUMN = 'is_fake'
+AUC_BINS = 1000
+
+class ReservoirSample:
+    """Fixed-size uniform sample of rows seen in a stream (Algorithm R)"""
+    
+    def __init__(self, size, n_columns, seed=42):
+        self.size = size
+        self.rows = np.empty((size, n_columns), dtype=np.float64)
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+    
+    def update(self, values):
+        # Fill the reservoir first, then replace entries with decreasing probability
+        fill = min(len(values), max(0, self.size - self.seen))
+        self.rows[self.seen:self.seen + fill] = values[:fill]
+        rest = values[fill:]
+        
+        if len(rest):
+            positions = self.seen + fill + np.arange(len(rest))
+            slots = (self.rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+            keep = slots < self.size
+            self.rows[slots[keep]] = rest[keep]
+        self.seen += len(values)
+    
+    def median(self):
+        return np.nanmedian(self.rows[:min(self.seen, self.size)], axis=0)
+
+def binned_auc(positive_counts, negative_counts):
+    """ROC AUC from per-bin score histograms of the positive and negative class"""
+    negatives_below = np.cumsum(negative_counts) - negative_counts
+    pairs = positive_counts.sum() * negative_counts.sum()
+    if pairs == 0:
+        return float('nan')
+    wins = (positive_counts * negatives_below).sum() + 0.5 * (positive_counts * negative_counts).sum()
+    return float(wins / pairs)
+
+class ChunkedDataIter(xgb.DataIter):
+    """Feed scaled training chunks to XGBoost's external-memory DMatrix"""
+    
+    def __init__(self, chunks, cache_prefix):
+        self._chunks = chunks
+        self._iterator = None
+        super().__init__(cache_prefix=cache_prefix)
+    
+    def next(self, input_data):
+        if self._iterator is None:
+            self._iterator = iter(self._chunks())
+        try:
+            X, y = next(self._iterator)
+        except StopIteration:
+            return 0
+        input_data(data=X, label=y)
+        return 1
+    
+    def reset(self):
+        self._iterator = None
 
 class FakeAccountDetector:
-    def __init__(self):
+    def __init__(self, username_patterns=None, username_features=True):
         self.model = None
         self.scaler = StandardScaler()
+        self.feature_columns = list(FEATURE_COLUMNS)
+        self.username_analyzer = UsernameAnalyzer(username_patterns)
+        self.username_features = username_features
+        self.cascade = None
+        self.validation_rows = None
+        self.drift_reference = None
+    
+    def select_features(self, filepath):
+        """Add the username features when the dataset has raw usernames"""
+        self.feature_columns = list(FEATURE_COLUMNS)
+        if self.username_features and 'username' in dataset_columns(filepath):
+            self.feature_columns += USERNAME_COLUMNS
+        return self.feature_columns
+    
+    @property
+    def active_username_analyzer(self):
+        return self.username_analyzer if uses_username_features(self.feature_columns) else None
         
+    def source_columns(self, filepath):
+        """Raw columns to read: engineered features are always re-derived from these"""
+        available = set(dataset_columns(filepath))
+        columns = [col for col in input_columns(self.feature_columns) if col in available]
+        if 'username' in available:
+            columns.append('username')
+        return columns + [TARGET_COLUMN]
+    
     def load_data(self, filepath):
-        self.df = pd.read_csv(filepath)
+        # Only the raw inputs are read; columnar datasets are memory-mapped
+        self.select_features(filepath)
+        self.df = read_dataset(filepath, columns=self.source_columns(filepath))
         print(f"Data loaded: {len(self.df)} samples")
         return self.df
     
     def preprocess_data(self):
-        feature_columns = [
-            'account_age_days', 'followers', 'following', 'posts_count',
-            'avg_likes', 'avg_comments', 'avg_shares', 'has_profile_pic',
-            'has_bio', 'has_location', 'verified', 'followers_following_ratio', 
-            'engagement_rate', 'suspicious_username', 'low_activity', 
-            'high_follower_ratio', 'low_engagement'
-        ]
-        
-        self.X = self.df[feature_columns].copy()
-        self.y = self.df['is_fake'].copy()
+        # Derive engineered features with the same pipeline the app uses
+        self.df = add_derived_features(self.df, self.active_username_analyzer)
+        self.X = self.df[self.feature_columns]
+        self.y = self.df[TARGET_COLUMN]
         
         # Handle missing values
         self.X = self.X.fillna(self.X.median())
@@ -41,6 +138,9 @@ class FakeAccountDetector:
         # Scale the features
         self.X_train_scaled = self.scaler.fit_transform(self.X_train)
         self.X_test_scaled = self.scaler.transform(self.X_test)
+        self.validation_rows = self.X_test
+        # Training distribution the app's drift monitor compares live traffic with
+        self.drift_reference = FeatureSketch.reference(self.X_train, self.feature_columns)
         
         print(f"Training set: {len(self.X_train)} samples")
         print(f"Test set: {len(self.X_test)} samples")
@@ -66,26 +166,231 @@ class FakeAccountDetector:
         
         return accuracy, auc
     
+    def train_cascade(self, max_accuracy_loss=0.001):
+        """Fit the cheap first stage and calibrate its thresholds on the test split"""
+        print("Training cascade first stage...")
+        first_stage = fit_first_stage(self.X_train_scaled, np.asarray(self.y_train))
+        
+        calibrator = CascadeCalibrator()
+        calibrator.update(
+            first_stage_proba(first_stage, self.X_test_scaled),
+            self.model.predict_proba(self.X_test_scaled)[:, 1],
+            np.asarray(self.y_test)
+        )
+        self.cascade = dict(first_stage, **calibrator.calibrate(max_accuracy_loss))
+        self._report_cascade()
+        return self.cascade
+    
+    def _report_cascade(self):
+        print(f"Cascade thresholds: settle below {self.cascade['low']:.3f} or from {self.cascade['high']:.3f}")
+        print(f"Cascade escalation rate: {self.cascade['escalation_rate']:.2%} "
+              f"(accuracy {self.cascade['cascade_accuracy']:.4f} vs {self.cascade['full_accuracy']:.4f})")
+    
+    def _stream_chunks(self, filepath, chunksize, test_size, seed):
+        """Yield (X, y, is_test) per chunk with a reproducible random split"""
+        columns = self.source_columns(filepath)
+        for i, chunk in enumerate(iter_dataset_chunks(filepath, columns, chunksize)):
+            chunk = add_derived_features(chunk, self.active_username_analyzer)
+            X = chunk[self.feature_columns].to_numpy(dtype=np.float64)
+            y = chunk[TARGET_COLUMN].to_numpy(dtype=np.float64)
+            # Seeding per chunk index makes every pass see the same split
+            is_test = np.random.default_rng([seed, i]).random(len(chunk)) < test_size
+            yield X, y, is_test
+    
+    def train_streaming(self, filepath, chunksize=1_000_000, test_size=0.2, sample_size=100_000,
+                        n_estimators=100, seed=42, max_accuracy_loss=0.001):
+        """Train out of core: peak memory is bounded by chunksize, not dataset size
+        
+        Pass 1 estimates medians from a reservoir sample and fits the scaler
+        incrementally on training rows; XGBoost then trains from an
+        external-memory DMatrix fed chunk by chunk, and a final pass
+        evaluates accuracy and a histogram-based AUC on the held-out rows.
+        Unless max_accuracy_loss is None, two more passes fit and calibrate
+        the cascade first stage.
+        """
+        self.select_features(filepath)
+        reservoir = ReservoirSample(sample_size, len(self.feature_columns), seed)
+        train_rows = test_rows = 0
+        
+        print("Computing streaming statistics...")
+        for X, y, is_test in self._stream_chunks(filepath, chunksize, test_size, seed):
+            reservoir.update(X)
+            if (~is_test).any():
+                # StandardScaler.partial_fit ignores NaNs, so no fill is needed yet
+                self.scaler.partial_fit(X[~is_test])
+            train_rows += int((~is_test).sum())
+            test_rows += int(is_test.sum())
+        
+        medians = reservoir.median()
+        sample = reservoir.rows[:min(reservoir.seen, reservoir.size)]
+        self.validation_rows = np.where(np.isnan(sample), medians, sample)
+        self.drift_reference = FeatureSketch.reference(self.validation_rows, self.feature_columns)
+        print(f"Training set: {train_rows} samples")
+        print(f"Test set: {test_rows} samples")
+        
+        def prepared(select_test):
+            for X, y, is_test in self._stream_chunks(filepath, chunksize, test_size, seed):
+                rows = is_test if select_test else ~is_test
+                if not rows.any():
+                    continue
+                X = X[rows]
+                # Handle missing values with the streaming medians
+                X = np.where(np.isnan(X), medians, X)
+                yield self.scaler.transform(X), y[rows]
+        
+        print("Training XGBoost model (external memory)...")
+        params = {'objective': 'binary:logistic', 'tree_method': 'hist', 'seed': seed}
+        with tempfile.TemporaryDirectory() as cache_dir:
+            dtrain = xgb.DMatrix(ChunkedDataIter(lambda: prepared(False), os.path.join(cache_dir, 'cache')))
+            booster = xgb.train(params, dtrain, num_boost_round=n_estimators)
+            del dtrain
+        
+        # Wrap the booster so the saved artifact is the usual XGBClassifier
+        self.model = xgb.XGBClassifier()
+        self.model.load_model(bytearray(booster.save_raw(raw_format='json')))
+        
+        # Evaluate model with bounded memory
+        correct = total = 0
+        positive_counts = np.zeros(AUC_BINS)
+        negative_counts = np.zeros(AUC_BINS)
+        for X_test, y_test in prepared(True):
+            y_pred_proba = self.model.predict_proba(X_test)[:, 1]
+            correct += int(((y_pred_proba >= 0.5) == y_test).sum())
+            total += len(y_test)
+            bins = np.minimum((y_pred_proba * AUC_BINS).astype(np.int64), AUC_BINS - 1)
+            positive_counts += np.bincount(bins[y_test == 1], minlength=AUC_BINS)
+            negative_counts += np.bincount(bins[y_test == 0], minlength=AUC_BINS)
+        
+        accuracy = correct / total if total else float('nan')
+        auc = binned_auc(positive_counts, negative_counts)
+        
+        print(f"Accuracy: {accuracy:.4f}")
+        print(f"AUC: {auc:.4f}")
+        
+        if max_accuracy_loss is not None:
+            # Cascade first stage: one more pass over training rows, one over held-out rows
+            print("Training cascade first stage...")
+            first_stage = fit_first_stage_streaming(prepared(False), seed)
+            calibrator = CascadeCalibrator()
+            for X_test, y_test in prepared(True):
+                calibrator.update(first_stage_proba(first_stage, X_test),
+                                  self.model.predict_proba(X_test)[:, 1], y_test)
+            self.cascade = dict(first_stage, **calibrator.calibrate(max_accuracy_loss))
+            self._report_cascade()
+        
+        return accuracy, auc
+    
     def save_model(self, filepath='models/fake_account_detector.pkl'):
         os.makedirs('models', exist_ok=True)
         
         model_data = {
             'model': self.model,
             'scaler': self.scaler,
-            'feature_columns': list(self.X.columns)
+            'feature_columns': list(self.feature_columns)
         }
+        if self.cascade is not None:
+            model_data['cascade'] = self.cascade
+        if self.active_username_analyzer is not None:
+            model_data['username_patterns'] = self.username_analyzer.patterns
+        if self.drift_reference is not None:
+            model_data['drift_reference'] = self.drift_reference.to_dict()
         
         joblib.dump(model_data, filepath)
         print(f"Model saved to {filepath}")
+    
+    def compile_engine(self, filepath='models/fake_account_detector.npz', model_path='models/fake_account_detector.pkl'):
+        """Compile the ensemble for xgboost-free serving, validated against predict_proba"""
+        engine = export_engine(self.model, self.scaler, self.feature_columns,
+                               version=artifact_version(model_path) + '-compiled', cascade=self.cascade,
+                               username_patterns=self.username_analyzer.patterns if self.active_username_analyzer else None,
+                               drift_reference=self.drift_reference.to_dict() if self.drift_reference is not None else None)
+        if self.validation_rows is not None:
+            difference = engine.validate(self.model, self.scaler, self.validation_rows)
+            print(f"Compiled engine matches predict_proba on {len(self.validation_rows)} rows "
+                  f"(max difference {difference:.2g})")
+        engine.save(filepath)
+        print(f"Compiled engine saved to {filepath}")
+        return engine
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Train the fake account detection model')
+    parser.add_argument('--data', default='data/synthetic_social_media_data.csv',
+                        help='training dataset (CSV, Parquet/Feather or columnar directory)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='train out of core, reading the dataset in chunks')
+    parser.add_argument('--chunksize', type=int, default=1_000_000,
+                        help='rows per chunk in streaming mode')
+    parser.add_argument('--select', action='store_true',
+                        help='run a cross-validated model-selection sweep instead of training')
+    parser.add_argument('--cpus', type=int, default=None,
+                        help='CPU budget for the sweep (default: all cores)')
+    parser.add_argument('--threads-per-job', type=int, default=1,
+                        help='threads each candidate model may use during the sweep')
+    parser.add_argument('--folds', type=int, default=5, help='cross-validation folds for the sweep')
+    parser.add_argument('--models', nargs='+', choices=['xgboost', 'lightgbm', 'random_forest'],
+                        help='restrict the sweep to these model families')
+    parser.add_argument('--select-output', default='models/model_selection.json',
+                        help='where to write the sweep results')
+    parser.add_argument('--cascade-max-loss', type=float, default=0.001,
+                        help='accuracy the cascade may give up versus the full model (fraction)')
+    parser.add_argument('--no-cascade', action='store_true', help='skip training the cascade first stage')
+    parser.add_argument('--no-compile', action='store_true',
+                        help='skip exporting the compiled NumPy engine (models/fake_account_detector.npz)')
+    parser.add_argument('--registry', help='also publish the trained model as a new version in this registry directory')
+    parser.add_argument('--username-patterns',
+                        help='file of suspicious username patterns, one per line (default: built-in set)')
+    parser.add_argument('--no-username-features', action='store_true',
+                        help='do not derive length, entropy, pattern and n-gram features from usernames')
+    return parser.parse_args()
+
+def build_detector(args):
+    patterns = load_patterns(args.username_patterns) if args.username_patterns else None
+    return FakeAccountDetector(username_patterns=patterns, username_features=not args.no_username_features)
+
+def select_model(args):
+    """Preprocess once and run the parallel model-selection sweep on the training split"""
+    from model_selection import run_sweep
+    
+    detector = build_detector(args)
+    detector.load_data(args.data)
+    detector.preprocess_data()
+    
+    results = run_sweep(
+        detector.X_train_scaled, detector.y_train, cpus=args.cpus,
+        threads_per_job=args.threads_per_job, n_splits=args.folds, models=args.models
+    )
+    
+    os.makedirs(os.path.dirname(args.select_output) or '.', exist_ok=True)
+    with open(args.select_output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Sweep results saved to {args.select_output}")
 
 def main():
+    args = parse_args()
     os.makedirs('data', exist_ok=True)
     
-    detector = FakeAccountDetector()
-    detector.load_data('data/synthetic_social_media_data.csv')
-    detector.preprocess_data()
-    detector.train_model()
+    if args.select:
+        select_model(args)
+        return
+    
+    detector = build_detector(args)
+    if args.streaming:
+        max_accuracy_loss = None if args.no_cascade else args.cascade_max_loss
+        detector.train_streaming(args.data, chunksize=args.chunksize, max_accuracy_loss=max_accuracy_loss)
+    else:
+        detector.load_data(args.data)
+        detector.preprocess_data()
+        detector.train_model()
+        if not args.no_cascade:
+            detector.train_cascade(args.cascade_max_loss)
     detector.save_model()
+    if not args.no_compile:
+        detector.compile_engine()
+    
+    if args.registry:
+        from model_registry import ModelRegistry
+        version = ModelRegistry(args.registry).publish('models/fake_account_detector.pkl')
+        print(f"Published model version {version} to {args.registry}")
     
     print("Model training completed!")
 
@@ -0,0 +1,142 @@
+"""
+Bounded LRU + TTL cache for predictions, keyed on the normalized feature vector
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def feature_key(features, model_version):
+    """Cache key for one ordered feature vector under a given model version
+
+    Values are normalized to float64 (and -0.0 to 0.0) so equivalent inputs
+    such as 1, 1.0 and True share an entry.
+    """
+    normalized = (features.astype('float64') + 0.0).tobytes()
+    return hashlib.blake2b(model_version.encode('utf-8') + b'\0' + normalized, digest_size=16).hexdigest()
+
+
+class SQLiteCacheBackend:
+    """On-disk cache shared by every worker process on the host"""
+
+    # Expired rows are purged after this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+
+    def _connection(self):
+        # Connections must not cross a fork, so each process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.filepath, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)'
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT value, expires FROM predictions WHERE key = ? AND expires > ?', (key, now)
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def set(self, key, value, expires):
+        with self._lock:
+            conn = self._connection()
+            conn.execute('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)', (key, json.dumps(value), expires))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute('DELETE FROM predictions WHERE expires <= ?', (time.time(),))
+
+
+class PredictionCache:
+    """In-process LRU cache with per-entry TTL and an optional shared backend
+
+    Lookups check the local LRU first, then the shared backend (promoting
+    hits into the LRU). Entries expire ttl_seconds after they are stored.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=300, backend=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.backend is not None:
+            shared = self.backend.get(key, now)
+            if shared is not None:
+                value, expires = shared
+                with self._lock:
+                    self.shared_hits += 1
+                    self._store(key, value, expires)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, value, expires)
+        if self.backend is not None:
+            self.backend.set(key, value, expires)
+
+    def _store(self, key, value, expires):
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'shared_backend': self.backend.filepath if self.backend is not None else None,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0
+            }
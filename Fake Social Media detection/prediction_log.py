@@ -0,0 +1,283 @@
+"""
+Write-behind prediction history in SQLite
+
+Requests only append to a bounded in-process queue. A background writer
+drains it and bulk-inserts each batch in a single transaction, so logging
+adds no database round trip to a prediction. When the queue is full the
+backpressure policy decides what happens:
+
+    drop         discard the new entry (the request never waits)
+    drop_oldest  discard the oldest queued entry to make room
+    block        wait up to block_ms (per record() call) for room, then
+                 discard the entries that still do not fit
+
+Discarded entries are counted in stats(). History queries borrow a
+connection from a small pool and run alongside the writer under WAL.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('drop', 'drop_oldest', 'block')
+
+# Most rows one history query returns
+MAX_QUERY_ROWS = 1000
+
+# Oldest rows beyond max_rows are pruned after this many written batches
+PRUNE_EVERY = 100
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS predictions ('
+    'id INTEGER PRIMARY KEY, ts REAL NOT NULL, source TEXT NOT NULL, model_version TEXT, '
+    'username TEXT, probability REAL NOT NULL, prediction INTEGER NOT NULL, inputs TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS predictions_ts ON predictions (ts)'
+)
+
+QUERY_FILTERS = {
+    'since': 'ts >= ?',
+    'until': 'ts < ?',
+    'source': 'source = ?',
+    'model_version': 'model_version = ?',
+    'username': 'username = ?',
+    'prediction': 'prediction = ?'
+}
+
+
+def _connect(filepath):
+    connection = sqlite3.connect(filepath, timeout=5, check_same_thread=False, isolation_level=None)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+class ConnectionPool:
+    """Up to `size` reusable SQLite connections; callers wait when all are in use"""
+
+    def __init__(self, filepath, size=4):
+        self.filepath = filepath
+        self.size = size
+        self._cond = threading.Condition()
+        self._idle = []
+        self._open = 0
+        self._pid = os.getpid()
+
+    @contextmanager
+    def connection(self):
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            with self._cond:
+                self._idle.append(connection)
+                self._cond.notify()
+
+    def _acquire(self):
+        with self._cond:
+            # Connections must not cross a fork, so a new process starts an empty pool
+            if self._pid != os.getpid():
+                self._idle, self._open, self._pid = [], 0, os.getpid()
+            while not self._idle and self._open >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        return _connect(self.filepath)
+
+
+class PredictionLog:
+    """Bounded queue of scored predictions with a background SQLite writer
+
+    The writer thread starts on the first record() in each process, so
+    every gunicorn worker writes its own entries after forking.
+    """
+
+    def __init__(self, filepath, max_queue=10000, batch_size=500, flush_ms=200, policy='drop', block_ms=5,
+                 max_rows=0, pool_size=4):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy} (expected one of {', '.join(POLICIES)})")
+        self.filepath = filepath
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        self.policy = policy
+        self.block_timeout = block_ms / 1000.0
+        self.max_rows = max_rows
+        self.pool = ConnectionPool(filepath, pool_size)
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._writing = 0
+        self._thread = None
+        self._pid = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.write_errors = 0
+
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.pool.connection() as connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+    def _start(self):
+        # Threads do not survive a fork, so each worker starts its own writer
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._pending.clear()
+        self._writing = 0
+        self._thread = threading.Thread(target=self._run, name='prediction-log', daemon=True)
+        self._thread.start()
+
+    def record(self, source, model_version, records, results):
+        """Queue every successfully scored record; never touches the database"""
+        now = time.time()
+        entries = [(now, source, model_version, record, result)
+                   for record, result in zip(records, results) if 'error' not in result]
+        if not entries:
+            return
+        # One wait budget for the whole call, however many rows it records
+        deadline = time.monotonic() + self.block_timeout
+        with self._cond:
+            self._start()
+            for entry in entries:
+                if len(self._pending) >= self.max_queue and not self._make_room(deadline):
+                    self.dropped += 1
+                    continue
+                self._pending.append(entry)
+                self.enqueued += 1
+            self._cond.notify_all()
+
+    def _make_room(self, deadline):
+        """Apply the backpressure policy to a full queue; True if the entry may be queued"""
+        if self.policy == 'drop_oldest':
+            self._pending.popleft()
+            self.dropped += 1
+            return True
+        if self.policy == 'block':
+            # The writer may be idle waiting for entries; wake it or nothing frees room
+            self._cond.notify_all()
+            while len(self._pending) >= self.max_queue:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+        return False
+
+    def _take_batch(self):
+        """Wait for entries, give a partial batch flush_ms to fill, then take up to batch_size"""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._writing = len(batch)
+            self._cond.notify_all()
+        return batch
+
+    @staticmethod
+    def _row(entry):
+        ts, source, model_version, record, result = entry
+        username = record.get('username')
+        return (ts, source, model_version, username if isinstance(username, str) else None,
+                float(result['probability']), int(result['prediction']), json.dumps(record, default=str))
+
+    def _run(self):
+        connection = _connect(self.filepath)
+        while True:
+            batch = self._take_batch()
+            try:
+                rows = [self._row(entry) for entry in batch]
+                with connection:
+                    connection.execute('BEGIN')
+                    connection.executemany(
+                        'INSERT INTO predictions (ts, source, model_version, username, probability, prediction, inputs) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+                    )
+                written = len(rows)
+            except Exception:
+                logger.exception("Failed to write %d prediction log entries", len(batch))
+                written = 0
+            with self._cond:
+                self.batches += 1
+                self.written += written
+                self.write_errors += len(batch) - written
+                self._writing = 0
+                self._cond.notify_all()
+            if self.max_rows and self.batches % PRUNE_EVERY == 0:
+                self._prune(connection)
+
+    def _prune(self, connection):
+        try:
+            connection.execute('DELETE FROM predictions WHERE id <= (SELECT MAX(id) FROM predictions) - ?',
+                               (self.max_rows,))
+        except sqlite3.Error:
+            logger.exception("Failed to prune the prediction log")
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued so far is written; False on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def query(self, limit=100, **filters):
+        """Most recent predictions first, optionally filtered (see QUERY_FILTERS)
+
+        limit is clamped to 1..MAX_QUERY_ROWS; SQLite would read a negative
+        LIMIT as no limit at all.
+        """
+        limit = max(1, min(int(limit), MAX_QUERY_ROWS))
+        clauses, params = [], []
+        for name, value in filters.items():
+            if name not in QUERY_FILTERS:
+                raise ValueError(f"Unknown history filter: {name}")
+            if value is not None:
+                clauses.append(QUERY_FILTERS[name])
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                'SELECT id, ts, source, model_version, username, probability, prediction, inputs '
+                f'FROM predictions{where} ORDER BY id DESC LIMIT ?', params + [limit]
+            ).fetchall()
+        return [
+            {'id': row[0], 'timestamp': row[1], 'source': row[2], 'model_version': row[3], 'username': row[4],
+             'probability': row[5], 'prediction': row[6], 'inputs': json.loads(row[7])}
+            for row in rows
+        ]
+
+    def stats(self):
+        with self._cond:
+            return {
+                'path': self.filepath,
+                'policy': self.policy,
+                'queued': len(self._pending),
+                'max_queue': self.max_queue,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'write_errors': self.write_errors,
+                'batches': self.batches,
+                'mean_batch_size': round(self.written / self.batches, 3) if self.batches else 0.0
+            }
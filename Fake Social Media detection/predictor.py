@@ -0,0 +1,133 @@
+"""
+Model artifact loading and vectorized scoring shared by the app and offline tools
+"""
+
+import hashlib
+from collections import namedtuple
+
+import joblib
+import numpy as np
+
+from cascade import cascade_proba
+from drift import FeatureSketch
+from explain import load_explainer
+from features import assemble_matrix, input_columns, uses_username_features
+from tree_engine import CompiledEnsemble
+from usernames import UsernameAnalyzer
+
+DEFAULT_MODEL_PATH = 'models/fake_account_detector.pkl'
+
+# Everything needed to score with one model version, swapped as a single unit
+ModelBundle = namedtuple('ModelBundle', ['model', 'scaler', 'feature_columns', 'version', 'path', 'artifact', 'cascade',
+                                         'username_analyzer', 'explainer', 'drift_reference'])
+
+
+def load_artifact(filepath=DEFAULT_MODEL_PATH):
+    """Load the model, scaler and feature columns saved by model_trainer"""
+    return joblib.load(filepath)
+
+
+def artifact_version(filepath, model_data=None):
+    """Version tag for a model artifact: its own 'version' entry, else a content hash"""
+    if model_data is not None and model_data.get('version'):
+        return str(model_data['version'])
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def username_analyzer_for(feature_columns, patterns):
+    """Analyzer with the pattern set a model was trained with, or None if it has no username features"""
+    if not uses_username_features(feature_columns):
+        return None
+    return UsernameAnalyzer(patterns)
+
+
+def drift_reference_for(data):
+    """Training-time feature sketch stored with a model, or None for models trained before drift monitoring"""
+    return FeatureSketch.from_dict(data) if data else None
+
+
+def load_bundle(filepath, version=None):
+    """Load an artifact as an immutable ModelBundle
+
+    version defaults to artifact_version(); the registry passes its own
+    version names. A .npz file is a compiled tree engine: it scores raw
+    features itself (scaler is None) and needs no xgboost. The explainer
+    is prepared here so explanations cost nothing extra to set up per request.
+    """
+    if filepath.endswith('.npz'):
+        engine = CompiledEnsemble.load(filepath)
+        return ModelBundle(
+            model=engine,
+            scaler=None,
+            feature_columns=engine.feature_columns,
+            version=version or engine.version or artifact_version(filepath),
+            path=filepath,
+            artifact=None,
+            cascade=engine.cascade,
+            username_analyzer=username_analyzer_for(engine.feature_columns, engine.username_patterns),
+            explainer=load_explainer(engine, engine.feature_columns),
+            drift_reference=drift_reference_for(engine.drift_reference)
+        )
+    model_data = load_artifact(filepath)
+    return ModelBundle(
+        model=model_data['model'],
+        scaler=model_data['scaler'],
+        feature_columns=tuple(model_data['feature_columns']),
+        version=version or artifact_version(filepath, model_data),
+        path=filepath,
+        artifact=model_data,
+        cascade=model_data.get('cascade'),
+        username_analyzer=username_analyzer_for(model_data['feature_columns'], model_data.get('username_patterns')),
+        explainer=load_explainer(model_data['model'], model_data['feature_columns']),
+        drift_reference=drift_reference_for(model_data.get('drift_reference'))
+    )
+
+
+def warm_bundle(bundle):
+    """Score one all-zero row so lazy initialisation happens before serving"""
+    score_matrix(bundle.model, bundle.scaler, np.zeros((1, len(bundle.feature_columns))))
+
+
+def frame_to_matrix(df, feature_columns, username_analyzer=None):
+    """Feature matrix for a DataFrame in feature_columns order
+
+    Engineered features are derived from the raw fields (and username)
+    with the shared pipeline. Columns missing from the frame and missing
+    values default to 0, the same as absent fields in predict_account.
+    """
+    columns = {
+        col: df[col].to_numpy(dtype=np.float64, na_value=0)
+        for col in input_columns(feature_columns) if col in df.columns
+    }
+    if 'username' in df.columns:
+        columns['username'] = df['username'].to_numpy(dtype=object)
+    if not columns:
+        return np.zeros((len(df), len(feature_columns)), dtype=np.float64)
+    return assemble_matrix(columns, feature_columns, username_analyzer)
+
+
+def score_matrix(model, scaler, features, cascade=None):
+    """Probability of being fake for every row, with one scaling and one model pass
+
+    With a cascade, only rows its first stage is unsure about reach the model.
+    scaler is None for a compiled engine, which scores raw features.
+    """
+    features_scaled = scaler.transform(features) if scaler is not None else features
+    if cascade is not None:
+        return cascade_proba(model, cascade, features_scaled)[0]
+    return model.predict_proba(features_scaled)[:, 1]
+
+
+def format_result(probability):
+    """Prediction response for one probability"""
+    prediction = int(probability >= 0.5)
+    return {
+        'prediction': prediction,
+        'probability': float(probability),
+        'is_fake': bool(prediction),
+        'confidence': float(max(probability, 1 - probability))
+    }
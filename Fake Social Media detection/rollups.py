@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Pre-aggregated analytics rollups for the dashboard
+
+A rollup is a dense cube of counts, metric sums and fixed-bin metric
+histograms over a few low-cardinality dimensions:
+
+    age_bucket    account age (0-30d, 31-90d, 91-365d, 1-2y, 2-5y, 5y+)
+    month         created_date month (YYYY-MM, or 'unknown')
+    verified      0/1
+    completeness  profile pic + bio + location present (0-3)
+    is_fake       0/1
+
+It is built in one streaming pass over the dataset, so its size depends
+only on the number of cells, never on the number of rows, and any slice
+query is answered by summing a few small arrays.
+
+    python rollups.py data/synthetic_social_media_data.csv data/rollup.npz
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_io import dataset_columns, iter_dataset_chunks
+from features import RAW_COLUMNS, derive_features
+
+ROLLUP_FORMAT = 'rollup-v1'
+
+AGE_BUCKETS = [
+    ('0-30d', 30), ('31-90d', 90), ('91-365d', 365), ('1-2y', 730), ('2-5y', 1825), ('5y+', np.inf)
+]
+UNKNOWN_MONTH = 'unknown'
+
+# Metrics summed and histogrammed per cell; bin edges are fixed so cubes can be merged
+METRICS = ['followers', 'following', 'posts_count', 'engagement_rate']
+METRIC_BINS = {
+    'followers': [0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 1000000],
+    'following': [0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000],
+    'posts_count': [0, 1, 5, 10, 50, 100, 500, 1000, 5000],
+    'engagement_rate': [0, 0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0]
+}
+# Every metric uses the same number of bins: its edges plus an overflow bin
+N_BINS = max(len(edges) for edges in METRIC_BINS.values()) + 1
+
+DIMENSIONS = ['age_bucket', 'month', 'verified', 'completeness', 'is_fake']
+
+SOURCE_COLUMNS = RAW_COLUMNS + ['created_date', 'is_fake']
+
+
+def _month_codes(values):
+    """Months since 1970-01 for each created_date, -1 where it is missing"""
+    dates = pd.to_datetime(pd.Series(values), errors='coerce').to_numpy(dtype='datetime64[M]')
+    codes = dates.astype(np.int64)
+    codes[np.isnat(dates)] = -1
+    return codes
+
+
+def _month_label(code):
+    return UNKNOWN_MONTH if code < 0 else str(np.datetime64(int(code), 'M'))
+
+
+class RollupBuilder:
+    """Accumulate the cube chunk by chunk
+
+    The month axis grows as new months are seen; every other axis has a
+    fixed size.
+    """
+
+    def __init__(self):
+        self.month_codes = []
+        self._month_index = {}
+        self.rows = 0
+        self.counts = np.zeros(self._shape(0), dtype=np.int64)
+        self.sums = np.zeros(self._shape(0) + (len(METRICS),), dtype=np.float64)
+        self.histograms = np.zeros(self._shape(0) + (len(METRICS), N_BINS), dtype=np.int64)
+
+    @staticmethod
+    def _shape(months):
+        return (len(AGE_BUCKETS), months, 2, 4, 2)
+
+    def _month_positions(self, codes):
+        unique = np.unique(codes)
+        new = [int(code) for code in unique if int(code) not in self._month_index]
+        if new:
+            for code in new:
+                self._month_index[code] = len(self.month_codes)
+                self.month_codes.append(code)
+            grow = [(0, 0)] * 5
+            grow[1] = (0, len(new))
+            self.counts = np.pad(self.counts, grow)
+            self.sums = np.pad(self.sums, grow + [(0, 0)])
+            self.histograms = np.pad(self.histograms, grow + [(0, 0), (0, 0)])
+        lookup = np.array([self._month_index[int(code)] for code in unique], dtype=np.int64)
+        return lookup[np.searchsorted(unique, codes)]
+
+    def update(self, chunk):
+        n = len(chunk)
+        if n == 0:
+            return
+
+        def column(name):
+            if name in chunk.columns:
+                return chunk[name].to_numpy(dtype=np.float64, na_value=0)
+            return np.zeros(n)
+
+        age = column('account_age_days')
+        age_bucket = np.searchsorted([upper for _, upper in AGE_BUCKETS], age, side='left')
+        if 'created_date' in chunk.columns:
+            months = self._month_positions(_month_codes(chunk['created_date'].to_numpy()))
+        else:
+            months = self._month_positions(np.full(n, -1, dtype=np.int64))
+        verified = (column('verified') > 0).astype(np.int64)
+        completeness = ((column('has_profile_pic') > 0).astype(np.int64) + (column('has_bio') > 0)
+                        + (column('has_location') > 0))
+        is_fake = (column('is_fake') > 0).astype(np.int64)
+
+        cells = np.ravel_multi_index((age_bucket, months, verified, completeness, is_fake), self.counts.shape)
+        n_cells = self.counts.size
+        self.counts += np.bincount(cells, minlength=n_cells).reshape(self.counts.shape)
+
+        derived = derive_features(chunk)
+        for m, metric in enumerate(METRICS):
+            values = derived[metric] if metric in derived else column(metric)
+            values = np.nan_to_num(values)
+            self.sums[..., m] += np.bincount(cells, weights=values, minlength=n_cells).reshape(self.counts.shape)
+            bins = np.searchsorted(METRIC_BINS[metric], values, side='right')
+            self.histograms[..., m, :] += np.bincount(
+                cells * N_BINS + bins, minlength=n_cells * N_BINS
+            ).reshape(self.counts.shape + (N_BINS,))
+        self.rows += n
+
+    def cube(self):
+        # Months in calendar order, with 'unknown' first
+        order = np.argsort(self.month_codes, kind='stable')
+        return RollupCube(
+            counts=self.counts[:, order],
+            sums=self.sums[:, order],
+            histograms=self.histograms[:, order],
+            months=[_month_label(self.month_codes[i]) for i in order],
+            rows=self.rows
+        )
+
+
+class RollupCube:
+    """Answer slice queries from the precomputed cube"""
+
+    def __init__(self, counts, sums, histograms, months, rows):
+        self.counts = counts
+        self.sums = sums
+        self.histograms = histograms
+        self.months = list(months)
+        self.rows = rows
+        self.labels = {
+            'age_bucket': [label for label, _ in AGE_BUCKETS],
+            'month': self.months,
+            'verified': ['0', '1'],
+            'completeness': ['0', '1', '2', '3'],
+            'is_fake': ['0', '1']
+        }
+
+    def save(self, filepath):
+        meta = {'format': ROLLUP_FORMAT, 'months': self.months, 'rows': self.rows,
+                'metrics': METRICS, 'metric_bins': METRIC_BINS}
+        tmp_path = filepath + '.tmp.npz'
+        np.savez_compressed(tmp_path, counts=self.counts, sums=self.sums, histograms=self.histograms,
+                            meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath):
+        with np.load(filepath, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != ROLLUP_FORMAT:
+                raise ValueError(f"{filepath} is not a {ROLLUP_FORMAT} file")
+            return cls(data['counts'], data['sums'], data['histograms'], meta['months'], meta['rows'])
+
+    def _selection(self, filters):
+        """Index arrays per dimension for the requested filter values
+
+        The is_fake axis is never subset, so its positions stay equal to
+        the label values; is_fake filters are applied in query().
+        """
+        selection = []
+        for dimension in DIMENSIONS:
+            labels = self.labels[dimension]
+            wanted = filters.get(dimension)
+            if not wanted:
+                selection.append(np.arange(len(labels)))
+                continue
+            unknown = [value for value in wanted if value not in labels]
+            if unknown:
+                raise ValueError(f"Unknown {dimension} value(s): {', '.join(unknown)}")
+            if dimension == 'is_fake':
+                selection.append(np.arange(len(labels)))
+                continue
+            selection.append(np.array([labels.index(value) for value in wanted], dtype=np.int64))
+        return selection
+
+    def query(self, filters=None, group_by=(), histograms=False):
+        """Counts, fake rate, metric means (and optionally histograms) per group
+
+        filters maps dimension names to lists of label values; group_by
+        lists the dimensions to break results down by.
+        """
+        filters = filters or {}
+        for dimension in list(filters) + list(group_by):
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension: {dimension}")
+
+        selection = self._selection(filters)
+        index = np.ix_(*selection)
+        counts = self.counts[index]
+        sums = self.sums[index]
+        hist = self.histograms[index] if histograms else None
+
+        # Collapse every dimension not grouped on; is_fake is always kept for fake rates
+        fake_axis = DIMENSIONS.index('is_fake')
+        keep = sorted(DIMENSIONS.index(d) for d in set(group_by) if d != 'is_fake')
+        drop = tuple(axis for axis in range(len(DIMENSIONS)) if axis not in keep and axis != fake_axis)
+        counts = counts.sum(axis=drop)
+        sums = sums.sum(axis=drop)
+        if hist is not None:
+            hist = hist.sum(axis=drop)
+
+        group_labels = [[self.labels[DIMENSIONS[axis]][i] for i in selection[axis]] for axis in keep]
+        fake_labels = sorted({int(value) for value in filters.get('is_fake') or ['0', '1']})
+        label_sets = [[label] for label in fake_labels] if 'is_fake' in group_by else [fake_labels]
+        groups = []
+        for position in np.ndindex(*counts.shape[:-1]):
+            for label_set in label_sets:
+                total = int(counts[position][label_set].sum())
+                if total == 0:
+                    continue
+                fake_count = int(counts[position][1]) if 1 in label_set else 0
+                cell_sums = sums[position][label_set].sum(axis=0)
+                group = {DIMENSIONS[axis]: group_labels[k][position[k]] for k, axis in enumerate(keep)}
+                if 'is_fake' in group_by:
+                    group['is_fake'] = str(label_set[0])
+                group.update(
+                    count=total,
+                    fake_count=fake_count,
+                    fake_rate=round(fake_count / total, 4),
+                    means={metric: round(float(cell_sums[m]) / total, 4) for m, metric in enumerate(METRICS)}
+                )
+                if hist is not None:
+                    cell_hist = hist[position][label_set].sum(axis=0)
+                    group['histograms'] = {
+                        metric: {'edges': edges, 'counts': cell_hist[m, :len(edges) + 1].tolist()}
+                        for m, (metric, edges) in enumerate((metric, METRIC_BINS[metric]) for metric in METRICS)
+                    }
+                groups.append(group)
+        return groups
+
+
+def build_rollup(input_path, output_path, chunksize=1_000_000):
+    """Build the cube for a dataset in one streaming pass and save it; returns the cube"""
+    available = set(dataset_columns(input_path))
+    columns = [col for col in SOURCE_COLUMNS if col in available]
+
+    builder = RollupBuilder()
+    started = time.perf_counter()
+    for chunk in iter_dataset_chunks(input_path, columns, chunksize):
+        builder.update(chunk)
+        print(f"Aggregated {builder.rows} rows", flush=True)
+
+    cube = builder.cube()
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    cube.save(output_path)
+    elapsed = time.perf_counter() - started
+    print(f"Rollup of {cube.rows} rows ({cube.counts.size} cells) saved to {output_path} in {elapsed:.1f}s")
+    return cube
+
+
+class RollupStore:
+    """The rollup cube for the app, reloaded when the file is rebuilt"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._key = None
+        self._cube = None
+
+    def get(self):
+        stat = os.stat(self.filepath)
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key != self._key:
+                self._cube = RollupCube.load(self.filepath)
+                self._key = key
+            return self._cube
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Build the dashboard analytics rollup for a dataset')
+    parser.add_argument('input', help='dataset (CSV, NDJSON, Parquet or columnar directory)')
+    parser.add_argument('output', nargs='?', default='data/rollup.npz', help='rollup file to write')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='rows aggregated per chunk')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    build_rollup(args.input, args.output, args.chunksize)
+
+
+if __name__ == "__main__":
+    main()
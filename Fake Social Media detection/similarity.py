@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate account index for finding bot farms
+
+Every account becomes a set of tokens: the character trigrams of its
+username plus quantized buckets of its follower, following, post and
+engagement counts, its account age (in weeks) and its profile flags.
+Farm accounts like user4821 / user4822 with near-identical activity share
+most of their tokens. A MinHash signature estimates the Jaccard
+similarity of two token sets, and LSH banding puts accounts with similar
+signatures in the same bucket. Only bucket members are ever compared, so
+building and querying the index never compares all pairs.
+
+Clusters are the connected components of "similar to the bucket's first
+member" links across all bands.
+
+    python similarity.py data/synthetic_social_media_data.csv data/similarity.npz --clusters clusters.csv
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from features import derive_features
+from usernames import encode_usernames, ngram_codes
+
+INDEX_FORMAT = 'similarity-v1'
+
+NUM_PERM = 32
+BANDS = 8
+SIMILARITY_THRESHOLD = 0.6
+
+# Bucket members compared per band when looking up an account
+MAX_BUCKET_CANDIDATES = 200
+# Rows whose signatures are computed at once (bounds the token x permutation work)
+SIGNATURE_BLOCK = 65536
+
+SOURCE_COLUMNS = ['username', 'account_age_days', 'followers', 'following', 'posts_count',
+                  'avg_likes', 'avg_comments', 'avg_shares', 'has_profile_pic', 'has_bio',
+                  'has_location', 'verified']
+
+
+def _log_bucket(values):
+    """Half-octave buckets: values within ~40% of each other usually share one"""
+    return np.floor(np.log2(1.0 + np.maximum(values, 0)) * 2).astype(np.int64)
+
+
+def _column(columns, name, n):
+    if name in columns:
+        return np.nan_to_num(np.asarray(columns[name], dtype=np.float64))
+    return np.zeros(n)
+
+
+def account_tokens(columns):
+    """Token matrix (one row per account) for a DataFrame or mapping of columns
+
+    Username trigrams are their base-257 codes (below 2**25); feature
+    tokens carry the field number in the upper bits, so the two kinds never
+    collide. Unused trigram slots repeat a feature token, which leaves
+    the set, and so the MinHash, unchanged.
+    """
+    n = len(columns) if hasattr(columns, 'columns') else len(next(iter(columns.values()), []))
+    # Only the engagement inputs are passed, so usernames are not encoded twice
+    derived = derive_features({name: _column(columns, name, n)
+                               for name in ('followers', 'avg_likes', 'avg_comments', 'avg_shares')})
+    buckets = [
+        _log_bucket(_column(columns, 'followers', n)),
+        _log_bucket(_column(columns, 'following', n)),
+        _log_bucket(_column(columns, 'posts_count', n)),
+        _log_bucket(_column(columns, 'avg_likes', n)),
+        _log_bucket(derived['engagement_rate'] * 1000),
+        (_column(columns, 'account_age_days', n) // 7).astype(np.int64),
+        (_column(columns, 'has_profile_pic', n) > 0) + 2 * (_column(columns, 'has_bio', n) > 0)
+        + 4 * (_column(columns, 'has_location', n) > 0) + 8 * (_column(columns, 'verified', n) > 0)
+    ]
+    feature_tokens = np.column_stack([
+        (np.uint64(field + 1) << np.uint64(32)) | (values.astype(np.uint64) & np.uint64(0xFFFFFFFF))
+        for field, values in enumerate(buckets)
+    ])
+
+    if 'username' not in columns:
+        return feature_tokens
+    usernames = np.asarray(columns['username'], dtype=object)
+    present = np.array([isinstance(name, str) for name in usernames], dtype=bool)
+    codes, lengths = encode_usernames(np.where(present, usernames, ''))
+    grams, valid = ngram_codes(codes, lengths)
+    valid &= present[:, np.newaxis]
+    grams = np.where(valid, grams.astype(np.uint64), feature_tokens[:, :1])
+    return np.concatenate([feature_tokens, grams], axis=1)
+
+
+class MinHasher:
+    """NUM_PERM multiply-shift hash functions, fixed by the seed"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=42):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.multipliers = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.offsets = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+
+    def signatures(self, tokens):
+        """MinHash signature (uint32, num_perm values) for every row of a token matrix"""
+        signatures = np.empty((len(tokens), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(tokens), SIGNATURE_BLOCK):
+            block = tokens[start:start + SIGNATURE_BLOCK]
+            for k in range(self.num_perm):
+                hashed = (block * self.multipliers[k] + self.offsets[k]) >> np.uint64(32)
+                signatures[start:start + len(block), k] = hashed.min(axis=1)
+        return signatures
+
+
+def band_keys(signatures, bands=BANDS):
+    """One 64-bit key per LSH band, shape (bands, rows)"""
+    rows_per_band = signatures.shape[1] // bands
+    grouped = signatures[:, :bands * rows_per_band].reshape(len(signatures), bands, rows_per_band)
+    keys = np.full((len(signatures), bands), 14695981039346656037, dtype=np.uint64)
+    for r in range(rows_per_band):
+        keys = (keys ^ grouped[:, :, r].astype(np.uint64)) * np.uint64(1099511628211)
+    return np.ascontiguousarray(keys.T)
+
+
+def similarity(signatures, row, others):
+    """Estimated Jaccard similarity between one signature and many"""
+    return (signatures[others] == row).mean(axis=1)
+
+
+def connected_components(n, a, b):
+    """Label every node with the smallest node id in its component"""
+    labels = np.arange(n)
+    if len(a) == 0:
+        return labels
+    while True:
+        linked = np.minimum(labels[a], labels[b])
+        updated = labels.copy()
+        np.minimum.at(updated, a, linked)
+        np.minimum.at(updated, b, linked)
+        # Pointer jumping: follow labels to their own labels
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+class SimilarityIndex:
+    """Signatures, sorted LSH band keys and cluster labels for a set of accounts"""
+
+    def __init__(self, signatures, keys, rows, labels, usernames, num_perm=NUM_PERM, bands=BANDS,
+                 threshold=SIMILARITY_THRESHOLD, seed=42):
+        self.signatures = signatures
+        # keys[b] is sorted; rows[b][i] is the account holding keys[b][i]
+        self.keys = keys
+        self.rows = rows
+        self.labels = labels
+        self.usernames = usernames
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        self.seed = seed
+        self.hasher = MinHasher(num_perm, seed)
+        self.label_sizes = np.bincount(labels, minlength=len(labels))
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def cluster_sizes(self):
+        """Size of each account's cluster"""
+        return self.label_sizes[self.labels]
+
+    def lookup(self, columns, limit=10):
+        """For every account: its similar indexed accounts, best first, as (rows, similarities)
+
+        Candidates are the members of the buckets an account falls into,
+        at most MAX_BUCKET_CANDIDATES per band, found with a binary search
+        per band; all candidates of the batch are scored at once.
+        """
+        signatures = self.hasher.signatures(account_tokens(columns))
+        keys = band_keys(signatures, self.bands)
+        queries, candidates = [], []
+        for band in range(self.bands):
+            start = np.searchsorted(self.keys[band], keys[band], side='left')
+            count = np.minimum(np.searchsorted(self.keys[band], keys[band], side='right') - start,
+                               MAX_BUCKET_CANDIDATES)
+            query = np.repeat(np.arange(len(signatures)), count)
+            offset = np.arange(len(query)) - np.repeat(np.cumsum(count) - count, count)
+            queries.append(query)
+            candidates.append(self.rows[band][np.repeat(start, count) + offset])
+
+        pairs = np.unique(np.concatenate(queries) * len(self) + np.concatenate(candidates))
+        query, candidate = pairs // len(self), pairs % len(self)
+        scores = (self.signatures[candidate] == signatures[query]).mean(axis=1)
+        keep = scores >= self.threshold
+        query, candidate, scores = query[keep], candidate[keep], scores[keep]
+
+        # Best first within each account, then cut at limit
+        order = np.lexsort((candidate, -scores, query))
+        query, candidate, scores = query[order], candidate[order], scores[order]
+        bounds = np.searchsorted(query, np.arange(len(signatures) + 1))
+        return [
+            (candidate[bounds[i]:min(bounds[i + 1], bounds[i] + limit)],
+             scores[bounds[i]:min(bounds[i + 1], bounds[i] + limit)])
+            for i in range(len(signatures))
+        ]
+
+    def match_cluster_sizes(self, columns):
+        """Cluster size of each account's most similar indexed account (0 when none is similar)"""
+        return np.array([
+            int(self.label_sizes[self.labels[rows[0]]]) if len(rows) else 0
+            for rows, _ in self.lookup(columns, limit=1)
+        ], dtype=np.int64)
+
+    def username(self, row):
+        return self.usernames[row]
+
+    def save(self, filepath):
+        encoded = [str(name).encode('utf-8') for name in self.usernames]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(name) for name in encoded])
+        meta = {'format': INDEX_FORMAT, 'num_perm': self.num_perm, 'bands': self.bands,
+                'threshold': self.threshold, 'seed': self.seed, 'rows': len(self)}
+        tmp_path = filepath + '.tmp.npz'
+        np.savez(tmp_path, signatures=self.signatures, keys=self.keys, rows=self.rows, labels=self.labels,
+                 username_bytes=np.frombuffer(b''.join(encoded), dtype=np.uint8), username_offsets=offsets,
+                 meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath):
+        with np.load(filepath, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != INDEX_FORMAT:
+                raise ValueError(f"{filepath} is not a {INDEX_FORMAT} file")
+            raw = data['username_bytes'].tobytes()
+            offsets = data['username_offsets']
+            usernames = [raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+            return cls(data['signatures'], data['keys'], data['rows'], data['labels'], usernames,
+                       meta['num_perm'], meta['bands'], meta['threshold'], meta['seed'])
+
+
+class SimilarityIndexBuilder:
+    """Accumulate signatures chunk by chunk, then band, sort and cluster once"""
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, threshold=SIMILARITY_THRESHOLD, seed=42):
+        if num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands = bands
+        self.threshold = threshold
+        self.seed = seed
+        self.signatures = []
+        self.usernames = []
+        self.rows = 0
+
+    def update(self, chunk):
+        self.signatures.append(self.hasher.signatures(account_tokens(chunk)))
+        if 'username' in chunk.columns:
+            self.usernames.extend(chunk['username'].fillna('').astype(str))
+        else:
+            self.usernames.extend([''] * len(chunk))
+        self.rows += len(chunk)
+
+    def finish(self):
+        signatures = (np.concatenate(self.signatures) if self.signatures
+                      else np.zeros((0, self.hasher.num_perm), dtype=np.uint32))
+        keys = band_keys(signatures, self.bands)
+        order = np.argsort(keys, axis=1, kind='stable')
+        sorted_keys = np.take_along_axis(keys, order, axis=1)
+
+        # Link each bucket member to the bucket's first member when they are similar enough
+        linked_a, linked_b = [], []
+        for band in range(self.bands):
+            run_start = np.ones(len(order[band]), dtype=bool)
+            run_start[1:] = sorted_keys[band, 1:] != sorted_keys[band, :-1]
+            first = order[band][np.maximum.accumulate(np.where(run_start, np.arange(len(run_start)), 0))]
+            members = order[band]
+            pairs = first != members
+            a, b = first[pairs], members[pairs]
+            close = (signatures[a] == signatures[b]).mean(axis=1) >= self.threshold
+            linked_a.append(a[close])
+            linked_b.append(b[close])
+        labels = connected_components(len(signatures), np.concatenate(linked_a), np.concatenate(linked_b))
+
+        return SimilarityIndex(signatures, sorted_keys, order.astype(np.int64), labels.astype(np.int64),
+                               self.usernames, self.hasher.num_perm, self.bands, self.threshold, self.seed)
+
+
+def build_index(input_path, output_path, chunksize=1_000_000, clusters_path=None, min_cluster_size=2,
+                threshold=SIMILARITY_THRESHOLD):
+    """Index a dataset in one streaming pass, cluster it and save; returns the index"""
+    # Imported here so the app can load and query an index without pandas
+    import pandas as pd
+    from dataset_io import dataset_columns, iter_dataset_chunks
+
+    available = set(dataset_columns(input_path))
+    columns = [col for col in SOURCE_COLUMNS if col in available]
+
+    builder = SimilarityIndexBuilder(threshold=threshold)
+    started = time.perf_counter()
+    for chunk in iter_dataset_chunks(input_path, columns, chunksize):
+        builder.update(chunk)
+        print(f"Hashed {builder.rows} accounts", flush=True)
+    index = builder.finish()
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    index.save(output_path)
+
+    sizes = index.cluster_sizes
+    clustered = sizes >= min_cluster_size
+    n_clusters = len(np.unique(index.labels[clustered]))
+    elapsed = time.perf_counter() - started
+    print(f"Indexed {len(index)} accounts in {elapsed:.1f}s: {n_clusters} clusters of {min_cluster_size}+ "
+          f"covering {int(clustered.sum())} accounts; largest {int(sizes.max()) if len(sizes) else 0}")
+    print(f"Similarity index saved to {output_path}")
+
+    if clusters_path:
+        rows = np.flatnonzero(clustered)
+        rows = rows[np.lexsort((rows, -sizes[rows]))]
+        pd.DataFrame({
+            'username': [index.usernames[row] for row in rows],
+            'row': rows,
+            'cluster': index.labels[rows],
+            'cluster_size': sizes[rows]
+        }).to_csv(clusters_path, index=False)
+        print(f"Cluster assignments saved to {clusters_path}")
+    return index
+
+
+class SimilarityIndexStore:
+    """The similarity index for the app, reloaded when the file is rebuilt"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._key = None
+        self._index = None
+
+    def get(self):
+        stat = os.stat(self.filepath)
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key != self._key:
+                self._index = SimilarityIndex.load(self.filepath)
+                self._key = key
+            return self._index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Build the near-duplicate account index and cluster bot farms')
+    parser.add_argument('input', help='dataset (CSV, NDJSON, Parquet or columnar directory)')
+    parser.add_argument('output', nargs='?', default='data/similarity.npz', help='index file to write')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='accounts hashed per chunk')
+    parser.add_argument('--threshold', type=float, default=SIMILARITY_THRESHOLD,
+                        help='estimated Jaccard similarity that links two accounts')
+    parser.add_argument('--clusters', help='also write accounts in clusters to this CSV')
+    parser.add_argument('--min-cluster-size', type=int, default=2, help='smallest cluster written to --clusters')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    build_index(args.input, args.output, args.chunksize, args.clusters, args.min_cluster_size, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Cached, incrementally maintained dataset statistics for the dashboard
+"""
+
+import hashlib
+import io
+import os
+import threading
+
+import pandas as pd
+
+from dataset_io import META_FILE, is_columnar, open_columnar, read_meta
+
+# Columns the dashboard aggregates; everything else is skipped while parsing
+STAT_COLUMNS = ['is_fake', 'followers', 'following', 'posts_count', 'engagement_rate']
+
+# Bytes before the last consumed offset (per column for columnar data) used to check
+# a dataset was only appended to
+FINGERPRINT_BYTES = 4096
+
+
+class _BoundedReader(io.RawIOBase):
+    """Read a byte range of a file, so partially written trailing rows are skipped"""
+
+    def __init__(self, f, end):
+        self._f = f
+        self._end = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        remaining = self._end - self._f.tell()
+        if remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:remaining]
+        return self._f.readinto(view)
+
+
+class DatasetStatsCache:
+    """Dashboard statistics for a dataset, cached on the file's identity
+
+    The cache key is the file's path, size and mtime. When the key changes
+    and the file has only grown (the bytes already read are unchanged), only
+    the appended rows are parsed and folded into the running aggregates;
+    otherwise the statistics are rebuilt from scratch in chunks. Either way
+    the cached totals only change once the whole read has succeeded.
+
+    Columnar datasets are keyed on their meta.json and appended rows are
+    read straight from the memory-mapped columns, after the same kind of
+    check on the tail of the rows already folded in.
+    """
+
+    def __init__(self, filepath, chunksize=500_000):
+        self.filepath = filepath
+        self.chunksize = chunksize
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._key = None
+        self._stats = None
+        self._offset = 0
+        self._header = None
+        self._fingerprint = None
+        self._rows = 0
+        self._sums = dict.fromkeys(STAT_COLUMNS, 0.0)
+        self._counts = dict.fromkeys(STAT_COLUMNS, 0)
+
+    def _file_key(self):
+        path = self.filepath
+        if is_columnar(path):
+            path = os.path.join(path, META_FILE)
+        st = os.stat(path)
+        return (os.path.abspath(self.filepath), st.st_size, st.st_mtime_ns)
+
+    def _read_fingerprint(self, f, offset):
+        start = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(start)
+        return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+    @staticmethod
+    def _last_line_end(f, size):
+        """Offset just past the last complete line in the file"""
+        position = size
+        while position > 0:
+            step = min(65536, position)
+            f.seek(position - step)
+            block = f.read(step)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                return position - step + newline + 1
+            position -= step
+        return 0
+
+    def _is_append(self, f, size):
+        if not isinstance(self._header, bytes) or size < self._offset:
+            return False
+        f.seek(0)
+        if f.readline() != self._header:
+            return False
+        return self._read_fingerprint(f, self._offset) == self._fingerprint
+
+    def _totals(self, appending):
+        """Working copies of the running aggregates, or empty ones for a rebuild"""
+        if appending:
+            return {'rows': self._rows, 'sums': dict(self._sums), 'counts': dict(self._counts)}
+        return {'rows': 0, 'sums': dict.fromkeys(STAT_COLUMNS, 0.0), 'counts': dict.fromkeys(STAT_COLUMNS, 0)}
+
+    @staticmethod
+    def _fold(totals, frame):
+        totals['rows'] += len(frame)
+        for col in STAT_COLUMNS:
+            values = frame[col]
+            totals['sums'][col] += float(values.sum())
+            totals['counts'][col] += int(values.count())
+
+    def _commit(self, totals, header, offset, fingerprint):
+        # Only called once everything has been read, so a failed read never half-updates the totals
+        self._rows, self._sums, self._counts = totals['rows'], totals['sums'], totals['counts']
+        self._header, self._offset, self._fingerprint = header, offset, fingerprint
+
+    @staticmethod
+    def _columnar_fingerprint(columns, rows):
+        """Hash of the last FINGERPRINT_BYTES of every column before row `rows`"""
+        digest = hashlib.sha1()
+        for col in STAT_COLUMNS:
+            values = columns[col]
+            start = max(0, rows - FINGERPRINT_BYTES // values.dtype.itemsize)
+            digest.update(values[start:rows].tobytes())
+        return digest.hexdigest()
+
+    def _update_columnar(self):
+        rows = read_meta(self.filepath)['rows']
+        columns = open_columnar(self.filepath, STAT_COLUMNS)
+        appending = self._header == META_FILE and rows >= self._rows \
+            and self._columnar_fingerprint(columns, self._rows) == self._fingerprint
+        totals = self._totals(appending)
+
+        for start in range(totals['rows'], rows, self.chunksize):
+            stop = min(start + self.chunksize, rows)
+            self._fold(totals, pd.DataFrame({col: columns[col][start:stop] for col in STAT_COLUMNS}))
+        self._commit(totals, META_FILE, 0, self._columnar_fingerprint(columns, totals['rows']))
+
+    def _update(self):
+        if is_columnar(self.filepath):
+            return self._update_columnar()
+
+        with open(self.filepath, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            appending = self._is_append(f, size)
+            totals = self._totals(appending)
+            if appending:
+                header, offset = self._header, self._offset
+            else:
+                f.seek(0)
+                header = f.readline()
+                offset = f.tell()
+
+            end = self._last_line_end(f, size)
+            if end > offset:
+                names = header.decode('utf-8').strip().split(',')
+                f.seek(offset)
+                reader = pd.read_csv(
+                    io.BufferedReader(_BoundedReader(f, end)),
+                    header=None, names=names, usecols=STAT_COLUMNS, chunksize=self.chunksize
+                )
+                for chunk in reader:
+                    self._fold(totals, chunk)
+                offset = end
+
+            self._commit(totals, header, offset, self._read_fingerprint(f, offset))
+
+    def _mean(self, col):
+        return self._sums[col] / self._counts[col] if self._counts[col] else 0.0
+
+    def _build_stats(self):
+        total_accounts = self._rows
+        fake_accounts = int(self._sums['is_fake'])
+        fake_percentage = (fake_accounts / total_accounts) * 100 if total_accounts else 0.0
+
+        return {
+            'total_accounts': total_accounts,
+            'fake_accounts': fake_accounts,
+            'real_accounts': total_accounts - fake_accounts,
+            'fake_percentage': round(fake_percentage, 2),
+            'avg_followers': round(self._mean('followers'), 2),
+            'avg_following': round(self._mean('following'), 2),
+            'avg_posts': round(self._mean('posts_count'), 2),
+            'avg_engagement': round(self._mean('engagement_rate'), 4)
+        }
+
+    def get(self):
+        """Return current statistics, re-reading only what changed on disk"""
+        key = self._file_key()
+        if key == self._key:
+            return self._stats
+
+        with self._lock:
+            key = self._file_key()
+            if key != self._key:
+                self._update()
+                self._stats = self._build_stats()
+                self._key = key
+            return self._stats
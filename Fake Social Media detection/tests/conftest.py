@@ -0,0 +1,103 @@
+"""
+Shared fixtures: a small synthetic dataset, a model trained on it once per
+session, and a factory for app instances configured around that model
+"""
+
+import os
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+REFERENCE_DATE = '2025-01-01'
+DATASET_ROWS = 4000
+
+
+@pytest.fixture(scope='session', autouse=True)
+def workdir(tmp_path_factory):
+    """Run every test from a scratch directory, so default relative paths never touch the repo"""
+    path = tmp_path_factory.mktemp('work')
+    previous = os.getcwd()
+    os.chdir(path)
+    yield path
+    os.chdir(previous)
+
+
+@pytest.fixture(scope='session')
+def dataset_csv(workdir):
+    from data_generator import write_synthetic_data
+
+    path = str(workdir / 'data' / 'accounts.csv')
+    write_synthetic_data(path, n_samples=DATASET_ROWS, seed=7, reference_date=REFERENCE_DATE)
+    return path
+
+
+@pytest.fixture(scope='session')
+def trained(workdir, dataset_csv):
+    """The detector trained on dataset_csv, with its cascade, saved artifact and compiled engine"""
+    from model_trainer import FakeAccountDetector
+
+    detector = FakeAccountDetector()
+    detector.load_data(dataset_csv)
+    detector.preprocess_data()
+    detector.train_model()
+    detector.train_cascade()
+    model_path = str(workdir / 'models' / 'model.pkl')
+    engine_path = str(workdir / 'models' / 'model.npz')
+    detector.save_model(model_path)
+    detector.compile_engine(engine_path, model_path)
+    detector.model_path = model_path
+    detector.engine_path = engine_path
+    return detector
+
+
+@pytest.fixture(scope='session')
+def model_path(trained):
+    return trained.model_path
+
+
+@pytest.fixture(scope='session')
+def engine_path(trained):
+    return trained.engine_path
+
+
+@pytest.fixture(scope='session')
+def accounts():
+    """Request payloads for accounts the model has not seen, usernames included"""
+    from data_generator import generate_chunk
+
+    df = generate_chunk(200, seed=11, reference_date=REFERENCE_DATE)
+    return df.drop(columns=['is_fake', 'created_date']).to_dict(orient='records')
+
+
+@pytest.fixture
+def make_app(model_path, workdir, monkeypatch):
+    """Build the app around the test model; keyword arguments override its config
+
+    Everything optional is off unless a test turns it on, and the lazily
+    created module state is reset so tests never share it.
+    """
+    monkeypatch.setenv('MODEL_PATH', model_path)
+    monkeypatch.setenv('DRIFT_MONITORING', '0')
+    import app as app_module
+
+    def factory(**config):
+        defaults = {
+            'MODEL_PATH': model_path,
+            'PREDICTION_CACHE_SIZE': 0,
+            'PREDICTION_LOG_PATH': '',
+            'DRIFT_MONITORING': False,
+            'SIMILARITY_INDEX_PATH': '',
+            'MICRO_BATCH_WINDOW_MS': 0,
+            'PROFILE_DIR': str(workdir / 'profiles'),
+            'ADMIN_TOKEN': 'test-token'
+        }
+        for name in ('micro_batcher', 'dashboard_stats', 'rollup_store'):
+            monkeypatch.setattr(app_module, name, None)
+        flask_app = app_module.create_app(dict(defaults, **config))
+        return app_module, flask_app
+
+    return factory
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_factory_loads_and_warms_the_model(make_app, model_path):
+    app_module, flask_app = make_app(MAX_BATCH_SIZE=7)
+    assert app_module.model_bundle is not None
+    assert app_module.model_bundle.path == model_path
+    assert flask_app.config['MAX_BATCH_SIZE'] == 7
+    assert {'imports', 'flask', 'model_load', 'warmup'} <= set(flask_app.config['STARTUP_TIMINGS'])
+
+
+def test_config_overrides_the_environment(make_app, monkeypatch):
+    monkeypatch.setenv('MAX_BATCH_SIZE', '3')
+    _, flask_app = make_app()
+    assert flask_app.config['MAX_BATCH_SIZE'] == 3
+    _, flask_app = make_app(MAX_BATCH_SIZE=5)
+    assert flask_app.config['MAX_BATCH_SIZE'] == 5
+
+
+def test_import_defers_heavy_modules_and_survives_a_missing_model(tmp_path):
+    script = (
+        "import sys, app\n"
+        "print(app.model_bundle is None, 'pandas' in sys.modules, 'xgboost' in sys.modules)\n"
+        "client = app.app.test_client()\n"
+        "print(client.post('/api/predict', json={'followers': 1}).status_code)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR, MODEL_PATH=str(tmp_path / 'missing.pkl'),
+               DRIFT_MONITORING='0', PREDICTION_CACHE_SIZE='0')
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', script], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['True', 'False', 'False', '500']
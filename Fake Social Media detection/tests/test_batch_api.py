@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def client(make_app):
+    _, flask_app = make_app(MAX_BATCH_SIZE=50)
+    return flask_app.test_client()
+
+
+def test_batch_matches_single_predictions(client, accounts):
+    records = accounts[:20]
+    response = client.post('/api/predict/batch', json=records)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == 20
+    assert body['errors'] == 0
+
+    for record, result in zip(records, body['results']):
+        single = client.post('/api/predict', json=record).get_json()
+        assert result['prediction'] == single['prediction']
+        assert result['probability'] == pytest.approx(single['probability'], abs=1e-9)
+
+
+def test_invalid_rows_get_errors_in_place(client, accounts):
+    records = [accounts[0], {'followers': 'many'}, 'not an account', {'followers': 10, 'username': 5}, accounts[1]]
+    body = client.post('/api/predict/batch', json={'accounts': records}).get_json()
+    results = body['results']
+
+    assert body['count'] == 5
+    assert body['errors'] == 3
+    assert 'probability' in results[0] and 'probability' in results[4]
+    assert results[1]['error'].startswith('Invalid feature value')
+    assert results[2]['error'] == 'Account must be a JSON object'
+    assert results[3]['error'] == 'Invalid username: must be a string'
+
+
+def test_ndjson_body(client, accounts):
+    body = '\n'.join(json.dumps(record) for record in accounts[:3]) + '\n\n'
+    response = client.post('/api/predict/batch', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 3
+
+    response = client.post('/api/predict/batch', data='{"followers": 1}\n{oops', content_type='application/x-ndjson')
+    assert response.status_code == 400
+    assert 'line 2' in response.get_json()['error']
+
+
+def test_rejected_batches(client, accounts):
+    assert client.post('/api/predict/batch', json=[]).status_code == 400
+    assert client.post('/api/predict/batch', json={'followers': 1}).status_code == 400
+    assert client.post('/api/predict/batch', json=accounts[:51]).status_code == 413
+
+
+def test_single_prediction_rejects_invalid_input(client):
+    response = client.post('/api/predict', json={'followers': 'x'})
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid feature value')
+    response = client.post('/api/predict', data='{"followers": Infinity}', content_type='application/json')
+    assert response.status_code == 400
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from batching import MicroBatcher
+
+
+def _submit_concurrently(batcher, records):
+    results = [None] * len(records)
+
+    def call(i):
+        results[i] = batcher.submit(records[i], timeout=5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(records))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_each_caller_gets_its_own_result():
+    batcher = MicroBatcher(lambda records: [record * 2 for record in records], window_ms=20, max_batch_size=8)
+    results = _submit_concurrently(batcher, list(range(30)))
+    assert results == [i * 2 for i in range(30)]
+
+    stats = batcher.stats()
+    assert stats['requests'] == 30
+    assert stats['batches'] < 30
+    assert max(int(size) for size in stats['batch_sizes']) <= 8
+    assert sum(stats['queue_delay_ms']['histogram'].values()) == 30
+
+
+def test_scoring_errors_reach_every_caller_in_the_batch():
+    def fail(records):
+        raise RuntimeError('model exploded')
+
+    batcher = MicroBatcher(fail, window_ms=1)
+    with pytest.raises(RuntimeError, match='model exploded'):
+        batcher.submit({'followers': 1}, timeout=5)
+
+    # The worker survives a failed batch
+    batcher.score_fn = lambda records: records
+    assert batcher.submit('ok', timeout=5) == 'ok'
+
+
+def test_submit_times_out():
+    release = threading.Event()
+    batcher = MicroBatcher(lambda records: release.wait(5) and records, window_ms=1)
+    with pytest.raises(TimeoutError):
+        batcher.submit('slow', timeout=0.05)
+    release.set()
+
+
+def test_batched_predictions_match_direct_scoring(make_app, accounts):
+    _, direct_app = make_app()
+    direct = [direct_app.test_client().post('/api/predict', json=record).get_json() for record in accounts[:10]]
+
+    _, batched_app = make_app(MICRO_BATCH_WINDOW_MS=2)
+    client = batched_app.test_client()
+    batched = [client.post('/api/predict', json=record).get_json() for record in accounts[:10]]
+
+    assert [r['prediction'] for r in batched] == [r['prediction'] for r in direct]
+    assert [r['probability'] for r in batched] == pytest.approx([r['probability'] for r in direct], abs=1e-9)
+    # Invalid input is rejected per record inside the batch
+    assert client.post('/api/predict', json={'followers': 'x'}).status_code == 400
+
+    stats = client.get('/api/batching/stats').get_json()
+    assert stats['enabled'] is True
+    assert stats['requests'] == 11
+    assert direct_app.test_client().get('/api/batching/stats').get_json() == {'enabled': False}
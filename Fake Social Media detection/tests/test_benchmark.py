@@ -0,0 +1,51 @@
+import pytest
+
+import benchmark
+from benchmark import SERVING_ENV, _comparable, _percentiles, _result, compare
+
+
+def test_compare_flags_regressions_in_the_metric_direction():
+    baseline = {
+        'throughput': _result(100.0, 'rows/s', 'higher'),
+        'latency': _result(10.0, 'ms', 'lower'),
+        'steady': _result(10.0, 'ms', 'lower'),
+        'zero': _result(0.0, 'ms', 'lower')
+    }
+    current = {
+        'throughput': _result(80.0, 'rows/s', 'higher'),
+        'latency': _result(12.0, 'ms', 'lower'),
+        'steady': _result(10.4, 'ms', 'lower'),
+        'zero': _result(5.0, 'ms', 'lower'),
+        'new': _result(1.0, 'ms', 'lower')
+    }
+    regressions = compare(current, baseline, threshold_pct=10)
+    assert [name for name, *_ in regressions] == ['latency', 'throughput']
+    assert regressions[0][3] == pytest.approx(20.0)
+    assert regressions[1][3] == pytest.approx(-20.0)
+
+    # Improvements are never regressions, however large
+    assert compare({'latency': _result(1.0, 'ms', 'lower')}, baseline, 10) == []
+
+
+def test_percentiles_are_reported_in_milliseconds():
+    results = _percentiles([0.001] * 98 + [0.1, 0.2], 'api')
+    assert results['api.p50_ms']['value'] == pytest.approx(1.0)
+    assert results['api.p99_ms']['value'] > 90
+    assert all(result['better'] == 'lower' for result in results.values())
+
+
+def test_serving_environment_pins_the_hot_path(make_app, monkeypatch):
+    # The test app already runs with everything in SERVING_ENV switched off
+    app_module, flask_app = make_app()
+    monkeypatch.setattr(app_module, 'app', flask_app)
+
+    serving = benchmark.serving_environment(app_module)
+    assert serving['model_version'] == app_module.model_bundle.version
+    assert serving['feature_count'] == len(app_module.model_bundle.feature_columns)
+    assert set(serving['config']) == set(SERVING_ENV)
+    assert 'model_path' not in _comparable(serving)
+    assert _comparable(serving)['model_version'] == serving['model_version']
+
+    results = benchmark.bench_inference(app_module, requests=20, concurrency_levels=[2])
+    assert set(results) >= {'predict_account.p50_ms', 'api_predict.requests_per_sec@c2', 'api_predict@c2.p99_ms'}
+    assert results['api_predict.requests_per_sec@c2']['value'] > 0
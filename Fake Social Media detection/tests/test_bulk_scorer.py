@@ -0,0 +1,99 @@
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import bulk_scorer
+from bulk_scorer import bulk_score
+from data_generator import generate_chunk
+from predictor import frame_to_matrix, load_bundle, score_matrix
+
+REFERENCE_DATE = '2025-01-01'
+
+
+@pytest.fixture(scope='module')
+def input_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp('bulk') / 'accounts.csv'
+    generate_chunk(1000, seed=21, reference_date=REFERENCE_DATE).drop(columns=['is_fake']).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def full_run(input_csv, model_path, tmp_path_factory):
+    output = str(tmp_path_factory.mktemp('bulk-full') / 'scores.csv')
+    assert bulk_score(input_csv, output, model_path, chunksize=300) == 1000
+    with open(output, 'rb') as f:
+        return f.read()
+
+
+def test_scores_match_the_model(input_csv, model_path, full_run):
+    scores = pd.read_csv(input_csv)
+    bundle = load_bundle(model_path)
+    expected = score_matrix(bundle.model, bundle.scaler,
+                            frame_to_matrix(scores, bundle.feature_columns, bundle.username_analyzer))
+
+    output = pd.read_csv(io.BytesIO(full_run))
+    assert output['row'].tolist() == list(range(1000))
+    assert output['username'].astype(str).tolist() == scores['username'].astype(str).tolist()
+    np.testing.assert_allclose(output['probability'], expected, atol=1e-6)
+    assert (output['prediction'] == (output['probability'] >= 0.5)).all()
+
+
+def test_parallel_workers_write_the_same_output(input_csv, model_path, full_run, tmp_path):
+    output = str(tmp_path / 'scores.csv')
+    bulk_score(input_csv, output, model_path, chunksize=300, workers=2)
+    with open(output, 'rb') as f:
+        assert f.read() == full_run
+
+
+def test_interrupted_run_resumes_to_identical_output(input_csv, model_path, full_run, tmp_path, monkeypatch):
+    output = str(tmp_path / 'scores.csv')
+    score_chunk = bulk_scorer.score_chunk
+    calls = []
+
+    def crash_on_third_chunk(job):
+        calls.append(job[0])
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return score_chunk(job)
+
+    monkeypatch.setattr(bulk_scorer, 'score_chunk', crash_on_third_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        bulk_score(input_csv, output, model_path, chunksize=300)
+    with open(output + '.checkpoint') as f:
+        state = json.load(f)
+    assert state['rows_done'] == 600
+    # Half a chunk written after the checkpoint is dropped on resume
+    with open(output, 'ab') as f:
+        f.write(b'600,garbage')
+
+    monkeypatch.setattr(bulk_scorer, 'score_chunk', lambda job: calls.append(job[0]) or score_chunk(job))
+    calls.clear()
+    assert bulk_score(input_csv, output, model_path, chunksize=300, resume=True) == 1000
+    assert calls == [600, 900]
+    with open(output, 'rb') as f:
+        assert f.read() == full_run
+
+
+def test_resume_refuses_a_different_model_or_chunk_size(input_csv, model_path, engine_path, tmp_path):
+    output = str(tmp_path / 'scores.csv')
+    bulk_score(input_csv, output, model_path, chunksize=300)
+
+    with pytest.raises(ValueError, match='different model or cascade'):
+        bulk_score(input_csv, output, model_path, chunksize=300, resume=True, cascade=True)
+    with pytest.raises(ValueError, match='different model or cascade'):
+        bulk_score(input_csv, output, engine_path, chunksize=300, resume=True)
+    with pytest.raises(ValueError, match='different input or chunk size'):
+        bulk_score(input_csv, output, model_path, chunksize=200, resume=True)
+
+
+def test_missing_output_starts_over(input_csv, model_path, full_run, tmp_path):
+    output = str(tmp_path / 'scores.csv')
+    bulk_score(input_csv, output, model_path, chunksize=300)
+    os.remove(output)
+    assert bulk_score(input_csv, output, model_path, chunksize=300, resume=True) == 1000
+    with open(output, 'rb') as f:
+        assert f.read() == full_run
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from cascade import CascadeCalibrator, cascade_proba, escalation_mask, first_stage_proba
+
+
+def _outcomes(n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n) < 0.3).astype(int)
+    first = np.clip(rng.normal(0.25 + 0.5 * y, 0.2), 0, 1 - 1e-9)
+    full = np.clip(rng.normal(0.1 + 0.8 * y, 0.15), 0, 1)
+    return first, full, y
+
+
+def _served_accuracy(cascade, first, full, y):
+    """Accuracy of the labels serving would return for these thresholds"""
+    escalated = escalation_mask(cascade, first)
+    probabilities = np.where(escalated, full, first)
+    return float(((probabilities >= 0.5) == (y == 1)).mean()), float(escalated.mean())
+
+
+@pytest.mark.parametrize('max_accuracy_loss', [0.0, 0.01, 0.05])
+def test_calibration_reports_what_serving_does(max_accuracy_loss):
+    first, full, y = _outcomes()
+    calibrator = CascadeCalibrator(bins=100)
+    calibrator.update(first[:2000], full[:2000], y[:2000])
+    calibrator.update(first[2000:], full[2000:], y[2000:])
+    cascade = calibrator.calibrate(max_accuracy_loss)
+
+    assert cascade['low'] <= 0.5 <= cascade['high']
+    accuracy, escalation_rate = _served_accuracy(cascade, first, full, y)
+    assert accuracy == pytest.approx(cascade['cascade_accuracy'])
+    assert escalation_rate == pytest.approx(cascade['escalation_rate'])
+    assert cascade['full_accuracy'] - accuracy <= max_accuracy_loss + 1e-12
+
+
+def test_looser_budgets_escalate_less():
+    first, full, y = _outcomes()
+    calibrator = CascadeCalibrator()
+    calibrator.update(first, full, y)
+    rates = [calibrator.calibrate(loss)['escalation_rate'] for loss in (0.0, 0.01, 0.05, 1.0)]
+    assert rates == sorted(rates, reverse=True)
+    assert rates[-1] == 0.0
+
+
+def test_a_perfect_first_stage_escalates_nothing():
+    y = np.array([0, 0, 1, 1, 0, 1])
+    first = np.array([0.01, 0.2, 0.9, 0.7, 0.3, 0.99])
+    calibrator = CascadeCalibrator()
+    calibrator.update(first, y.astype(float), y)
+    cascade = calibrator.calibrate(0.0)
+    assert cascade['escalation_rate'] == 0.0
+    assert cascade['cascade_accuracy'] == 1.0
+
+
+def test_calibrating_without_rows_fails():
+    with pytest.raises(ValueError, match='No held-out rows'):
+        CascadeCalibrator().calibrate()
+
+
+def test_trained_cascade_stays_within_its_budget(trained):
+    cascade = trained.cascade
+    X = trained.X_test_scaled
+    y = np.asarray(trained.y_test)
+    full = trained.model.predict_proba(X)[:, 1]
+    probabilities, escalated = cascade_proba(trained.model, cascade, X)
+
+    np.testing.assert_allclose(probabilities[escalated], full[escalated])
+    np.testing.assert_allclose(probabilities[~escalated], first_stage_proba(cascade, X)[~escalated])
+    accuracy = ((probabilities >= 0.5) == (y == 1)).mean()
+    assert accuracy >= ((full >= 0.5) == (y == 1)).mean() - cascade['max_accuracy_loss'] - 1e-12
+    assert escalated.mean() == pytest.approx(cascade['escalation_rate'])
+
+
+def test_app_serves_cascade_scores(make_app, accounts):
+    _, full_app = make_app()
+    full = full_app.test_client().post('/api/predict/batch', json=accounts).get_json()['results']
+    _, cascade_app = make_app(PREDICTION_CASCADE=True)
+    client = cascade_app.test_client()
+    cascaded = client.post('/api/predict/batch', json=accounts).get_json()['results']
+
+    agreement = np.mean([a['prediction'] == b['prediction'] for a, b in zip(full, cascaded)])
+    assert agreement >= 0.97
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert 'cascade_rows_total{stage="first"' in metrics
@@ -0,0 +1,53 @@
+import pandas as pd
+import pandas.testing as pdt
+
+from data_generator import generate_chunk, generate_synthetic_data, iter_synthetic_chunks, write_synthetic_data
+from features import add_derived_features
+
+REFERENCE_DATE = '2025-01-01'
+
+
+def test_output_is_reproducible_and_independent_of_workers():
+    serial = pd.concat(iter_synthetic_chunks(2500, chunk_size=1000, seed=3, reference_date=REFERENCE_DATE),
+                       ignore_index=True)
+    parallel = pd.concat(iter_synthetic_chunks(2500, chunk_size=1000, seed=3, reference_date=REFERENCE_DATE, workers=2),
+                         ignore_index=True)
+    pdt.assert_frame_equal(serial, parallel)
+    pdt.assert_frame_equal(serial, generate_synthetic_data(2500, seed=3, chunk_size=1000, reference_date=REFERENCE_DATE))
+    assert [len(chunk) for chunk in iter_synthetic_chunks(2500, 1000, 3, REFERENCE_DATE)] == [1000, 1000, 500]
+
+
+def test_chunks_draw_from_independent_streams():
+    first, second = iter_synthetic_chunks(2000, chunk_size=1000, seed=3, reference_date=REFERENCE_DATE)
+    assert not first['username'].equals(second['username'])
+    other_seed = next(iter_synthetic_chunks(1000, chunk_size=1000, seed=4, reference_date=REFERENCE_DATE))
+    assert not first['username'].equals(other_seed['username'])
+
+
+def test_chunk_columns_and_invariants():
+    df = generate_chunk(5000, seed=1, reference_date=REFERENCE_DATE)
+
+    assert df['is_fake'].isin([0, 1]).all()
+    assert 0.25 < df['is_fake'].mean() < 0.35
+    assert (df['account_age_days'] >= 1).all()
+    assert (df[['followers', 'following', 'posts_count', 'avg_likes', 'avg_comments', 'avg_shares']] >= 0).all().all()
+    assert (df.loc[df['is_fake'] == 1, 'verified'] == 0).all()
+    assert df['username'].str.len().gt(0).all()
+
+    created = pd.to_datetime(df['created_date'])
+    assert ((pd.Timestamp(REFERENCE_DATE) - created).dt.days == df['account_age_days']).all()
+
+    # Derived columns come from the same pipeline the predictor uses
+    base = df.drop(columns=['created_date'])
+    pdt.assert_frame_equal(add_derived_features(base.copy()), base)
+
+
+def test_write_synthetic_data_streams_to_csv(tmp_path):
+    path = tmp_path / 'nested' / 'accounts.csv'
+    rows, fake_rows = write_synthetic_data(str(path), n_samples=1500, chunk_size=600, seed=5,
+                                           reference_date=REFERENCE_DATE)
+    df = pd.read_csv(path)
+    assert rows == len(df) == 1500
+    assert fake_rows == int(df['is_fake'].sum())
+    expected = generate_synthetic_data(1500, seed=5, chunk_size=600, reference_date=REFERENCE_DATE)
+    assert df['username'].astype(str).tolist() == expected['username'].tolist()
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from data_generator import generate_chunk
+from dataset_io import (ColumnarWriter, convert_csv, dataset_columns, iter_dataset_chunks, iter_dataset_positions,
+                        open_columnar, read_dataset, read_meta)
+
+REFERENCE_DATE = '2025-01-01'
+
+
+@pytest.fixture
+def frame():
+    return generate_chunk(500, seed=9, reference_date=REFERENCE_DATE)
+
+
+def _columnar(tmp_path, frame, name='accounts.cols'):
+    path = str(tmp_path / name)
+    writer = ColumnarWriter(path)
+    writer.append(frame.iloc[:300])
+    writer.append(frame.iloc[300:])
+    return path
+
+
+def test_columnar_roundtrip(tmp_path, frame):
+    path = _columnar(tmp_path, frame)
+    assert read_meta(path)['rows'] == 500
+    assert dataset_columns(path) == list(frame.columns)
+
+    df = read_dataset(path)
+    assert df['username'].tolist() == frame['username'].tolist()
+    assert df['followers'].dtype == np.uint32
+    np.testing.assert_array_equal(df['followers'], frame['followers'])
+    np.testing.assert_allclose(df['avg_likes'], frame['avg_likes'], rtol=1e-6)
+    assert (df['created_date'].astype(str) == frame['created_date']).all()
+
+    subset = open_columnar(path, ['is_fake', 'username'])
+    assert set(subset) == {'is_fake', 'username'}
+    assert subset['username'][499] == frame['username'].iloc[499]
+    with pytest.raises(KeyError):
+        open_columnar(path, ['missing'])
+
+
+def test_append_mode_and_mismatched_chunks(tmp_path, frame):
+    path = _columnar(tmp_path, frame)
+    ColumnarWriter(path, append=True).append(frame.head(10))
+    assert read_meta(path)['rows'] == 510
+    assert read_dataset(path, ['username'])['username'].tolist()[-10:] == frame['username'].head(10).tolist()
+
+    with pytest.raises(ValueError, match='do not match'):
+        ColumnarWriter(path, append=True).append(frame.drop(columns=['username']))
+
+
+def test_values_that_do_not_fit_are_refused(tmp_path, frame):
+    bad = frame.head(5).copy()
+    bad['followers'] = -1
+    with pytest.raises(ValueError, match='outside the uint32 range'):
+        ColumnarWriter(str(tmp_path / 'bad')).append(bad)
+
+
+def test_replacing_a_dataset_keeps_unrelated_files(tmp_path, frame):
+    path = _columnar(tmp_path, frame)
+    with open(os.path.join(path, 'notes.bin'), 'wb') as f:
+        f.write(b'keep me')
+
+    ColumnarWriter(path).append(frame[['username', 'followers']].head(3))
+    assert read_meta(path)['rows'] == 3
+    assert os.path.exists(os.path.join(path, 'notes.bin'))
+    assert not os.path.exists(os.path.join(path, 'avg_likes.bin'))
+    assert read_dataset(path)['username'].tolist() == frame['username'].head(3).tolist()
+
+
+def test_refuses_to_write_into_an_unrelated_directory(tmp_path):
+    (tmp_path / 'other').mkdir()
+    (tmp_path / 'other' / 'data.bin').write_bytes(b'x')
+    with pytest.raises(ValueError, match='not empty'):
+        ColumnarWriter(str(tmp_path / 'other'))
+    assert (tmp_path / 'other' / 'data.bin').read_bytes() == b'x'
+
+
+def test_convert_csv_and_chunked_reads(tmp_path, frame):
+    csv_path = str(tmp_path / 'accounts.csv')
+    frame.to_csv(csv_path, index=False)
+    path = str(tmp_path / 'converted')
+    assert convert_csv(csv_path, path, chunksize=128) == 500
+
+    for source in (csv_path, path):
+        chunks = list(iter_dataset_chunks(source, ['followers', 'is_fake'], chunksize=128))
+        assert [len(chunk) for chunk in chunks] == [128, 128, 128, 116]
+        np.testing.assert_array_equal(pd.concat(chunks)['followers'], frame['followers'])
+
+
+@pytest.mark.parametrize('kind', ['csv', 'ndjson', 'columnar'])
+def test_positions_resume_after_a_chunk(tmp_path, frame, kind):
+    if kind == 'columnar':
+        path = _columnar(tmp_path, frame)
+    else:
+        path = str(tmp_path / f'accounts.{kind}')
+        if kind == 'csv':
+            frame.to_csv(path, index=False)
+        else:
+            frame.to_json(path, orient='records', lines=True)
+
+    pairs = list(iter_dataset_positions(path, ['username', 'followers'], chunksize=150))
+    assert [len(chunk) for chunk, _ in pairs] == [150, 150, 150, 50]
+    full = pd.concat([chunk for chunk, _ in pairs], ignore_index=True)
+    assert full['username'].astype(str).tolist() == frame['username'].tolist()
+
+    resumed = pd.concat([chunk for chunk, _ in iter_dataset_positions(path, ['username', 'followers'], 150,
+                                                                         pairs[1][1])], ignore_index=True)
+    pdt.assert_frame_equal(resumed, full.iloc[300:].reset_index(drop=True), check_dtype=False)
+    assert list(iter_dataset_positions(path, None, 150, pairs[-1][1])) == []
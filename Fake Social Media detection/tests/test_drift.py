@@ -0,0 +1,156 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from drift import MIN_LIVE_ROWS, PSI_ALERT, DriftMonitor, FeatureSketch, drift_report
+
+COLUMNS = ['followers', 'ratio', 'flag']
+
+
+def _rows(n, seed=0, shift=0.0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.lognormal(5 + shift, 1, n), rng.normal(shift, 1, n), rng.random(n) < 0.3])
+
+
+@pytest.fixture(scope='module')
+def reference():
+    return FeatureSketch.reference(_rows(5000), COLUMNS)
+
+
+def test_reference_bins_every_row_at_its_quantiles(reference):
+    X = _rows(5000)
+    assert reference.rows == 5000
+    for j, edges in enumerate(reference.edges):
+        counts = np.bincount(np.searchsorted(edges, X[:, j], side='right'), minlength=len(edges) + 1)
+        assert reference.counts[j, :len(edges) + 1].tolist() == counts.tolist()
+        assert not reference.counts[j, len(edges) + 1:].any()
+    # Continuous features get deciles; the 0/1 flag gets an edge at each value
+    assert len(reference.edges[0]) == 9 and reference.edges[2].tolist() == [0.0, 1.0]
+    np.testing.assert_allclose(reference.shares()[0, :10], 0.1, atol=0.001)
+    np.testing.assert_allclose(reference.means(), X.mean(axis=0))
+    np.testing.assert_allclose(reference.stds(), X.std(axis=0))
+    np.testing.assert_allclose(reference.medians()[:2], np.median(X[:, :2], axis=0), rtol=0.02)
+
+
+def test_chunks_and_merges_equal_one_update(reference):
+    X = _rows(1000, seed=1)
+    whole, parts = reference.empty(), reference.empty()
+    whole.update(X)
+    for start in range(0, len(X), 300):
+        parts.update(X[start:start + 300])
+    other = reference.empty()
+    other.update(X[:400])
+    rest = reference.empty()
+    rest.update(X[400:])
+    for sketch in (parts, other.merge(rest)):
+        np.testing.assert_array_equal(sketch.counts, whole.counts)
+        np.testing.assert_allclose(sketch.sums, whole.sums)
+        assert sketch.rows == whole.rows
+
+
+def test_sketches_with_other_edges_do_not_merge(reference):
+    with pytest.raises(ValueError, match='cannot be merged'):
+        reference.merge(FeatureSketch.reference(_rows(500, seed=2), COLUMNS))
+    with pytest.raises(ValueError, match='cannot be merged'):
+        reference.merge(FeatureSketch(['other'], reference.edges[:1]))
+
+
+def test_dict_roundtrip_survives_json(reference):
+    restored = FeatureSketch.from_dict(json.loads(json.dumps(reference.to_dict())))
+    assert restored.feature_columns == reference.feature_columns
+    np.testing.assert_array_equal(restored.counts, reference.counts)
+    np.testing.assert_array_equal(restored.sums, reference.sums)
+    restored.merge(reference)
+
+
+def test_same_distribution_is_stable(reference):
+    live = reference.empty()
+    live.update(_rows(3000, seed=3))
+    report = drift_report(reference, live)
+    assert report['status'] == 'stable' and report['drifted'] == []
+    assert all(feature['psi'] < 0.02 for feature in report['features'].values())
+
+
+def test_shifted_features_are_reported(reference):
+    live = reference.empty()
+    live.update(_rows(3000, seed=4, shift=1.0))
+    report = drift_report(reference, live)
+    assert report['status'] == 'significant'
+    assert report['drifted'][:2] == sorted(['followers', 'ratio'], key=lambda name: -report['features'][name]['psi'])
+    assert 'flag' not in report['drifted']
+    ratio = report['features']['ratio']
+    assert ratio['psi'] >= PSI_ALERT
+    assert ratio['mean_shift'] == pytest.approx(1.0, abs=0.1)
+    assert ratio['ks'] == pytest.approx(0.38, abs=0.05)
+
+    # PSI over the bins, with empty bins floored
+    expected = np.maximum(reference.shares()[1, :10], 1e-4)
+    actual = np.maximum(live.shares()[1, :10], 1e-4)
+    assert ratio['psi'] == pytest.approx(float(((actual - expected) * np.log(actual / expected)).sum()), abs=1e-4)
+
+
+def test_too_few_live_rows_are_not_scored(reference):
+    live = reference.empty()
+    live.update(_rows(MIN_LIVE_ROWS - 1, shift=3.0))
+    report = drift_report(reference, live)
+    assert report['status'] == 'insufficient_data'
+    assert report['features'] == {} and report['rows'] == MIN_LIVE_ROWS - 1
+
+
+def test_monitor_counts_buffered_rows(reference):
+    monitor = DriftMonitor(reference, 'v1', buffer_rows=64)
+    X = _rows(300, seed=5)
+    monitor.observe(X[:100])
+    monitor.observe(X[100:])
+    live = monitor.live()
+    expected = reference.empty()
+    expected.update(X)
+    assert live.rows == 300
+    np.testing.assert_array_equal(live.counts, expected.counts)
+
+    report = monitor.compute()
+    assert report['model_version'] == 'v1' and report['status'] == 'stable'
+    assert monitor.latest is report and monitor.report() is report
+
+
+def test_monitor_merges_recent_worker_states(reference, tmp_path):
+    state_dir = str(tmp_path)
+    monitor = DriftMonitor(reference, 'v1', interval=10, state_dir=state_dir)
+    monitor.observe(_rows(150, seed=6))
+
+    def write_state(name, version, rows, age=0):
+        sketch = reference.empty()
+        sketch.update(_rows(rows, seed=7))
+        path = os.path.join(state_dir, name)
+        with open(path, 'w') as f:
+            json.dump(dict(sketch.to_dict(), version=version), f)
+        os.utime(path, (time.time() - age, time.time() - age))
+
+    write_state('drift-v1-1.json', 'v1', 50)
+    write_state('drift-v1-2.json', 'v1', 1000, age=60)
+    write_state('drift-v1-b-3.json', 'v1-b', 1000)
+    with open(os.path.join(state_dir, 'drift-v1-4.json'), 'w') as f:
+        f.write('{not json')
+
+    report = monitor.compute()
+    # Its own rows plus the one recent worker; stale, other-version and broken states are skipped
+    assert report['rows'] == 200 and report['workers_merged']
+    assert os.path.exists(os.path.join(state_dir, f'drift-v1-{os.getpid()}.json'))
+
+
+def test_drift_endpoint(make_app, accounts):
+    _, flask_app = make_app()
+    assert flask_app.test_client().get('/api/drift').status_code == 404
+
+    _, flask_app = make_app(DRIFT_MONITORING=True)
+    client = flask_app.test_client()
+    client.post('/api/predict/batch', json=accounts)
+    client.post('/api/predict/batch', json=[{'followers': 'many'}])
+    report = client.get('/api/drift?refresh=1').get_json()
+    assert report['rows'] >= len(accounts)
+    assert report['status'] in ('stable', 'moderate', 'significant')
+    assert report['features']
+    assert 'feature_drift_psi{' in client.get('/metrics').get_data(as_text=True)
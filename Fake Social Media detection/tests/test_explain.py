@@ -0,0 +1,101 @@
+import copy
+
+import numpy as np
+import pytest
+
+from cascade import escalation_mask, first_stage_proba
+from explain import Explainer, describe, load_explainer
+from tree_engine import CompiledEnsemble
+
+
+@pytest.fixture(scope='module')
+def engine(engine_path):
+    return CompiledEnsemble.load(engine_path)
+
+
+def _logit(p):
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return np.log(p / (1 - p))
+
+
+def test_engine_contributions_sum_to_the_margin(trained, engine):
+    X = trained.X_test.to_numpy()
+    contributions = Explainer(engine, engine.feature_columns).contributions(X)
+    assert contributions.shape == (len(X), X.shape[1] + 1)
+    np.testing.assert_allclose(contributions.sum(axis=1), engine.decision_function(X), atol=1e-6)
+
+
+def test_model_contributions_sum_to_the_margin(trained):
+    X = trained.X_test_scaled
+    contributions = Explainer(trained.model, trained.feature_columns).contributions(X)
+    margin = trained.model.predict(X, output_margin=True)
+    np.testing.assert_allclose(contributions.sum(axis=1), margin, atol=1e-4)
+
+
+def test_cascade_rows_are_explained_by_the_stage_that_scored_them(trained, engine):
+    X = trained.X_test.to_numpy()
+    cascade = engine.cascade
+    contributions = Explainer(engine, engine.feature_columns).contributions(X, cascade)
+    first = first_stage_proba(cascade, X)
+    escalated = escalation_mask(cascade, first)
+    assert escalated.any() and not escalated.all()
+    np.testing.assert_allclose(contributions[~escalated].sum(axis=1), _logit(first[~escalated]), atol=1e-6)
+    np.testing.assert_allclose(contributions[escalated].sum(axis=1), engine.decision_function(X[escalated]),
+                               atol=1e-6)
+
+
+def test_explain_picks_the_largest_contributions_in_order(trained, engine):
+    explainer = Explainer(engine, engine.feature_columns)
+    X = trained.X_test.to_numpy()[:50]
+    contributions = explainer.contributions(X)[:, :-1]
+    for row, fields in enumerate(explainer.explain(X, top=3)):
+        expected = np.argsort(-np.abs(contributions[row]), kind='stable')[:3]
+        chosen = fields['feature_contributions']
+        assert list(chosen) == [engine.feature_columns[f] for f in expected]
+        assert list(chosen.values()) == [round(float(contributions[row, f]), 4) for f in expected]
+        assert fields['explanation'] == describe(chosen)
+
+    assert len(explainer.explain(X[:1], top=10 ** 6)[0]['feature_contributions']) == len(engine.feature_columns)
+    assert explainer.explain(X[:0]) == []
+
+
+def test_describe_splits_by_direction():
+    text = describe({'followers': -1.5, 'account_age_days': 0.25, 'has_bio': 0.0})
+    assert text == 'Towards fake: account age days (+0.25). Towards real: followers (-1.50).'
+    assert describe({'has_bio': 0.0}) == 'No single feature moved the score.'
+
+
+def test_unexplainable_models_are_refused(engine, tmp_path):
+    path = str(tmp_path / 'old_engine.npz')
+    # An engine saved before covers were exported
+    stripped = copy.copy(engine)
+    stripped.cover = None
+    stripped.save(path)
+    old = CompiledEnsemble.load(path)
+    with pytest.raises(ValueError, match='without node covers'):
+        Explainer(old, old.feature_columns)
+    assert load_explainer(old, old.feature_columns) is None
+    with pytest.raises(ValueError, match='not supported for object models'):
+        Explainer(object(), ['followers'])
+
+
+@pytest.mark.parametrize('use_engine', [False, True])
+def test_api_explanations(make_app, accounts, engine_path, use_engine):
+    config = {'MODEL_PATH': engine_path} if use_engine else {}
+    _, flask_app = make_app(**config)
+    client = flask_app.test_client()
+
+    result = client.post('/api/predict?explain=1&top=3', json=accounts[0]).get_json()
+    assert len(result['feature_contributions']) == 3
+    assert result['explanation']
+    plain = client.post('/api/predict', json=accounts[0]).get_json()
+    assert 'feature_contributions' not in plain
+    assert plain['probability'] == result['probability']
+
+    batch = client.post('/api/predict/batch?explain=true', json=accounts[:5] + [{'followers': 'many'}])
+    results = batch.get_json()['results']
+    assert all(len(row['feature_contributions']) == 5 for row in results[:5])
+    assert 'feature_contributions' not in results[5]
+
+    assert client.post('/api/predict?explain=1&top=0', json=accounts[0]).status_code == 400
+    assert client.post('/api/predict/batch?explain=1&top=x', json=accounts[:2]).status_code == 400
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from features import (DERIVED_COLUMNS, RAW_COLUMNS, assemble_matrix, derive_features, input_columns,
+                      suspicious_username_flags, uses_username_features)
+from usernames import USERNAME_COLUMNS
+
+
+def test_derived_columns_follow_their_definitions():
+    columns = {
+        'followers': np.array([500.0, 0.0, 150.0]),
+        'following': np.array([10.0, 0.0, 300.0]),
+        'posts_count': np.array([2.0, 40.0, 3.0]),
+        'account_age_days': np.array([100.0, 10.0, 10.0]),
+        'avg_likes': np.array([1.0, 5.0, 0.0]),
+        'avg_comments': np.array([0.5, 0.0, 0.0]),
+        'avg_shares': np.array([0.5, 1.0, 0.0])
+    }
+    derived = derive_features(columns)
+
+    np.testing.assert_allclose(derived['followers_following_ratio'], [50.0, 0.0, 0.5])
+    # Zero counts are clamped to 1 rather than dividing by zero
+    np.testing.assert_allclose(derived['engagement_rate'], [2.0 / 500, 6.0, 0.0])
+    assert derived['low_activity'].tolist() == [1, 0, 0]
+    assert derived['high_follower_ratio'].tolist() == [1, 0, 0]
+    assert derived['low_engagement'].tolist() == [1, 0, 1]
+    assert derived['suspicious_username'].tolist() == [0, 0, 0]
+
+
+def test_missing_fields_count_as_zero():
+    derived = derive_features({'followers': np.array([5.0])})
+    assert derived['followers_following_ratio'].tolist() == [5.0]
+    assert derived['engagement_rate'].tolist() == [0.0]
+
+
+def test_usernames_override_the_supplied_flag_only_where_present():
+    columns = {
+        'username': np.array(['spambot1', 'alice', None], dtype=object),
+        'suspicious_username': np.array([0, 1, 1])
+    }
+    assert derive_features(columns)['suspicious_username'].tolist() == [1, 0, 1]
+    assert suspicious_username_flags(['user123', 'Bob', 'FAKEacct']).tolist() == [1, 0, 1]
+
+
+def test_dataframe_and_dict_inputs_agree():
+    df = pd.DataFrame({col: np.arange(4, dtype=float) * (i + 1) for i, col in enumerate(RAW_COLUMNS)})
+    df['username'] = ['bot42', 'carol', 'user_1', 'dave']
+    from_frame = derive_features(df)
+    from_dict = derive_features({col: df[col].to_numpy() for col in df.columns})
+    for col in DERIVED_COLUMNS:
+        np.testing.assert_array_equal(from_frame[col], from_dict[col])
+
+
+def test_assemble_matrix_orders_columns_and_adds_username_features():
+    feature_columns = ['engagement_rate', 'followers', 'verified']
+    matrix = assemble_matrix({'followers': np.array([200.0]), 'avg_likes': np.array([20.0]),
+                              'verified': np.array([1.0])}, feature_columns)
+    np.testing.assert_allclose(matrix, [[0.1, 200.0, 1.0]])
+
+    with_usernames = feature_columns + USERNAME_COLUMNS
+    assert uses_username_features(with_usernames)
+    matrix = assemble_matrix({'followers': np.array([1.0, 1.0]),
+                              'username': np.array(['xk4821', None], dtype=object)}, with_usernames)
+    assert matrix.shape == (2, 3 + len(USERNAME_COLUMNS))
+    assert matrix[0, 3:].any()
+    assert not matrix[1, 3:].any()
+
+
+def test_input_columns_never_ask_for_derived_values():
+    columns = input_columns(['followers', 'engagement_rate', 'low_activity'] + USERNAME_COLUMNS)
+    assert not set(columns) & (set(DERIVED_COLUMNS) - {'suspicious_username'})
+    assert not set(columns) & set(USERNAME_COLUMNS)
+    assert set(RAW_COLUMNS) <= set(columns)
+    assert columns[-1] == 'suspicious_username'
+
+
+def test_api_derives_features_instead_of_trusting_the_caller(make_app, accounts):
+    _, flask_app = make_app()
+    client = flask_app.test_client()
+    account = dict(accounts[0])
+    honest = client.post('/api/predict', json=account).get_json()
+
+    # Supplying engineered values that contradict the raw fields changes nothing
+    account.update(followers_following_ratio=1e6, engagement_rate=1e6, low_activity=1, high_follower_ratio=1)
+    assert client.post('/api/predict', json=account).get_json() == honest
@@ -0,0 +1,130 @@
+import json
+import queue
+
+import numpy as np
+import pytest
+
+from ingest import AccountStore, IncrementalRescorer, NDJSONSink, QueueSink, ingest_file
+from predictor import load_bundle
+
+SNAPSHOT = {'username': 'alice', 'type': 'snapshot', 'followers': 120, 'following': 80, 'posts_count': 14,
+            'avg_likes': 9.5, 'created_date': '2024-01-01', 'has_bio': 1}
+
+
+@pytest.fixture(scope='module')
+def bundle(model_path):
+    return load_bundle(model_path)
+
+
+def _state(store, username):
+    row = store.index[username]
+    return {name: values[row].item() for name, values in store.columns.items()}
+
+
+def test_events_update_the_running_state():
+    store = AccountStore(window=4)
+    store.apply(dict(SNAPSHOT, ts='2024-01-31'))
+    store.apply({'username': 'alice', 'type': 'follow', 'count': 5})
+    store.apply({'username': 'alice', 'type': 'unfollow_out'})
+    store.apply({'username': 'alice', 'type': 'profile', 'verified': 1})
+
+    state = _state(store, 'alice')
+    assert state['followers'] == 125 and state['following'] == 79
+    assert state['has_bio'] == 1 and state['verified'] == 1
+    columns = store.feature_columns(np.array([store.index['alice']]))
+    assert columns['account_age_days'].tolist() == [30.0]
+    assert columns['username'].tolist() == ['alice']
+
+
+def test_first_posts_average_exactly_then_decay():
+    store = AccountStore(window=9)
+    for likes in (10, 20, 30, 40, 50):
+        store.apply({'username': 'bob', 'type': 'post', 'likes': likes})
+    state = _state(store, 'bob')
+    assert state['posts_count'] == 5
+    assert state['avg_likes'] == pytest.approx(30.0)
+    # Past window / 2 posts each one moves the average by alpha = 2 / (window + 1)
+    store.apply({'username': 'bob', 'type': 'post', 'likes': 100})
+    assert _state(store, 'bob')['avg_likes'] == pytest.approx(30.0 + (100 - 30) * 0.2)
+
+
+def test_counters_and_negative_values_clamp_at_zero():
+    store = AccountStore()
+    store.apply({'username': 'carol', 'type': 'unfollow', 'count': 3})
+    store.apply({'username': 'carol', 'type': 'post', 'likes': -1e39, 'comments': -4})
+    store.apply({'username': 'carol', 'type': 'snapshot', 'following': -10})
+    state = _state(store, 'carol')
+    assert state['followers'] == 0 and state['following'] == 0
+    assert state['avg_likes'] == 0 and state['avg_comments'] == 0
+
+
+@pytest.mark.parametrize('event', [
+    'not an object',
+    {'type': 'follow'},
+    {'username': '', 'type': 'follow'},
+    {'username': 'dave', 'type': 'teleport'},
+    {'username': 'dave', 'type': 'follow', 'count': 'many'},
+    {'username': 'dave', 'type': 'follow', 'count': 2 ** 40},
+    {'username': 'dave', 'type': 'post', 'likes': 1e39},
+    {'username': 'dave', 'type': 'post', 'likes': float('nan')},
+    {'username': 'dave', 'type': 'snapshot', 'followers': float('inf')},
+    {'username': 'dave', 'type': 'snapshot', 'followers': 10, 'created_date': 'last tuesday'},
+    {'username': 'dave', 'type': 'snapshot', 'followers': 10, 'created_date': '99999999-01-01'},
+    {'username': 'dave', 'type': 'follow', 'ts': 'yesterday'},
+    {'username': 'dave', 'type': 'follow', 'ts': 1e300}
+])
+def test_invalid_events_change_nothing(event):
+    store = AccountStore()
+    store.apply({'username': 'erin', 'type': 'follow', 'ts': '2024-06-01'})
+    with pytest.raises((ValueError, TypeError, OverflowError)):
+        store.apply(event)
+    assert store.usernames == ['erin']
+    assert store.clock_day == int(np.datetime64('2024-06-01', 'D').astype(np.int64))
+
+
+def test_only_changed_accounts_are_rescored(bundle):
+    scores = queue.Queue()
+    rescorer = IncrementalRescorer(bundle, QueueSink(scores))
+    assert rescorer.process([json.dumps(SNAPSHOT), dict(SNAPSHOT, username='frank'), '{broken']) == 2
+    assert rescorer.invalid == 1
+    first = [scores.get_nowait() for _ in range(2)]
+    assert {record['username'] for record in first} == {'alice', 'frank'}
+    assert all(record['previous_probability'] is None for record in first)
+
+    # Re-sending the same state scores nothing; a real change emits only that account
+    assert rescorer.process([SNAPSHOT]) == 0
+    rescorer.process([{'username': 'frank', 'type': 'follow', 'count': 50000}])
+    emitted = [scores.get_nowait() for _ in range(scores.qsize())]
+    assert rescorer.rescored == 3
+    assert [record['username'] for record in emitted] in ([], ['frank'])
+    for record in emitted:
+        assert record['previous_probability'] == pytest.approx(first[1]['probability'], abs=1e-4)
+
+
+def test_scoring_failures_are_counted_per_batch(bundle, capsys):
+    class BrokenModel:
+        def predict_proba(self, X):
+            raise RuntimeError('model unavailable')
+
+    rescorer = IncrementalRescorer(bundle._replace(model=BrokenModel()), QueueSink(queue.Queue()))
+    assert rescorer.process([SNAPSHOT, dict(SNAPSHOT, username='grace')]) == 0
+    assert rescorer.unscored == 2 and rescorer.rescored == 0
+    assert 'Scoring failed for a batch of 2 accounts' in capsys.readouterr().err
+
+
+def test_ingest_file_writes_changed_scores(model_path, tmp_path):
+    events = tmp_path / 'events.ndjson'
+    lines = [dict(SNAPSHOT, username=f'user{i}') for i in range(5)] + [{'username': 'user0', 'type': 'post'}]
+    events.write_text('\n'.join(json.dumps(event) for event in lines) + '\nnot json\n\n')
+    sink_path = str(tmp_path / 'scores.ndjson')
+
+    sink = NDJSONSink(sink_path)
+    rescorer = ingest_file(str(events), sink, model_path, batch_size=3, flush_ms=10)
+    sink.close()
+
+    assert rescorer.events == 7 and rescorer.invalid == 1
+    assert len(rescorer.store) == 5
+    with open(sink_path) as f:
+        records = [json.loads(line) for line in f]
+    assert {record['username'] for record in records} == {f'user{i}' for i in range(5)}
+    assert all(record['model_version'] == rescorer.bundle.version for record in records)
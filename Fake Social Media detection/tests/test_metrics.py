@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from metrics import MetricsRegistry, SamplingProfiler
+
+ADMIN = {'X-Admin-Token': 'test-token'}
+
+
+def test_counters_gauges_and_histograms_render_as_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ['route'])
+    info = registry.gauge('model_info', 'Serving model', ['version'])
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=[0.1, 1.0])
+
+    requests.inc(route='/a')
+    requests.inc(2, route='/a')
+    requests.inc(route='/b"\n')
+    info.set(1, version='v1')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{route="/a"} 3' in lines
+    assert 'requests_total{route="/b\\"\\n"} 1' in lines
+    assert 'model_info{version="v1"} 1' in lines
+    # Buckets are cumulative and +Inf counts every observation
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum 5.55' in lines
+    assert 'latency_seconds_count 3' in lines
+
+
+def test_labels_must_match_the_declaration():
+    counter = MetricsRegistry().counter('requests_total', 'Requests', ['route'])
+    with pytest.raises(ValueError, match='expects labels'):
+        counter.inc()
+    with pytest.raises(ValueError):
+        counter.inc(route='/a', status='200')
+
+
+def test_histogram_timer_observes_on_error():
+    latency = MetricsRegistry().histogram('latency_seconds', 'Latency')
+    with pytest.raises(RuntimeError):
+        with latency.time():
+            raise RuntimeError
+    assert latency.render()[-1] == 'latency_seconds_count 1'
+
+
+def test_profiler_samples_one_in_n_and_shares_its_rate(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path), every=3)
+    sampled = [profiler.start() for _ in range(2)]
+    assert sampled == [None, None]
+    running = profiler.start()
+    assert running is not None
+    assert profiler.start() is None
+    filepath = profiler.finish(running, 'POST /api/predict')
+    assert os.path.exists(filepath) and filepath.endswith('POST__api_predict.prof')
+    assert profiler.recent() == [os.path.basename(filepath)]
+
+    # Another worker picks up a new rate through the control file
+    other = SamplingProfiler(str(tmp_path), every=3)
+    profiler.configure(0)
+    assert [other.start() for _ in range(6)] == [None] * 6
+    assert other.every == 0
+
+
+def test_metrics_endpoint_counts_requests(make_app, accounts):
+    _, flask_app = make_app()
+    client = flask_app.test_client()
+    client.post('/api/predict', json=accounts[0])
+    client.post('/api/predict', json={'followers': 'x'})
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{route="/api/predict",method="POST",status="200"}' in text
+    assert 'http_requests_total{route="/api/predict",method="POST",status="400"}' in text
+    assert 'prediction_stage_duration_seconds_count{stage="features"' in text
+
+
+def test_admin_endpoints_require_the_token(make_app):
+    _, flask_app = make_app()
+    client = flask_app.test_client()
+    assert client.get('/admin/profiler').status_code == 403
+    assert client.get('/admin/profiler', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.get('/admin/profiler', headers=ADMIN).status_code == 200
+
+    assert client.post('/admin/profiler', json={'every': 'often'}, headers=ADMIN).status_code == 400
+    assert client.post('/admin/profiler', json={'every': -1}, headers=ADMIN).status_code == 400
+    assert client.post('/admin/profiler', json={'every': 5}, headers=ADMIN).get_json()['every'] == 5
+
+
+def test_admin_endpoints_are_closed_without_a_configured_token(make_app):
+    _, flask_app = make_app(ADMIN_TOKEN='')
+    client = flask_app.test_client()
+    assert client.get('/admin/profiler').status_code == 403
+    assert client.get('/admin/profiler', headers={'X-Admin-Token': ''}).status_code == 403
+    assert client.get('/api/history').status_code == 403
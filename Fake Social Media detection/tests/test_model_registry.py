@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from model_registry import ModelRegistry, ModelWatcher
+
+ADMIN = {'X-Admin-Token': 'test-token'}
+
+
+@pytest.fixture
+def registry(tmp_path, model_path):
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    registry.publish(model_path, '20250101-000000')
+    registry.publish(model_path, '20250201-000000')
+    return registry
+
+
+def test_publish_orders_versions_and_refuses_duplicates(registry, model_path):
+    assert registry.versions() == ['20250101-000000', '20250201-000000']
+    assert registry.active_version() == '20250201-000000'
+    assert [item['version'] for item in registry.describe()] == registry.versions()
+
+    with pytest.raises(FileExistsError):
+        registry.publish(model_path, '20250101-000000')
+    with pytest.raises(ValueError):
+        registry.publish(model_path, '../escape')
+    assert ModelRegistry(os.path.join(registry.root, 'missing')).active_version() is None
+
+
+def test_pin_rollback_and_unpin(registry):
+    registry.pin('20250101-000000')
+    assert registry.active_version() == '20250101-000000'
+    with pytest.raises(KeyError):
+        registry.pin('19990101-000000')
+    with pytest.raises(KeyError, match='No version older'):
+        registry.rollback()
+
+    registry.unpin()
+    assert registry.active_version() == '20250201-000000'
+    assert registry.rollback() == '20250101-000000'
+    assert registry.pinned() == '20250101-000000'
+
+
+def test_watcher_swaps_in_the_active_version(registry):
+    serving = []
+    watcher = ModelWatcher(registry, serving.append, lambda: serving[-1] if serving else None)
+
+    assert watcher.check() is True
+    assert serving[-1].version == '20250201-000000'
+    assert watcher.check() is False
+
+    registry.rollback()
+    assert watcher.check() is True
+    assert serving[-1].version == '20250101-000000'
+    assert watcher.reloads == 2
+
+
+def test_broken_version_is_skipped_until_its_file_changes(registry, model_path):
+    serving = []
+    watcher = ModelWatcher(registry, serving.append, lambda: serving[-1] if serving else None)
+    watcher.check()
+
+    broken = registry.path('20250301-000000')
+    with open(broken, 'wb') as f:
+        f.write(b'not a model')
+    assert watcher.check() is False
+    assert watcher.last_error.startswith('20250301-000000')
+    assert serving[-1].version == '20250201-000000'
+    assert watcher.check() is False
+
+    with open(model_path, 'rb') as source, open(broken, 'wb') as f:
+        f.write(source.read())
+    st = os.stat(broken)
+    os.utime(broken, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert watcher.check() is True
+    assert serving[-1].version == '20250301-000000'
+
+
+def test_admin_model_endpoints(make_app, registry):
+    app_module, flask_app = make_app(MODEL_REGISTRY_DIR=registry.root, MODEL_RELOAD_INTERVAL=3600)
+    client = flask_app.test_client()
+    assert app_module.model_bundle.version == '20250201-000000'
+
+    assert client.get('/admin/models').status_code == 403
+    status = client.get('/admin/models', headers=ADMIN).get_json()
+    assert status['serving'] == '20250201-000000'
+    assert [item['version'] for item in status['versions']] == registry.versions()
+
+    status = client.post('/admin/models/rollback', headers=ADMIN).get_json()
+    assert status['serving'] == status['pinned'] == '20250101-000000'
+    assert client.post('/admin/models/rollback', headers=ADMIN).status_code == 409
+    assert client.post('/admin/models/pin', json={}, headers=ADMIN).status_code == 400
+    assert client.post('/admin/models/pin', json={'version': 'nope'}, headers=ADMIN).status_code == 409
+    assert client.post('/admin/models/reload', headers=ADMIN).status_code == 404
+
+    status = client.post('/admin/models/unpin', headers=ADMIN).get_json()
+    assert status['serving'] == '20250201-000000' and status['pinned'] is None
+
+    assert make_app()[1].test_client().get('/admin/models', headers=ADMIN).status_code == 404
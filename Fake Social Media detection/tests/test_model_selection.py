@@ -0,0 +1,36 @@
+import pytest
+
+import model_selection
+from model_selection import build_model, candidate_grid, run_sweep
+
+
+def test_candidate_grid_expands_every_combination():
+    candidates = candidate_grid(['xgboost', 'random_forest'])
+    assert len(candidates) == 8 + 4
+    assert ('random_forest', {'max_depth': None, 'n_estimators': 100}) in candidates
+    assert {name for name, _ in candidates} == {'xgboost', 'random_forest'}
+
+
+def test_unknown_model_is_refused():
+    with pytest.raises(ValueError, match='Unknown model'):
+        build_model('svm', {})
+
+
+def test_sweep_scores_and_ranks_candidates(trained, monkeypatch):
+    monkeypatch.setattr(model_selection, 'CANDIDATE_GRIDS', {
+        'xgboost': {'n_estimators': [5, 20], 'max_depth': [3]},
+        'random_forest': {'n_estimators': [10], 'max_depth': [4]}
+    })
+    monkeypatch.setattr(model_selection, 'SINGLE_ROW_REPEATS', 2)
+
+    result = run_sweep(trained.X_train_scaled[:1500], trained.y_train[:1500], cpus=2, n_splits=3,
+                       models=['xgboost', 'random_forest'])
+    candidates = result['candidates']
+
+    assert result['n_splits'] == 3
+    assert len(candidates) == 3
+    assert [item['auc_mean'] for item in candidates] == sorted((item['auc_mean'] for item in candidates), reverse=True)
+    for item in candidates:
+        assert 0.8 < item['auc_mean'] <= 1.0
+        assert item['auc_std'] >= 0
+        assert item['single_row_ms'] > 0
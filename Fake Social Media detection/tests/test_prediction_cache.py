@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import prediction_cache as cache_module
+from prediction_cache import PredictionCache, SQLiteCacheBackend, feature_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: now[0])
+    return now
+
+
+def test_feature_key_normalizes_equivalent_inputs():
+    assert feature_key(np.array([1, 0, 1]), 'v1') == feature_key(np.array([1.0, -0.0, True]), 'v1')
+    assert feature_key(np.array([1.0, 2.0]), 'v1') != feature_key(np.array([2.0, 1.0]), 'v1')
+    assert feature_key(np.array([1.0, 2.0]), 'v1') != feature_key(np.array([1.0, 2.0]), 'v2')
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 3 and stats['misses'] == 1
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = PredictionCache(ttl_seconds=10)
+    cache.set('a', 1)
+    clock[0] += 9.9
+    assert cache.get('a') == 1
+    clock[0] += 0.2
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_shared_backend_is_seen_by_other_caches(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite')
+    first = PredictionCache(ttl_seconds=10, backend=SQLiteCacheBackend(path))
+    second = PredictionCache(ttl_seconds=10, backend=SQLiteCacheBackend(path))
+
+    first.set('key', {'probability': 0.25})
+    assert second.get('key') == {'probability': 0.25}
+    assert second.stats()['shared_hits'] == 1
+    # Promoted into the local LRU with the writer's expiry, not a fresh TTL
+    clock[0] += 11
+    assert second.get('key') is None
+
+
+def test_app_caches_predictions_per_model_version(make_app, accounts, engine_path):
+    app_module, flask_app = make_app(PREDICTION_CACHE_SIZE=100)
+    client = flask_app.test_client()
+    # The startup warmup prediction is already cached
+    before = client.get('/api/cache/stats').get_json()
+    first = client.post('/api/predict', json=accounts[0]).get_json()
+    second = client.post('/api/predict', json=accounts[0]).get_json()
+    assert first == second
+
+    stats = client.get('/api/cache/stats').get_json()
+    assert stats['enabled'] is True
+    assert stats['hits'] == before['hits'] + 1
+    assert stats['entries'] == before['entries'] + 1
+
+    # Swapping the model invalidates what the old one predicted
+    app_module.swap_model(app_module.load_bundle(engine_path))
+    assert client.get('/api/cache/stats').get_json()['entries'] == 0
+    client.post('/api/predict', json=accounts[0])
+    stats = client.get('/api/cache/stats').get_json()
+    assert stats['misses'] == before['misses'] + 2
+    assert stats['model_version'] == app_module.model_bundle.version
+
+    assert make_app()[1].test_client().get('/api/cache/stats').get_json()['enabled'] is False
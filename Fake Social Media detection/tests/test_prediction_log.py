@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+import prediction_log
+from prediction_log import MAX_QUERY_ROWS, PredictionLog
+
+
+def _scored(n, prefix='user'):
+    records = [{'username': f'{prefix}{i}', 'followers': i} for i in range(n)]
+    results = [{'probability': i / max(n, 1), 'prediction': int(i % 2)} for i in range(n)]
+    return records, results
+
+
+def _stalled(log):
+    """The log with no writer thread, so entries stay queued"""
+    log._start = lambda: None
+    return log
+
+
+def test_recorded_predictions_can_be_queried(tmp_path):
+    log = PredictionLog(str(tmp_path / 'history' / 'log.db'), batch_size=4, flush_ms=5)
+    records, results = _scored(10)
+    log.record('api', 'v1', records, results)
+    log.record('batch', 'v2', [{'username': 'bad'}, {'followers': 3}], [{'error': 'invalid'}, results[1]])
+    assert log.flush()
+
+    rows = log.query()
+    assert len(rows) == 11
+    assert rows[0]['source'] == 'batch' and rows[0]['username'] is None
+    assert rows[-1]['username'] == 'user0' and rows[-1]['inputs'] == records[0]
+    assert [row['username'] for row in log.query(source='api', prediction=1)] == [f'user{i}' for i in (9, 7, 5, 3, 1)]
+    assert log.query(model_version='v2', username='user1') == []
+    assert len(log.query(limit=-5)) == 1
+    assert len(log.query(since=0, until=time.time() + 1)) == 11
+
+    stats = log.stats()
+    assert stats['enqueued'] == stats['written'] == 11
+    assert stats['dropped'] == stats['write_errors'] == 0
+    with pytest.raises(ValueError, match='Unknown history filter'):
+        log.query(country='nz')
+
+
+def test_unknown_policy_is_refused(tmp_path):
+    with pytest.raises(ValueError, match='Unknown backpressure policy'):
+        PredictionLog(str(tmp_path / 'log.db'), policy='retry')
+
+
+def test_drop_keeps_the_oldest_entries(tmp_path):
+    log = _stalled(PredictionLog(str(tmp_path / 'log.db'), max_queue=3, policy='drop'))
+    log.record('api', 'v1', *_scored(5))
+    assert [entry[3]['username'] for entry in log._pending] == ['user0', 'user1', 'user2']
+    assert log.stats()['dropped'] == 2 and log.stats()['queued'] == 3
+    # Nothing drains the queue without a writer
+    assert not log.flush(timeout=0.05)
+
+
+def test_drop_oldest_keeps_the_newest_entries(tmp_path):
+    log = _stalled(PredictionLog(str(tmp_path / 'log.db'), max_queue=3, policy='drop_oldest'))
+    log.record('api', 'v1', *_scored(5))
+    assert [entry[3]['username'] for entry in log._pending] == ['user2', 'user3', 'user4']
+    assert log.stats()['dropped'] == 2 and log.stats()['enqueued'] == 5
+
+
+def test_block_waits_once_per_call(tmp_path):
+    log = _stalled(PredictionLog(str(tmp_path / 'log.db'), max_queue=2, policy='block', block_ms=50))
+    started = time.monotonic()
+    log.record('api', 'v1', *_scored(10))
+    elapsed = time.monotonic() - started
+    # Eight entries do not fit; waiting block_ms for each would take 0.4s
+    assert 0.04 <= elapsed < 0.3
+    assert log.stats()['dropped'] == 8
+
+
+def test_block_loses_nothing_while_the_writer_keeps_up(tmp_path):
+    log = PredictionLog(str(tmp_path / 'log.db'), max_queue=5, batch_size=5, flush_ms=0, policy='block',
+                        block_ms=5000)
+    log.record('api', 'v1', *_scored(200))
+    assert log.flush()
+    stats = log.stats()
+    assert stats['written'] == 200 and stats['dropped'] == 0
+    assert stats['mean_batch_size'] <= 5
+
+
+def test_old_rows_are_pruned_past_max_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(prediction_log, 'PRUNE_EVERY', 1)
+    log = PredictionLog(str(tmp_path / 'log.db'), batch_size=10, flush_ms=0, max_rows=15)
+    for batch in range(4):
+        log.record('api', 'v1', *_scored(10, prefix=f'b{batch}_'))
+        assert log.flush()
+    # The writer prunes right after counting a batch, so give it a moment
+    deadline = time.monotonic() + 2
+    while len(log.query(limit=MAX_QUERY_ROWS)) > 15 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    rows = log.query(limit=MAX_QUERY_ROWS)
+    assert len(rows) == 15
+    assert rows[0]['username'] == 'b3_9'
+
+
+def test_history_endpoints(make_app, accounts, tmp_path):
+    app_module, flask_app = make_app(PREDICTION_LOG_PATH=str(tmp_path / 'log.db'))
+    client = flask_app.test_client()
+    headers = {'X-Admin-Token': 'test-token'}
+
+    client.post('/api/predict', json=accounts[0])
+    client.post('/api/predict/batch', json=accounts[1:6] + [{'followers': 'many'}])
+    assert app_module.prediction_log.flush()
+
+    body = client.get('/api/history?limit=3', headers=headers).get_json()
+    assert body['count'] == 3
+    assert [row['source'] for row in body['results']] == ['batch'] * 3
+    api_rows = client.get('/api/history?source=api', headers=headers).get_json()['results']
+    assert [row['username'] for row in api_rows] == [accounts[0]['username']]
+
+    assert client.get('/api/history').status_code == 403
+    assert client.get('/api/history', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.get('/api/history?since=yesterday', headers=headers).status_code == 400
+    stats = client.get('/api/history/stats').get_json()
+    assert stats['enabled'] and stats['written'] == 6
+
+    _, flask_app = make_app()
+    client = flask_app.test_client()
+    assert client.get('/api/history', headers=headers).status_code == 404
+    assert client.get('/api/history/stats').get_json() == {'enabled': False}
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generator import generate_chunk
+from rollups import AGE_BUCKETS, METRICS, RollupBuilder, RollupCube, build_rollup
+
+REFERENCE_DATE = '2025-01-01'
+
+
+@pytest.fixture(scope='module')
+def frame():
+    df = generate_chunk(3000, seed=13, reference_date=REFERENCE_DATE)
+    df.loc[df.index[:25], 'created_date'] = None
+    return df
+
+
+@pytest.fixture(scope='module')
+def cube(frame):
+    builder = RollupBuilder()
+    for start in range(0, len(frame), 700):
+        builder.update(frame.iloc[start:start + 700])
+    return builder.cube()
+
+
+def _labelled(frame):
+    """The frame with every rollup dimension as the label the cube uses"""
+    edges = [upper for _, upper in AGE_BUCKETS]
+    months = pd.to_datetime(frame['created_date']).dt.strftime('%Y-%m').fillna('unknown')
+    return frame.assign(
+        age_bucket=[AGE_BUCKETS[i][0] for i in np.searchsorted(edges, frame['account_age_days'], side='left')],
+        month=months,
+        verified=frame['verified'].astype(str),
+        completeness=(frame['has_profile_pic'] + frame['has_bio'] + frame['has_location']).astype(str),
+        is_fake=frame['is_fake'].astype(str)
+    )
+
+
+def _expected(frame, filters, group_by):
+    df = _labelled(frame)
+    for dimension, values in filters.items():
+        df = df[df[dimension].isin(values)]
+    groups = df.groupby(list(group_by), sort=True) if group_by else [((), df)]
+    expected = {}
+    for key, rows in groups:
+        key = key if isinstance(key, tuple) else (key,)
+        expected[key] = (len(rows), int(rows['is_fake'].astype(int).sum()),
+                         {metric: rows[metric].mean() for metric in METRICS})
+    return expected
+
+
+@pytest.mark.parametrize('filters, group_by', [
+    ({}, []),
+    ({}, ['month']),
+    ({'verified': ['0']}, ['age_bucket', 'completeness']),
+    ({'is_fake': ['1']}, ['age_bucket']),
+    ({'is_fake': ['0']}, []),
+    ({'completeness': ['2', '3'], 'is_fake': ['0', '1']}, ['is_fake']),
+    ({'month': ['unknown']}, ['verified', 'is_fake'])
+])
+def test_slices_match_a_brute_force_groupby(frame, cube, filters, group_by):
+    groups = cube.query(filters, group_by)
+    expected = _expected(frame, filters, group_by)
+
+    assert len(groups) == len(expected)
+    for group in groups:
+        count, fake_count, means = expected[tuple(group[dimension] for dimension in group_by)]
+        assert group['count'] == count
+        assert group['fake_count'] == fake_count
+        assert group['fake_rate'] == pytest.approx(fake_count / count, abs=1e-4)
+        for metric in METRICS:
+            assert group['means'][metric] == pytest.approx(means[metric], abs=1e-3, rel=1e-4)
+
+
+def test_is_fake_filters_only_count_the_selected_accounts(cube, frame):
+    fake, = cube.query({'is_fake': ['1']})
+    real, = cube.query({'is_fake': ['0']})
+    assert fake['count'] == fake['fake_count'] == int(frame['is_fake'].sum())
+    assert fake['fake_rate'] == 1.0
+    assert real['fake_count'] == 0 and real['fake_rate'] == 0.0
+    assert fake['count'] + real['count'] == cube.rows == len(frame)
+
+
+def test_histograms_cover_every_row(cube):
+    group, = cube.query({'verified': ['1']}, histograms=True)
+    for metric in METRICS:
+        histogram = group['histograms'][metric]
+        assert len(histogram['counts']) == len(histogram['edges']) + 1
+        assert sum(histogram['counts']) == group['count']
+
+
+def test_unknown_dimensions_and_values_are_refused(cube):
+    with pytest.raises(ValueError, match='Unknown dimension'):
+        cube.query(group_by=['country'])
+    with pytest.raises(ValueError, match='Unknown month value'):
+        cube.query({'month': ['1999-01']})
+    assert cube.months[0] == 'unknown'
+    assert cube.months[1:] == sorted(cube.months[1:])
+
+
+def test_build_save_and_load(frame, cube, tmp_path):
+    path = str(tmp_path / 'accounts.csv')
+    frame.to_csv(path, index=False)
+    built = build_rollup(path, str(tmp_path / 'rollup.npz'), chunksize=1000)
+    loaded = RollupCube.load(str(tmp_path / 'rollup.npz'))
+    for other in (built, loaded):
+        assert other.rows == cube.rows
+        assert other.months == cube.months
+        np.testing.assert_array_equal(other.counts, cube.counts)
+        np.testing.assert_allclose(other.sums, cube.sums, rtol=1e-9)
+
+
+def test_stats_endpoint(make_app, frame, tmp_path):
+    path = str(tmp_path / 'accounts.csv')
+    frame.to_csv(path, index=False)
+    build_rollup(path, str(tmp_path / 'rollup.npz'))
+    _, flask_app = make_app(ROLLUP_PATH=str(tmp_path / 'rollup.npz'))
+    client = flask_app.test_client()
+
+    body = client.get('/api/stats?group_by=is_fake&verified=0').get_json()
+    assert body['rows'] == len(frame)
+    assert [group['is_fake'] for group in body['groups']] == ['0', '1']
+    assert client.get('/api/stats?group_by=country').status_code == 400
+    assert client.get('/api/stats?is_fake=2').status_code == 400
+
+    _, flask_app = make_app(ROLLUP_PATH=str(tmp_path / 'missing.npz'))
+    assert flask_app.test_client().get('/api/stats').status_code == 404
@@ -0,0 +1,177 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generator import generate_chunk
+from similarity import (SOURCE_COLUMNS, SimilarityIndex, SimilarityIndexBuilder, SimilarityIndexStore,
+                        account_tokens, build_index, connected_components)
+
+REFERENCE_DATE = '2025-01-01'
+FARM_SIZE = 12
+
+
+def _farm(base):
+    """FARM_SIZE near-copies of one account with sequential usernames"""
+    farm = pd.DataFrame([base] * FARM_SIZE)
+    farm['username'] = [f'promo_deals{4800 + i}' for i in range(FARM_SIZE)]
+    farm['followers'] = farm['followers'] + np.arange(FARM_SIZE)
+    return farm
+
+
+@pytest.fixture(scope='module')
+def frame():
+    df = generate_chunk(1500, seed=21, reference_date=REFERENCE_DATE)[SOURCE_COLUMNS]
+    base = dict(df.iloc[0], followers=40, following=3000, posts_count=2, avg_likes=0.5, account_age_days=20)
+    return pd.concat([df, _farm(base)], ignore_index=True)
+
+
+@pytest.fixture(scope='module')
+def index(frame):
+    builder = SimilarityIndexBuilder()
+    for start in range(0, len(frame), 400):
+        builder.update(frame.iloc[start:start + 400])
+    return builder.finish()
+
+
+def _farm_rows(frame):
+    return np.flatnonzero(frame['username'].str.startswith('promo_deals').to_numpy())
+
+
+def test_farm_accounts_share_one_cluster(frame, index):
+    rows = _farm_rows(frame)
+    assert len(np.unique(index.labels[rows])) == 1
+    assert (index.cluster_sizes[rows] >= FARM_SIZE).all()
+    # Clusters are labelled by their smallest member
+    assert (index.labels <= np.arange(len(index))).all()
+
+
+def test_lookup_finds_the_account_itself(frame, index):
+    sample = frame.iloc[:200]
+    for row, (rows, scores) in enumerate(index.lookup(sample, limit=5)):
+        assert scores[0] == 1.0 and row in rows
+        assert len(rows) <= 5
+        assert (scores >= index.threshold).all()
+        assert (np.diff(scores) <= 0).all()
+
+
+def test_lookup_returns_farm_members_for_a_new_farm_account(frame, index):
+    new = frame.iloc[_farm_rows(frame)[:1]].assign(username='promo_deals4899')
+    farm = _farm_rows(frame)
+    rows, scores = index.lookup(new, limit=100)[0]
+    # LSH may miss some members; the ones found all belong to the farm's cluster
+    assert len(set(rows.tolist()) & set(farm.tolist())) >= FARM_SIZE // 2
+    assert index.labels[rows[0]] == index.labels[farm[0]]
+    assert index.match_cluster_sizes(new).tolist() == [index.cluster_sizes[farm[0]]]
+
+
+def test_unlike_accounts_match_nothing(index):
+    stranger = {'username': np.array(['zz_qx_unique'], dtype=object), 'followers': np.array([9e8]),
+                'following': np.array([0.0]), 'posts_count': np.array([9e6]), 'account_age_days': np.array([9e4])}
+    rows, scores = index.lookup(stranger)[0]
+    assert len(rows) == 0 and len(scores) == 0
+    assert index.match_cluster_sizes(stranger).tolist() == [0]
+
+
+def test_missing_usernames_only_use_the_other_tokens(frame):
+    columns = {name: frame[name].to_numpy()[:3] for name in SOURCE_COLUMNS}
+    columns['username'] = np.array([None, 'alice', float('nan')], dtype=object)
+    tokens = account_tokens(columns)
+    without = account_tokens({name: values for name, values in columns.items() if name != 'username'})
+    for row in (0, 2):
+        assert set(tokens[row]) == set(without[row])
+
+
+def test_chunking_does_not_change_the_index(frame, index):
+    whole = SimilarityIndexBuilder()
+    whole.update(frame)
+    other = whole.finish()
+    np.testing.assert_array_equal(other.signatures, index.signatures)
+    np.testing.assert_array_equal(other.labels, index.labels)
+    assert other.usernames == index.usernames
+
+
+def test_connected_components_match_union_find():
+    rng = np.random.default_rng(3)
+    n = 300
+    a, b = rng.integers(0, n, 250), rng.integers(0, n, 250)
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    for x, y in zip(a, b):
+        rx, ry = find(x), find(y)
+        parent[max(rx, ry)] = min(rx, ry)
+    expected = [min(i for i in range(n) if find(i) == find(node)) for node in range(n)]
+    assert connected_components(n, a, b).tolist() == expected
+    assert connected_components(4, np.array([], dtype=int), np.array([], dtype=int)).tolist() == [0, 1, 2, 3]
+
+
+def test_builder_validates_and_handles_no_rows():
+    with pytest.raises(ValueError, match='multiple of bands'):
+        SimilarityIndexBuilder(num_perm=30, bands=8)
+    empty = SimilarityIndexBuilder().finish()
+    assert len(empty) == 0
+    assert empty.match_cluster_sizes({'followers': np.array([10.0])}).tolist() == [0]
+
+
+def test_save_load_and_store_reload(frame, index, tmp_path):
+    path = str(tmp_path / 'similarity.npz')
+    index.save(path)
+    loaded = SimilarityIndex.load(path)
+    np.testing.assert_array_equal(loaded.signatures, index.signatures)
+    np.testing.assert_array_equal(loaded.keys, index.keys)
+    assert loaded.usernames == index.usernames
+    assert loaded.threshold == index.threshold
+
+    store = SimilarityIndexStore(path)
+    assert store.get() is store.get()
+    smaller = SimilarityIndexBuilder()
+    smaller.update(frame.iloc[:50])
+    smaller.finish().save(path)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert len(store.get()) == 50
+
+    np.savez(str(tmp_path / 'other.npz'), meta=np.array('{"format": "something-else"}'))
+    with pytest.raises(ValueError, match='is not a similarity-v1 file'):
+        SimilarityIndex.load(str(tmp_path / 'other.npz'))
+
+
+def test_build_index_writes_clusters(frame, tmp_path):
+    path = str(tmp_path / 'accounts.csv')
+    frame.to_csv(path, index=False)
+    clusters_path = str(tmp_path / 'clusters.csv')
+    index = build_index(path, str(tmp_path / 'similarity.npz'), chunksize=500, clusters_path=clusters_path)
+    clusters = pd.read_csv(clusters_path)
+    assert len(index) == len(frame)
+    assert set(frame['username'].iloc[_farm_rows(frame)]) <= set(clusters['username'])
+    assert (clusters['cluster_size'] >= 2).all()
+    assert clusters['cluster_size'].is_monotonic_decreasing
+
+
+def test_similar_endpoint_and_predicted_cluster_sizes(make_app, frame, index, tmp_path):
+    path = str(tmp_path / 'similarity.npz')
+    index.save(path)
+    _, flask_app = make_app(SIMILARITY_INDEX_PATH=path)
+    client = flask_app.test_client()
+    account = frame.iloc[_farm_rows(frame)[0]].to_dict()
+
+    body = client.post('/api/similar?limit=3', json=account).get_json()
+    assert body['cluster_size'] >= FARM_SIZE
+    assert len(body['similar']) == 3
+    assert body['similar'][0]['similarity'] == 1.0
+    assert client.post('/api/similar', json=[account]).status_code == 400
+    assert client.post('/api/similar?limit=lots', json=account).status_code == 400
+    assert client.post('/api/similar', json=dict(account, followers='many')).status_code == 400
+
+    result = client.post('/api/predict', json=account).get_json()
+    assert result['cluster_size'] >= FARM_SIZE
+
+    _, flask_app = make_app(SIMILARITY_INDEX_PATH=str(tmp_path / 'missing.npz'))
+    client = flask_app.test_client()
+    assert client.post('/api/similar', json=account).status_code == 404
+    assert 'cluster_size' not in client.post('/api/predict', json=account).get_json()
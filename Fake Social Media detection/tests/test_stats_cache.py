@@ -0,0 +1,122 @@
+import os
+
+import pandas as pd
+import pytest
+
+from data_generator import generate_chunk
+from dataset_io import ColumnarWriter
+from stats_cache import DatasetStatsCache
+
+REFERENCE_DATE = '2025-01-01'
+
+
+def _expected(df):
+    fake = int(df['is_fake'].sum())
+    return {
+        'total_accounts': len(df),
+        'fake_accounts': fake,
+        'real_accounts': len(df) - fake,
+        'fake_percentage': round(fake / len(df) * 100, 2),
+        'avg_followers': round(df['followers'].mean(), 2),
+        'avg_following': round(df['following'].mean(), 2),
+        'avg_posts': round(df['posts_count'].mean(), 2),
+        'avg_engagement': round(df['engagement_rate'].mean(), 4)
+    }
+
+
+def _assert_stats(stats, df):
+    expected = _expected(df)
+    assert stats.keys() == expected.keys()
+    for name, value in expected.items():
+        assert stats[name] == pytest.approx(value, abs=1e-9), name
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def frames():
+    return [generate_chunk(700, seed=seed, reference_date=REFERENCE_DATE) for seed in (1, 2, 3)]
+
+
+def test_appended_rows_are_folded_in(tmp_path, frames):
+    path = tmp_path / 'accounts.csv'
+    frames[0].to_csv(path, index=False)
+    cache = DatasetStatsCache(str(path), chunksize=256)
+    _assert_stats(cache.get(), frames[0])
+    assert cache.get() is cache.get()
+
+    frames[1].to_csv(path, mode='a', index=False, header=False)
+    _assert_stats(cache.get(), pd.concat(frames[:2]))
+    assert cache._rows == 1400
+
+
+def test_partial_trailing_row_waits_for_its_newline(tmp_path, frames):
+    path = tmp_path / 'accounts.csv'
+    frames[0].to_csv(path, index=False)
+    cache = DatasetStatsCache(str(path))
+    cache.get()
+
+    line = frames[1].head(1).to_csv(index=False, header=False)
+    with open(path, 'a', newline='') as f:
+        f.write(line[:len(line) // 2])
+    _assert_stats(cache.get(), frames[0])
+
+    with open(path, 'a', newline='') as f:
+        f.write(line[len(line) // 2:])
+    _assert_stats(cache.get(), pd.concat([frames[0], frames[1].head(1)]))
+
+
+def test_rewritten_file_is_rebuilt(tmp_path, frames):
+    path = tmp_path / 'accounts.csv'
+    frames[0].to_csv(path, index=False)
+    cache = DatasetStatsCache(str(path))
+    cache.get()
+
+    # Same rows plus an appended chunk, but an earlier value changed
+    changed = pd.concat(frames[:2], ignore_index=True)
+    changed.loc[0, 'followers'] += 1_000_000
+    changed.to_csv(path, index=False)
+    _bump_mtime(path)
+    _assert_stats(cache.get(), changed)
+
+
+def test_failed_read_leaves_totals_unchanged(tmp_path, frames, monkeypatch):
+    path = tmp_path / 'accounts.csv'
+    frames[0].to_csv(path, index=False)
+    cache = DatasetStatsCache(str(path), chunksize=256)
+    cache.get()
+    frames[1].to_csv(path, mode='a', index=False, header=False)
+
+    fold = DatasetStatsCache._fold
+    calls = []
+
+    def failing_fold(totals, frame):
+        calls.append(len(frame))
+        if len(calls) == 2:
+            raise OSError('disk went away')
+        fold(totals, frame)
+
+    monkeypatch.setattr(DatasetStatsCache, '_fold', staticmethod(failing_fold))
+    with pytest.raises(OSError):
+        cache.get()
+    assert cache._rows == 700
+
+    monkeypatch.setattr(DatasetStatsCache, '_fold', staticmethod(fold))
+    _assert_stats(cache.get(), pd.concat(frames[:2]))
+
+
+def test_columnar_append_and_rewrite(tmp_path, frames):
+    path = str(tmp_path / 'accounts')
+    writer = ColumnarWriter(path)
+    writer.append(frames[0])
+    cache = DatasetStatsCache(path, chunksize=256)
+    _assert_stats(cache.get(), frames[0])
+
+    writer.append(frames[1])
+    _assert_stats(cache.get(), pd.concat(frames[:2]))
+
+    ColumnarWriter(path).append(frames[2])
+    _assert_stats(cache.get(), frames[2])
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sklearn.metrics import roc_auc_score
+
+from model_trainer import FakeAccountDetector, ReservoirSample, binned_auc
+
+
+def test_reservoir_fills_then_samples_uniformly():
+    reservoir = ReservoirSample(100, 1, seed=0)
+    reservoir.update(np.arange(60, dtype=float)[:, None])
+    assert reservoir.seen == 60
+    assert reservoir.median() == pytest.approx([29.5])
+
+    for start in range(60, 100_000, 7000):
+        reservoir.update(np.arange(start, min(start + 7000, 100_000), dtype=float)[:, None])
+    assert reservoir.seen == 100_000
+    # Every row is equally likely to be kept, so the sample spans the whole stream
+    assert 30_000 < reservoir.median()[0] < 70_000
+    assert len(np.unique(reservoir.rows)) == 100
+
+
+def test_binned_auc_matches_exact_auc():
+    rng = np.random.default_rng(0)
+    y = rng.random(5000) < 0.3
+    scores = np.clip(rng.normal(0.35 + 0.3 * y, 0.2), 0, 1 - 1e-9)
+    bins = (scores * 1000).astype(int)
+    positive = np.bincount(bins[y], minlength=1000)
+    negative = np.bincount(bins[~y], minlength=1000)
+    assert binned_auc(positive, negative) == pytest.approx(roc_auc_score(y, scores), abs=1e-3)
+    assert np.isnan(binned_auc(positive, np.zeros(1000)))
+
+
+def test_streaming_training_matches_in_memory_quality(dataset_csv, trained):
+    detector = FakeAccountDetector()
+    accuracy, auc = detector.train_streaming(dataset_csv, chunksize=700, sample_size=1000, n_estimators=30,
+                                             max_accuracy_loss=None)
+    assert detector.feature_columns == trained.feature_columns
+    assert accuracy > 0.9
+    assert auc > 0.95
+    assert detector.cascade is None
+    assert detector.validation_rows.shape == (1000, len(detector.feature_columns))
+    assert not np.isnan(detector.validation_rows).any()
+
+    # The incrementally fitted scaler sees the same distribution as the batch one
+    np.testing.assert_allclose(detector.scaler.mean_, trained.scaler.mean_, rtol=0.1, atol=0.05)
+
+    proba = detector.model.predict_proba(detector.scaler.transform(trained.X_test.to_numpy()))[:, 1]
+    assert roc_auc_score(trained.y_test, proba) > 0.95
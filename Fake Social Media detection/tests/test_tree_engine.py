@@ -0,0 +1,113 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from cascade import first_stage_proba
+from tree_engine import CompiledEnsemble, export_engine, fold_cascade, fold_thresholds
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def engine(engine_path):
+    return CompiledEnsemble.load(engine_path)
+
+
+def _model_proba(trained, X):
+    return trained.model.predict_proba(trained.scaler.transform(X))[:, 1]
+
+
+def test_engine_matches_predict_proba(trained, engine):
+    for X in (trained.X_test, trained.X_train):
+        # Training rows sit exactly on split points, where rounding matters most
+        compiled = engine.predict_proba(X.to_numpy())[:, 1]
+        np.testing.assert_allclose(compiled, _model_proba(trained, X), atol=1e-5, rtol=0)
+    assert engine.predict_proba(trained.X_test.to_numpy()[0]).shape == (1, 2)
+
+
+def test_missing_values_follow_the_default_direction(trained, engine):
+    X = trained.X_test.to_numpy().copy()[:300]
+    rng = np.random.default_rng(0)
+    X[rng.random(X.shape) < 0.2] = np.nan
+    compiled = engine.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(compiled, trained.model.predict_proba(trained.scaler.transform(X))[:, 1],
+                               atol=1e-5, rtol=0)
+
+
+def test_infinite_values_still_reach_a_leaf(trained, engine):
+    X = trained.X_test.to_numpy().copy()[:50]
+    X[:, 1] = np.inf
+    X[:, 2] = -np.inf
+    probabilities = engine.predict_proba(X)[:, 1]
+    assert np.isfinite(probabilities).all()
+    huge = X.copy()
+    huge[:, 1], huge[:, 2] = 1e300, -1e300
+    np.testing.assert_array_equal(probabilities, engine.predict_proba(huge)[:, 1])
+
+
+def test_folded_thresholds_reproduce_float32_comparisons():
+    rng = np.random.default_rng(1)
+    mean = rng.normal(0, 100, 500)
+    scale = rng.uniform(0.01, 1000, 500)
+    raw = np.round(rng.normal(mean, scale * 3), 2)
+    condition = ((raw - mean) / scale).astype(np.float32)
+    folded = fold_thresholds(condition, mean, scale)
+
+    for candidate in (raw, np.nextafter(raw, np.inf), np.nextafter(raw, -np.inf), folded,
+                      np.nextafter(folded, -np.inf)):
+        expected = ((candidate - mean) / scale).astype(np.float32) >= condition
+        assert ((candidate >= folded) == expected).all()
+
+
+def test_save_and_load_roundtrip(trained, engine, tmp_path):
+    path = str(tmp_path / 'engine.npz')
+    engine.save(path)
+    loaded = CompiledEnsemble.load(path)
+    X = trained.X_test.to_numpy()
+    np.testing.assert_array_equal(loaded.predict_proba(X), engine.predict_proba(X))
+    assert loaded.feature_columns == engine.feature_columns
+    assert loaded.version == engine.version
+
+    np.savez(str(tmp_path / 'other.npz'), meta=np.array('{"format": "something-else"}'))
+    with pytest.raises(ValueError, match='is not a tree-engine-v1 file'):
+        CompiledEnsemble.load(str(tmp_path / 'other.npz'))
+
+
+def test_validate_rejects_a_diverging_engine(trained):
+    engine = export_engine(trained.model, trained.scaler, trained.feature_columns)
+    assert engine.validate(trained.model, trained.scaler, trained.X_test) < 1e-5
+    engine.base_margin += 0.1
+    with pytest.raises(ValueError, match='differs from predict_proba'):
+        engine.validate(trained.model, trained.scaler, trained.X_test)
+
+
+def test_folded_cascade_takes_raw_features(trained, engine):
+    X = trained.X_test.to_numpy()
+    expected = first_stage_proba(trained.cascade, trained.scaler.transform(X))
+    np.testing.assert_allclose(first_stage_proba(fold_cascade(trained.cascade, trained.scaler), X), expected)
+    np.testing.assert_allclose(first_stage_proba(engine.cascade, X), expected)
+
+
+def test_app_serves_the_engine_without_xgboost(make_app, engine_path, accounts, tmp_path):
+    script = (
+        "import json, sys, app\n"
+        "client = app.app.test_client()\n"
+        "response = client.post('/api/predict/batch', json=json.load(sys.stdin))\n"
+        "print(json.dumps([row['probability'] for row in response.get_json()['results']]))\n"
+        "print('xgboost' in sys.modules)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR, MODEL_PATH=engine_path, DRIFT_MONITORING='0',
+               PREDICTION_CACHE_SIZE='0', SIMILARITY_INDEX_PATH='')
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', script], cwd=tmp_path, env=env,
+                            input=json.dumps(accounts[:20]), capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    probabilities, xgboost_loaded = result.stdout.strip().splitlines()[-2:]
+    assert xgboost_loaded == 'False'
+
+    _, flask_app = make_app()
+    served = flask_app.test_client().post('/api/predict/batch', json=accounts[:20]).get_json()['results']
+    np.testing.assert_allclose(json.loads(probabilities), [row['probability'] for row in served], atol=1e-4)
@@ -0,0 +1,75 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from usernames import (MAX_USERNAME_BYTES, NGRAM_BUCKETS, USERNAME_COLUMNS, PatternMatcher, UsernameAnalyzer,
+                       encode_usernames, load_patterns)
+
+NAMES = ['Bot_Spammer99', 'alice', '', 'aaaa', 'ÜberUser', 'x' * 100, 'user\0bot', 'spamspam', '12345678']
+
+
+def _bytes(name):
+    return name.replace('\0', '').lower().encode('utf-8')[:MAX_USERNAME_BYTES]
+
+
+def _naive_count(patterns, name):
+    data = _bytes(name)
+    return sum(data[i:].startswith(pattern.lower().encode('utf-8'))
+               for pattern in dict.fromkeys(patterns) for i in range(len(data)))
+
+
+def _naive_entropy(name):
+    data = _bytes(name)
+    if not data:
+        return 0.0
+    return -sum(count / len(data) * math.log2(count / len(data)) for count in Counter(data).values())
+
+
+def test_encoding_lowercases_truncates_and_drops_nul_bytes():
+    codes, lengths = encode_usernames(NAMES)
+    assert lengths.tolist() == [len(_bytes(name)) for name in NAMES]
+    for row, name in enumerate(NAMES):
+        assert codes[row, :lengths[row]].tobytes() == _bytes(name)
+        assert not codes[row, lengths[row]:].any()
+    codes, lengths = encode_usernames([])
+    assert codes.shape[0] == 0 and len(lengths) == 0
+
+
+@pytest.mark.parametrize('patterns', [['bot', 'spam', 'am'], ['aa'], ['user', 'ser', 'r'], ['über', '99', '1234']])
+def test_pattern_counts_match_a_naive_scan(patterns):
+    matcher = PatternMatcher(patterns)
+    counts = matcher.count(encode_usernames(NAMES)[0])
+    assert counts.tolist() == [_naive_count(patterns, name) for name in NAMES]
+
+
+def test_matching_is_case_insensitive():
+    assert PatternMatcher(['Spam']).matches(['SPAMMY', 'clean', 'sPaM']).tolist() == [True, False, True]
+
+
+def test_matcher_needs_a_pattern():
+    with pytest.raises(ValueError):
+        PatternMatcher(['', ''])
+
+
+def test_character_features_match_their_definitions():
+    features = UsernameAnalyzer(['bot']).features(NAMES)
+    assert list(features) == USERNAME_COLUMNS
+    np.testing.assert_allclose(features['username_entropy'], [_naive_entropy(name) for name in NAMES], atol=1e-12)
+    expected_digits = [sum(chr(b).isdigit() for b in _bytes(name)) / max(len(_bytes(name)), 1) for name in NAMES]
+    np.testing.assert_allclose(features['username_digit_ratio'], expected_digits)
+
+    ngrams = np.column_stack([features[f'username_ngram_{bucket:02d}'] for bucket in range(NGRAM_BUCKETS)])
+    # Shares of each name's n-grams; an empty name is too short to have any
+    np.testing.assert_allclose(ngrams.sum(axis=1), [0.0 if name == '' else 1.0 for name in NAMES])
+    # Features of a name never depend on the rest of the batch
+    alone = UsernameAnalyzer(['bot']).features([NAMES[0]])
+    for column in USERNAME_COLUMNS:
+        assert alone[column][0] == pytest.approx(features[column][0])
+
+
+def test_load_patterns_skips_comments_and_blank_lines(tmp_path):
+    path = tmp_path / 'patterns.txt'
+    path.write_text('# spam words\nbot\n\n  promo  # giveaways\n#disabled\n', encoding='utf-8')
+    assert load_patterns(str(path)) == ['bot', 'promo']
@@ -0,0 +1,296 @@
+"""
+Compiled, array-based evaluation of the trained XGBoost ensemble
+
+export_engine() flattens every tree of the booster into a few NumPy
+arrays (split feature, threshold, children, default direction, leaf
+value, cover) and folds the StandardScaler into the thresholds, so the
+engine scores raw feature rows directly. CompiledEnsemble evaluates all
+trees for a batch at once by walking one level per step; it needs only
+NumPy, so the app can serve from the .npz file without importing xgboost.
+The same walk yields per-feature contributions to each score.
+"""
+
+import json
+
+import numpy as np
+
+ENGINE_FORMAT = 'tree-engine-v1'
+
+# Largest |compiled - predict_proba| difference accepted by validate()
+VALIDATION_TOLERANCE = 1e-5
+
+
+def _base_margin(learner):
+    """Margin the ensemble starts from (logit of the stored base_score)"""
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f"Unsupported objective for the compiled engine: {objective}")
+    base_score = float(str(learner['learner_model_param']['base_score']).strip('[]'))
+    return float(np.log(base_score / (1.0 - base_score)))
+
+
+def fold_thresholds(condition, mean, scale):
+    """Raw-unit thresholds equivalent to XGBoost's splits on standardized features
+
+    XGBoost compares float32(scaled x) < float32(t). Split points are
+    observed data values, so ties are common and the naive
+    t * scale + mean is off by a rounding step for exactly those rows.
+    Instead, bisect for the smallest raw x whose scaled float32 value
+    reaches t. The scaled value is monotone in x, so x < that value is
+    exactly the same test.
+    """
+    target = np.asarray(condition, dtype=np.float32)
+    mean = np.asarray(mean, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+
+    def reaches(x):
+        return ((x - mean) / scale).astype(np.float32) >= target
+
+    guess = target.astype(np.float64) * scale + mean
+    step = np.abs(scale) * (np.abs(target) + 1.0) * 1e-6 + np.abs(guess) * 1e-12
+    lo, hi = guess - step, guess + step
+    for _ in range(64):
+        too_high = reaches(lo)
+        too_low = ~reaches(hi)
+        if not (too_high.any() or too_low.any()):
+            break
+        step = np.where(too_high | too_low, step * 2, step)
+        lo = np.where(too_high, guess - step, lo)
+        hi = np.where(too_low, guess + step, hi)
+
+    for _ in range(128):
+        mid = lo + (hi - lo) / 2
+        done = (mid <= lo) | (mid >= hi)
+        if done.all():
+            break
+        upper = reaches(mid) & ~done
+        hi = np.where(upper, mid, hi)
+        lo = np.where(~upper & ~done, mid, lo)
+    return hi
+
+
+def flatten_booster(booster, mean=None, scale=None):
+    """Concatenate every tree into flat node arrays
+
+    Nodes are renumbered so a split's right child is always left + 1, and
+    child indices become global. Leaves point at themselves, with an
+    infinite threshold and missing values sent left, so a row that reaches
+    a leaf early stays there while deeper trees finish. With mean/scale,
+    thresholds on standardized features are mapped back to raw feature
+    units (see fold_thresholds).
+    """
+    learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+    trees = learner['gradient_booster']['model']['trees']
+    n_features = int(learner['learner_model_param']['num_feature'])
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+
+    features, thresholds, lefts, default_left, values, covers, roots = [], [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+    for tree in trees:
+        if any(tree['split_type']):
+            raise ValueError('Categorical splits are not supported by the compiled engine')
+        left = np.asarray(tree['left_children'], dtype=np.int64)
+        right = np.asarray(tree['right_children'], dtype=np.int64)
+        feature = np.asarray(tree['split_indices'], dtype=np.int64)
+        condition = np.asarray(tree['split_conditions'], dtype=np.float64)
+        is_leaf = left == -1
+
+        # Renumber breadth-first so every right child directly follows its left sibling
+        order, depth, new_left = [0], [0], {}
+        for node, node_depth in zip(order, depth):
+            if not is_leaf[node]:
+                new_left[node] = len(order)
+                order += [left[node], right[node]]
+                depth += [node_depth + 1, node_depth + 1]
+        order = np.asarray(order)
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+
+        threshold = np.full(len(order), np.inf)
+        splits = ~is_leaf[order]
+        threshold[splits] = fold_thresholds(condition[order][splits], mean[feature[order][splits]],
+                                            scale[feature[order][splits]])
+        child = np.array([new_left.get(node, position[node]) for node in order], dtype=np.int64)
+
+        features.append(np.where(splits, feature[order], 0))
+        thresholds.append(threshold)
+        lefts.append(child + offset)
+        default_left.append(np.asarray(tree['default_left'], dtype=bool)[order] | ~splits)
+        values.append(np.where(splits, 0.0, condition[order]))
+        covers.append(np.asarray(tree['sum_hessian'], dtype=np.float64)[order])
+        roots.append(offset)
+        max_depth = max(max_depth, max(depth))
+        offset += len(order)
+
+    return {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'default_left': np.concatenate(default_left),
+        'value': np.concatenate(values),
+        'cover': np.concatenate(covers),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'max_depth': np.int64(max_depth),
+        'base_margin': np.float64(_base_margin(learner))
+    }
+
+
+class CompiledEnsemble:
+    """Pure-NumPy scorer for a flattened ensemble over raw (unscaled) features"""
+
+    def __init__(self, arrays, feature_columns, version=None, cascade=None, username_patterns=None,
+                 drift_reference=None):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.default_left = arrays['default_left']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+        self.base_margin = float(arrays['base_margin'])
+        self.feature_columns = tuple(feature_columns)
+        self.version = version
+        self.cascade = cascade
+        self.username_patterns = username_patterns
+        self.drift_reference = drift_reference
+        # Engines exported before covers were stored cannot explain predictions
+        self.cover = arrays.get('cover')
+        self.expected = self._expected_values() if self.cover is not None else None
+        # Leaves have an infinite threshold, which an infinite feature value still reaches
+        self.is_split = np.isfinite(self.threshold)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _expected_values(self):
+        """Cover-weighted mean leaf value below every node (a leaf's own value)"""
+        split = np.isfinite(self.threshold)
+        left = self.left.astype(np.intp)
+        right = np.where(split, left + 1, left)
+        left_cover, right_cover = self.cover[left], self.cover[right]
+        total = np.maximum(left_cover + right_cover, np.finfo(np.float64).tiny)
+        expected = self.value.astype(np.float64)
+        # Each pass settles one more level, bottom-up
+        for _ in range(self.max_depth):
+            expected = np.where(split, (left_cover * expected[left] + right_cover * expected[right]) / total,
+                                self.value)
+        return expected
+
+    @staticmethod
+    def _rows(X):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        return X
+
+    def _walk(self, X):
+        """Yield (nodes, features, children) for every level of the batched traversal"""
+        flat = X.ravel()
+        row_offsets = (np.arange(len(X), dtype=np.intp) * X.shape[1])[:, np.newaxis]
+        has_missing = np.isnan(flat).any()
+
+        nodes = np.repeat(self.roots[np.newaxis, :].astype(np.intp), len(X), axis=0)
+        for _ in range(self.max_depth):
+            cells = row_offsets + np.take(self.feature, nodes)
+            values = np.take(flat, cells)
+            go_right = (values >= np.take(self.threshold, nodes)) & np.take(self.is_split, nodes)
+            if has_missing:
+                go_right |= np.isnan(values) & ~np.take(self.default_left, nodes)
+            children = np.take(self.left, nodes) + go_right
+            yield nodes, cells, children
+            nodes = children
+
+    def leaves(self, X):
+        """Leaf node index reached in every tree, shape (rows, trees)"""
+        X = self._rows(X)
+        nodes = np.repeat(self.roots[np.newaxis, :].astype(np.intp), len(X), axis=0)
+        for _, _, nodes in self._walk(X):
+            pass
+        return nodes
+
+    def contributions(self, X):
+        """Per-feature contributions to the margin, shape (rows, features + 1)
+
+        Each split on a row's path credits its feature with the change in
+        expected value from the node to the child taken (Saabas). The last
+        column is the bias: base margin plus every tree's expected value,
+        so a row sums to its decision_function. Laid out like XGBoost's
+        pred_contribs output.
+        """
+        if self.expected is None:
+            raise ValueError('This engine was exported without node covers; re-export it to explain predictions')
+        X = self._rows(X)
+        n_rows, n_features = X.shape
+        totals = np.zeros(n_rows * n_features)
+        for nodes, cells, children in self._walk(X):
+            delta = np.take(self.expected, children) - np.take(self.expected, nodes)
+            totals += np.bincount(cells.ravel(), weights=delta.ravel(), minlength=totals.size)
+        contributions = np.empty((n_rows, n_features + 1))
+        contributions[:, :-1] = totals.reshape(n_rows, n_features)
+        contributions[:, -1] = self.base_margin + self.expected[self.roots].sum()
+        return contributions
+
+    def decision_function(self, X):
+        """Raw margin: base margin plus the sum of leaf values"""
+        return self.base_margin + self.value[self.leaves(X)].sum(axis=1)
+
+    def predict_proba(self, X):
+        """Class probabilities, shaped like XGBClassifier.predict_proba"""
+        probability = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - probability, probability])
+
+    def validate(self, model, scaler, X, tolerance=VALIDATION_TOLERANCE):
+        """Largest difference from model.predict_proba on X; raises beyond tolerance"""
+        expected = model.predict_proba(scaler.transform(X))[:, 1]
+        compiled = self.predict_proba(np.asarray(X, dtype=np.float64))[:, 1]
+        difference = float(np.max(np.abs(compiled - expected))) if len(expected) else 0.0
+        if difference > tolerance:
+            raise ValueError(f"Compiled engine differs from predict_proba by {difference:.3g} (tolerance {tolerance:g})")
+        return difference
+
+    def save(self, filepath):
+        arrays = {name: getattr(self, name) for name in
+                  ('feature', 'threshold', 'left', 'default_left', 'value', 'roots')}
+        if self.cover is not None:
+            arrays['cover'] = self.cover
+        meta = {
+            'format': ENGINE_FORMAT,
+            'feature_columns': list(self.feature_columns),
+            'version': self.version,
+            'cascade': dict(self.cascade, coef=self.cascade['coef'].tolist()) if self.cascade is not None else None,
+            'username_patterns': self.username_patterns,
+            'drift_reference': self.drift_reference
+        }
+        np.savez(filepath, max_depth=np.int64(self.max_depth), base_margin=np.float64(self.base_margin),
+                 meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, filepath):
+        with np.load(filepath, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files if name != 'meta'}
+            meta = json.loads(str(data['meta']))
+        if meta.get('format') != ENGINE_FORMAT:
+            raise ValueError(f"{filepath} is not a {ENGINE_FORMAT} file")
+        cascade = meta.get('cascade')
+        if cascade is not None:
+            cascade['coef'] = np.asarray(cascade['coef'], dtype=np.float64)
+        return cls(arrays, meta['feature_columns'], meta.get('version'), cascade, meta.get('username_patterns'),
+                   meta.get('drift_reference'))
+
+
+def fold_cascade(cascade, scaler):
+    """Cascade first stage rewritten to take raw features instead of scaled ones"""
+    coef = np.asarray(cascade['coef'], dtype=np.float64) / scaler.scale_
+    return dict(cascade, coef=coef, intercept=float(cascade['intercept'] - np.dot(coef, scaler.mean_)))
+
+
+def export_engine(model, scaler, feature_columns, version=None, cascade=None, username_patterns=None,
+                  drift_reference=None):
+    """Compile a trained XGBClassifier plus its StandardScaler into a CompiledEnsemble"""
+    arrays = flatten_booster(model.get_booster(), scaler.mean_, scaler.scale_)
+    if cascade is not None:
+        cascade = fold_cascade(cascade, scaler)
+    return CompiledEnsemble(arrays, feature_columns, version, cascade, username_patterns, drift_reference)
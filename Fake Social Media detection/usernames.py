@@ -0,0 +1,237 @@
+"""
+Vectorized username analysis: multi-pattern matching and character features
+
+Usernames are lowercased, UTF-8 encoded and packed into one padded byte
+matrix, so every feature is computed column by column over the whole
+batch instead of string by string:
+
+    username_length        length in bytes (capped at MAX_USERNAME_BYTES)
+    username_digit_ratio   share of characters that are digits
+    username_entropy       Shannon entropy of the characters, in bits
+    username_pattern_hits  occurrences of any configured pattern
+    username_ngram_00..15  frequency of hashed character trigrams per bucket
+
+Pattern matching uses an Aho-Corasick automaton compiled to a dense
+transition table, so a batch is scanned once for any number of patterns.
+"""
+
+import numpy as np
+
+# Longer usernames are truncated before analysis
+MAX_USERNAME_BYTES = 64
+
+NGRAM_SIZE = 3
+NGRAM_BUCKETS = 16
+
+USERNAME_COLUMNS = [
+    'username_length', 'username_digit_ratio', 'username_entropy', 'username_pattern_hits'
+] + [f'username_ngram_{bucket:02d}' for bucket in range(NGRAM_BUCKETS)]
+
+# Substrings common in spam, bot and throwaway account names
+DEFAULT_USERNAME_PATTERNS = [
+    'bot', 'fake', 'spam', 'user', 'follow', 'likes', 'free', 'promo', 'giveaway',
+    'winner', 'crypto', 'bitcoin', 'btc', 'forex', 'invest', 'profit', 'cash',
+    'money', 'earn', 'deal', 'offer', 'discount', 'click', 'link', 'xxx', 'sexy',
+    'babe', 'official', 'real', 'support', 'admin', 'verify', 'account', 'test',
+    'temp', 'anon', 'guest', 'default', 'shop', 'store', 'sale', 'boost', 'viral',
+    'growth', 'news24', '1234', '0000'
+]
+
+# Frame bytes marking the start and end of a username in n-grams
+_START, _END = 2, 3
+
+
+def load_patterns(filepath):
+    """Read a pattern file: one pattern per line, '#' starts a comment"""
+    patterns = []
+    with open(filepath, encoding='utf-8') as f:
+        for line in f:
+            pattern = line.split('#', 1)[0].strip()
+            if pattern:
+                patterns.append(pattern)
+    return patterns
+
+
+def encode_usernames(usernames, max_bytes=MAX_USERNAME_BYTES):
+    """Lowercased UTF-8 bytes as a zero-padded uint8 matrix, plus byte lengths"""
+    names = [str(name) for name in usernames]
+    n = len(names)
+    if n == 0:
+        return np.zeros((0, 1), dtype=np.uint8), np.zeros(0, dtype=np.int64)
+    # Lowercase and encode the whole batch as one string, then cut it at the separators
+    data = np.frombuffer('\0'.join(names).lower().encode('utf-8'), dtype=np.uint8)
+    separators = np.flatnonzero(data == 0)
+    if len(separators) != max(n - 1, 0):
+        # A username contains a NUL byte; drop those bytes name by name
+        return encode_usernames([name.replace('\0', '') for name in names], max_bytes)
+
+    starts = np.concatenate([[0], separators + 1])
+    lengths = np.minimum(np.diff(np.concatenate([starts, [len(data) + 1]])) - 1, max_bytes)
+    width = int(lengths.max()) if n else 0
+    codes = np.zeros((n, max(width, 1)), dtype=np.uint8)
+    row = np.repeat(np.arange(n), lengths)
+    column = np.arange(len(row)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    codes[row, column] = data[np.repeat(starts, lengths) + column]
+    return codes, lengths.astype(np.int64)
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton over bytes, compiled to a dense transition table
+
+    count() advances every row's state one byte column at a time with a
+    single table lookup, so the cost is one vectorized step per column no
+    matter how many patterns there are. Overlapping occurrences all count.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = tuple(dict.fromkeys(p.lower() for p in patterns if p))
+        if not self.patterns:
+            raise ValueError('PatternMatcher needs at least one non-empty pattern')
+
+        # Trie of the patterns
+        children = [{}]
+        outputs = [0]
+        for pattern in self.patterns:
+            state = 0
+            for byte in pattern.encode('utf-8'):
+                if byte not in children[state]:
+                    children[state][byte] = len(children)
+                    children.append({})
+                    outputs.append(0)
+                state = children[state][byte]
+            outputs[state] += 1
+
+        # Breadth-first: fill in failure transitions and inherit matches from the failure state
+        delta = np.zeros((len(children), 256), dtype=np.int64)
+        outputs = np.asarray(outputs, dtype=np.int32)
+        fail = np.zeros(len(children), dtype=np.int64)
+        order = [0]
+        for state in order:
+            if state:
+                delta[state] = delta[fail[state]]
+            for byte, child in children[state].items():
+                fail[child] = delta[fail[state], byte] if state else 0
+                delta[state, byte] = child
+                order.append(child)
+            if state:
+                outputs[state] += outputs[fail[state]]
+
+        # Padding bytes send every row back to the root without a match
+        delta[:, 0] = 0
+        # States are stored premultiplied by 256 so a step is table[state + byte]
+        self.table = (delta * 256).astype(np.int64).ravel()
+        self.outputs = outputs
+
+    @property
+    def n_states(self):
+        return len(self.outputs)
+
+    def count(self, codes):
+        """Pattern occurrences per row of an encode_usernames() byte matrix"""
+        states = np.zeros(len(codes), dtype=np.int64)
+        hits = np.zeros(len(codes), dtype=np.int32)
+        for column in codes.T:
+            states = np.take(self.table, states + column)
+            hits += np.take(self.outputs, states >> 8)
+        return hits
+
+    def matches(self, usernames):
+        """True where a username contains any pattern (case-insensitive)"""
+        return self.count(encode_usernames(usernames)[0]) > 0
+
+
+def digit_ratio(codes, lengths):
+    digits = ((codes >= ord('0')) & (codes <= ord('9'))).sum(axis=1)
+    return digits / np.maximum(lengths, 1)
+
+
+def entropy(codes, lengths):
+    """Shannon entropy of each row's byte distribution, in bits"""
+    n, width = codes.shape
+    if n == 0:
+        return np.zeros(0)
+    # Runs of equal bytes in the sorted rows are the per-character counts
+    ordered = np.sort(codes, axis=1).ravel()
+    starts = np.ones(len(ordered), dtype=bool)
+    starts[1:] = ordered[1:] != ordered[:-1]
+    starts[::width] = True
+    run_starts = np.flatnonzero(starts)
+    counts = np.diff(np.concatenate([run_starts, [len(ordered)]])).astype(np.float64)
+    # Padding sorts first and is not a character
+    counts[ordered[run_starts] == 0] = 0
+    plogp = np.bincount(run_starts // width, weights=counts * np.log2(np.maximum(counts, 1)), minlength=n)
+    length = lengths.astype(np.float64)
+    safe = np.maximum(length, 1)
+    return np.where(length > 0, np.log2(safe) - plogp / safe, 0.0)
+
+
+def ngram_codes(codes, lengths, size=NGRAM_SIZE):
+    """Every framed character n-gram of each row as an integer, plus a validity mask
+
+    Rows are framed with start and end markers, so prefixes and suffixes
+    form their own n-grams. Each n-gram maps to a distinct integer (its
+    bytes in base 257), the same in every process.
+    """
+    n, width = codes.shape
+    framed = np.zeros((n, width + 2), dtype=np.uint32)
+    framed[:, 0] = _START
+    framed[:, 1:width + 1] = codes
+    framed[np.arange(n), lengths + 1] = _END
+
+    positions = max(width + 3 - size, 0)
+    grams = np.zeros((n, positions), dtype=np.uint32)
+    for offset in range(size):
+        grams = grams * np.uint32(257) + framed[:, offset:offset + positions]
+    valid = np.arange(positions)[np.newaxis, :] <= (lengths + 2 - size)[:, np.newaxis]
+    return grams, valid
+
+
+def ngram_frequencies(codes, lengths, size=NGRAM_SIZE, buckets=NGRAM_BUCKETS):
+    """Share of each row's framed character n-grams falling in each hash bucket"""
+    n = len(codes)
+    grams, valid = ngram_codes(codes, lengths, size)
+    if n == 0 or grams.shape[1] == 0:
+        return np.zeros((n, buckets))
+    # Multiplicative hashing; the top bits pick the bucket
+    bucket = (grams * np.uint32(2654435761)) >> np.uint32(32 - int(np.log2(buckets)))
+    keys = (np.arange(n)[:, np.newaxis] * buckets + bucket.astype(np.int64))[valid]
+    counts = np.bincount(keys, minlength=n * buckets).reshape(n, buckets)
+    return counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+
+
+class UsernameAnalyzer:
+    """Compute USERNAME_COLUMNS for a batch of usernames with one pattern set"""
+
+    def __init__(self, patterns=None):
+        self.matcher = PatternMatcher(DEFAULT_USERNAME_PATTERNS if patterns is None else patterns)
+
+    @property
+    def patterns(self):
+        return list(self.matcher.patterns)
+
+    def features_from_codes(self, codes, lengths):
+        """Feature columns for an encode_usernames() result"""
+        features = {
+            'username_length': lengths.astype(np.float64),
+            'username_digit_ratio': digit_ratio(codes, lengths),
+            'username_entropy': entropy(codes, lengths),
+            'username_pattern_hits': self.matcher.count(codes).astype(np.float64)
+        }
+        frequencies = ngram_frequencies(codes, lengths)
+        for bucket in range(NGRAM_BUCKETS):
+            features[f'username_ngram_{bucket:02d}'] = frequencies[:, bucket]
+        return features
+
+    def features(self, usernames):
+        return self.features_from_codes(*encode_usernames(usernames))
+
+
+_default_analyzer = None
+
+
+def default_analyzer():
+    """Shared analyzer with DEFAULT_USERNAME_PATTERNS, built on first use"""
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = UsernameAnalyzer()
+    return _default_analyzer